@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import math
+from typing import Awaitable, Callable, Collection
+
+DEFAULT_MAX_QUEUED_JOBS = 1000
+DEFAULT_MAX_QUEUED_BYTES = 100 * 1024**3
+DEFAULT_MIN_FREE_BYTES = 2 * 1024**3
+DEFAULT_RETRY_AFTER = 60
+MAX_RETRY_AFTER = 3600
+
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    """Upload limits; ``0`` disables a limit."""
+
+    max_queued_jobs: int = DEFAULT_MAX_QUEUED_JOBS
+    max_queued_bytes: int = DEFAULT_MAX_QUEUED_BYTES
+    min_free_bytes: int = DEFAULT_MIN_FREE_BYTES
+
+
+@dataclass(frozen=True)
+class AdmissionUsage:
+    queued_jobs: int
+    queued_bytes: int
+    free_bytes: int | None
+    # Recent processing throughput, used to predict when room frees up.
+    drain_bytes_per_second: float | None = None
+    seconds_per_job: float | None = None
+
+
+@dataclass(frozen=True)
+class AdmissionRejection:
+    status_code: int
+    detail: str
+    retry_after: int | None = None
+
+
+def check_admission(
+    limits: AdmissionLimits,
+    usage: AdmissionUsage,
+    incoming_bytes: int | None,
+    incoming_jobs: int = 1,
+    *,
+    written: bool = False,
+) -> AdmissionRejection | None:
+    """Decide whether an upload of ``incoming_bytes`` may start.
+
+    Full queues answer 429 and low disk 507, each with a ``retry_after``
+    estimated from how fast the worker has been draining the queue. A request
+    that could never fit answers 413 instead, since retrying cannot help.
+    ``written`` rechecks an upload that is already on disk, so its bytes are
+    no longer deducted from the free space a second time.
+    """
+    incoming = incoming_bytes or 0
+    if limits.max_queued_bytes and incoming > limits.max_queued_bytes:
+        return AdmissionRejection(413, "Upload exceeds the queued-bytes limit.")
+    if limits.max_queued_jobs:
+        excess_jobs = usage.queued_jobs + incoming_jobs - limits.max_queued_jobs
+        if excess_jobs > 0:
+            return AdmissionRejection(
+                429,
+                "The queue is full; try again later.",
+                _retry_after(
+                    excess_jobs * usage.seconds_per_job
+                    if usage.seconds_per_job
+                    else None
+                ),
+            )
+    if limits.max_queued_bytes:
+        excess_bytes = usage.queued_bytes + incoming - limits.max_queued_bytes
+        if excess_bytes > 0:
+            return AdmissionRejection(
+                429,
+                "Too much audio is already queued; try again later.",
+                _retry_after(_drain_seconds(excess_bytes, usage)),
+            )
+    if limits.min_free_bytes and usage.free_bytes is not None:
+        deficit = limits.min_free_bytes - usage.free_bytes
+        if not written:
+            deficit += incoming
+        if deficit > 0:
+            # Finished jobs release their uploads, so disk frees at drain rate.
+            can_free = usage.queued_bytes >= deficit
+            return AdmissionRejection(
+                507,
+                "Not enough free disk space for this upload.",
+                _retry_after(_drain_seconds(deficit, usage)) if can_free else None,
+            )
+    return None
+
+
+def _drain_seconds(amount: int, usage: AdmissionUsage) -> float | None:
+    rate = usage.drain_bytes_per_second
+    return amount / rate if rate else None
+
+
+def _retry_after(seconds: float | None) -> int:
+    if seconds is None:
+        return DEFAULT_RETRY_AFTER
+    return min(max(math.ceil(seconds), 1), MAX_RETRY_AFTER)
+
+
+class AdmissionMiddleware:
+    """Runs ``check`` before an upload body is read, using Content-Length.
+
+    A route-level dependency would be too late: form routes parse the whole
+    body before their dependencies run. Uploads without a Content-Length
+    (chunked bodies) answer 411, since their size cannot be checked up front.
+    """
+
+    def __init__(
+        self,
+        app,  # type: ignore[no-untyped-def]
+        *,
+        paths: Collection[str],
+        check: Callable[[int], Awaitable[AdmissionRejection | None]],
+    ) -> None:
+        self.app = app
+        self.paths = frozenset(paths)
+        self.check = check
+
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore[no-untyped-def]
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] in self.paths
+        ):
+            length = _content_length(scope)
+            if length is None:
+                rejection: AdmissionRejection | None = AdmissionRejection(
+                    411, "Uploads must send a Content-Length header."
+                )
+            else:
+                rejection = await self.check(length)
+            if rejection is not None:
+                await _send_rejection(send, rejection)
+                return
+        await self.app(scope, receive, send)
+
+
+def _content_length(scope) -> int | None:  # type: ignore[no-untyped-def]
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return max(int(value), 0)
+            except ValueError:
+                return None
+    return None
+
+
+async def _send_rejection(send, rejection: AdmissionRejection) -> None:  # type: ignore[no-untyped-def]
+    body = json.dumps({"detail": rejection.detail}).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("ascii")),
+        # The body is left unread, so the connection cannot be reused.
+        (b"connection", b"close"),
+    ]
+    if rejection.retry_after is not None:
+        headers.append((b"retry-after", str(rejection.retry_after).encode("ascii")))
+    await send(
+        {
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": headers,
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
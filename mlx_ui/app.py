@@ -1,42 +1,141 @@
-from dataclasses import asdict
-from datetime import datetime, timezone
+import asyncio
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta, timezone
+import itertools
+import json
 import logging
+import mimetypes
 from pathlib import Path
 import shutil
 import threading
+import time
+from typing import Callable, Iterator
 from uuid import uuid4
 
-from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
 
+from mlx_ui.admission import (
+    AdmissionMiddleware,
+    AdmissionRejection,
+    AdmissionUsage,
+    check_admission,
+)
+from mlx_ui.compression import (
+    accepts_gzip,
+    is_compressed,
+    iter_decompressed,
+    list_result_names,
+    locate,
+    open_text,
+)
 from mlx_ui.db import (
+    ID_CHUNK_SIZE,
+    PREVIEW_CHARS,
     JobRecord,
+    SegmentRecord,
+    clear_result_manifests,
+    complete_idempotency_key,
     delete_history_job,
     delete_history_jobs,
+    delete_queued_batch,
     delete_queued_job,
+    get_batch,
     get_job,
+    get_job_previews,
     init_db,
-    insert_job,
+    insert_jobs,
+    list_eta_jobs,
+    list_export_jobs,
     list_history_jobs,
+    list_job_segments,
     list_jobs,
+    list_result_manifests,
+    move_batch,
+    queued_upload_usage,
+    read_segment_text,
+    recent_throughput,
+    record_result_access,
     recover_running_jobs,
+    release_idempotency_key,
+    reserve_idempotency_key,
+    retention_usage,
+    search_available,
+    update_job_preview,
+)
+from mlx_ui.ingest import (
+    IngestError,
+    copy_upload,
+    ingest_multipart,
+    multipart_boundary,
+)
+from mlx_ui.eta import HISTORY_SAMPLE, estimate_queue_etas
+from mlx_ui.export import stream_csv, stream_jsonl, stream_results_zip
+from mlx_ui.formatters import (
+    MEDIA_TYPES,
+    OUTPUT_FORMATS,
+    Segment,
+    TranscriptResult,
+    parse_timestamp,
+    render_result,
+    result_filename,
+)
+from mlx_ui.layout import (
+    is_safe_path_component,
+    job_ids_under,
+    resolve_job_dir,
+    sharded_job_dir,
 )
 from mlx_ui.logging_config import configure_logging
+from mlx_ui.manifest import start_result_reconciler
+from mlx_ui.media import MediaProbeError, probe_media
+from mlx_ui.outbox import start_outbox_sender
+from mlx_ui.retention import start_retention_janitor
+from mlx_ui.search import index_missing_transcripts, search
 from mlx_ui.settings import (
     build_settings_snapshot,
     build_telegram_snapshot,
     list_downloaded_models,
+    normalize_language_models,
+    read_cached_settings,
+    resolve_admission_limits,
+    resolve_retention_policy,
     resolve_transcriber_with_settings,
     update_settings_file,
+    validate_job_options,
     validate_settings_payload,
 )
+from mlx_ui.telegram import OUTBOX_CHANNEL as TELEGRAM_OUTBOX_CHANNEL
+from mlx_ui.telegram import deliver_telegram_payload
+from mlx_ui.trash import (
+    TRASH_DIRNAME,
+    DeletionManager,
+    DeletionTask,
+    discard_job_dir,
+    get_deletion_manager,
+)
 from mlx_ui.update_check import (
     DEFAULT_TIMEOUT,
     check_for_updates,
     is_update_check_disabled,
 )
+from mlx_ui.upload_sessions import UploadSessionError, UploadSessionStore
 from mlx_ui.uploads import cleanup_upload_path
+from mlx_ui.watch_folder import read_watch_folder_config, start_watch_folder
+from mlx_ui.webhooks import OUTBOX_CHANNEL as WEBHOOK_OUTBOX_CHANNEL
+from mlx_ui.webhooks import (
+    deliver_webhook_payload,
+    enqueue_webhook_delivery,
+    validate_callback_url,
+)
 from mlx_ui.worker import start_worker
 
 app = FastAPI(title="Whisper WebUI (MLX)")
@@ -54,6 +153,15 @@ app.state.base_dir = BASE_DIR
 app.state.worker_enabled = True
 app.state.update_check_enabled = True
 DEFAULT_LANGUAGE = "any"
+PROBE_CONCURRENCY = 4
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+MAX_PREVIEW_BATCH = 500
+EXPORT_MEDIA_TYPES = {
+    "zip": "application/zip",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
 logger = logging.getLogger(__name__)
 
 
@@ -88,6 +196,9 @@ def startup() -> None:
     recovered = recover_running_jobs(get_db_path())
     if recovered:
         logger.warning("Recovered %s running job(s) after unclean shutdown.", recovered)
+    get_upload_sessions().expire()
+    for root in (get_results_dir(), get_uploads_dir()):
+        get_deletion_manager().collect(root)
     if getattr(app.state, "worker_enabled", True):
         transcriber = resolve_transcriber_with_settings(base_dir=base_dir)
         start_worker(
@@ -95,7 +206,36 @@ def startup() -> None:
             get_uploads_dir(),
             get_results_dir(),
             transcriber=transcriber,
+            settings_base_dir=base_dir,
         )
+        start_outbox_sender(
+            get_db_path(),
+            handlers={
+                TELEGRAM_OUTBOX_CHANNEL: deliver_telegram_payload,
+                WEBHOOK_OUTBOX_CHANNEL: deliver_webhook_payload,
+            },
+        )
+        watch_config = read_watch_folder_config()
+        if watch_config is not None:
+            start_watch_folder(
+                get_db_path(),
+                ensure_uploads_dir(),
+                watch_config,
+                prepare=_prepare_watched_upload,
+            )
+        start_result_reconciler(get_db_path(), get_results_dir())
+        start_retention_janitor(
+            get_db_path(),
+            get_results_dir(),
+            get_uploads_dir(),
+            policy=lambda: resolve_retention_policy(read_cached_settings(base_dir)),
+        )
+        threading.Thread(
+            target=index_missing_transcripts,
+            args=(get_db_path(), get_results_dir()),
+            name="mlx-ui-search-backfill",
+            daemon=True,
+        ).start()
     if (
         getattr(app.state, "update_check_enabled", True)
         and not is_update_check_disabled()
@@ -135,46 +275,41 @@ def ensure_uploads_dir() -> Path:
     return uploads_dir
 
 
-def clear_directory(path: Path) -> None:
+def trash_directory_contents(
+    manager: DeletionManager,
+    task: DeletionTask,
+    path: Path,
+    on_trashed: Callable[[list[str]], None] | None = None,
+) -> None:
+    """Move every entry of ``path`` to the trash.
+
+    ``on_trashed`` gets the job ids under each entry once it has moved, listed
+    just before the move so jobs written elsewhere meanwhile are not included.
+    """
     path.mkdir(parents=True, exist_ok=True)
-    for entry in path.iterdir():
+    entries = [entry for entry in path.iterdir() if entry.name != TRASH_DIRNAME]
+    task.total = len(entries)
+    for entry in entries:
+        job_ids = job_ids_under(entry) if on_trashed is not None else []
         try:
-            if entry.is_dir():
-                shutil.rmtree(entry)
-            else:
-                entry.unlink()
+            moved = manager.discard(entry, path, task)
         except FileNotFoundError:
-            continue
-        except OSError as exc:
-            logger.warning("Failed to remove %s: %s", entry, exc)
-
-
-def remove_results_dir(job_id: str) -> str:
-    if not is_safe_path_component(job_id):
-        logger.warning("Refusing to remove results for unsafe job id %s", job_id)
-        return "failed"
-    results_dir = get_results_dir()
-    job_dir = results_dir / job_id
-    results_dir_resolved = results_dir.resolve()
-    job_dir_resolved = job_dir.resolve()
-    if not job_dir_resolved.is_relative_to(results_dir_resolved):
-        logger.warning("Refusing to remove results outside results dir for job %s", job_id)
-        return "failed"
-    if not job_dir_resolved.exists():
-        return "missing"
-    try:
-        if job_dir_resolved.is_dir():
-            shutil.rmtree(job_dir_resolved)
+            moved = True
+        if moved:
+            task.deleted += 1
+            if on_trashed is not None and job_ids:
+                on_trashed(job_ids)
         else:
-            job_dir_resolved.unlink()
-        return "deleted"
-    except Exception:
-        logger.exception("Failed to remove results for job %s", job_id)
-        return "failed"
+            task.failed += 1
 
 
-def is_safe_path_component(value: str) -> bool:
-    return value not in {"", ".", ".."} and Path(value).name == value
+def remove_results_dir(
+    job_id: str,
+    results_dir: Path,
+    task: DeletionTask | None = None,
+) -> str:
+    """Move a job's results to the trash; they are deleted in the background."""
+    return discard_job_dir(get_deletion_manager(), results_dir, job_id, task)
 
 
 def sanitize_filename(filename: str) -> str:
@@ -200,10 +335,17 @@ def sanitize_display_path(filename: str, fallback: str) -> str:
 def list_result_files(job_id: str) -> list[str]:
     if not is_safe_path_component(job_id):
         return []
-    job_dir = get_results_dir() / job_id
-    if not job_dir.is_dir():
+    manifest = list_result_manifests(get_db_path(), [job_id]).get(job_id)
+    if manifest is not None:
+        return [entry.name for entry in manifest]
+    return _scan_result_names(job_id)
+
+
+def _scan_result_names(job_id: str) -> list[str]:
+    # Only for jobs the reconciler has not recorded yet.
+    if not is_safe_path_component(job_id):
         return []
-    return sorted(path.name for path in job_dir.iterdir() if path.is_file())
+    return list_result_names(resolve_job_dir(get_results_dir(), job_id))
 
 
 def pick_preview_result(results: list[str]) -> str | None:
@@ -220,21 +362,35 @@ def pick_preview_result(results: list[str]) -> str | None:
 
 
 def build_results_index(jobs: list[JobRecord]) -> dict[str, list[str]]:
-    return {job.id: list_result_files(job.id) for job in jobs}
+    manifests = list_result_manifests(get_db_path(), [job.id for job in jobs])
+    return {
+        job.id: (
+            [entry.name for entry in manifests[job.id]]
+            if job.id in manifests
+            else _scan_result_names(job.id)
+        )
+        for job in jobs
+    }
 
 
 def new_job_record(
     job_id: str,
     filename: str,
     upload_path: Path,
+    options: dict[str, object] | None = None,
 ) -> JobRecord:
+    options = options or {}
     return JobRecord(
         id=job_id,
         filename=filename,
         status="queued",
         created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
         upload_path=str(upload_path),
-        language=DEFAULT_LANGUAGE,
+        language=str(options.get("language", DEFAULT_LANGUAGE)),
+        model=options.get("model"),
+        quick=options.get("quick"),
+        output_formats=options.get("output_formats"),
+        callback_url=options.get("callback_url"),
     )
 
 
@@ -285,7 +441,7 @@ def read_root(request: Request):
     queue_jobs, history_jobs = _split_jobs(jobs)
     queued_count = sum(1 for job in queue_jobs if job.status == "queued")
     base_dir = get_base_dir()
-    settings_snapshot = build_settings_snapshot(base_dir=base_dir)
+    settings_snapshot = _settings_snapshot()
     telegram_snapshot = build_telegram_snapshot(base_dir=base_dir)
     downloaded_models = list_downloaded_models()
     settings_saved = request.query_params.get("saved") == "1"
@@ -327,6 +483,13 @@ async def update_settings(request: Request) -> RedirectResponse:
     if whisper_model:
         updates["whisper_model"] = whisper_model
 
+    if "whisper_language_models" in form:
+        language_models = normalize_language_models(
+            str(form.get("whisper_language_models", ""))
+        )
+        if language_models is not None:
+            updates["whisper_language_models"] = language_models
+
     telegram_token = str(form.get("telegram_token", "")).strip()
     if telegram_token:
         updates["telegram_token"] = telegram_token
@@ -339,15 +502,35 @@ async def update_settings(request: Request) -> RedirectResponse:
     if "clear_telegram_chat_id" in form:
         updates["telegram_chat_id"] = ""
 
+    digest_window = _parse_form_number(form.get("telegram_digest_window"))
+    if digest_window is not None and digest_window >= 0:
+        updates["telegram_digest_window"] = digest_window
+    digest_max_items = _parse_form_number(form.get("telegram_digest_max_items"))
+    if digest_max_items is not None and digest_max_items >= 1:
+        updates["telegram_digest_max_items"] = int(digest_max_items)
+
     if updates:
         update_settings_file(get_base_dir(), updates)
 
     return RedirectResponse(url="/?tab=settings&saved=1", status_code=303)
 
 
+def _parse_form_number(value: object) -> float | None:
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
 @app.get("/api/settings")
 def api_settings() -> dict[str, object]:
-    return build_settings_snapshot(base_dir=get_base_dir())
+    return _settings_snapshot()
 
 
 @app.post("/api/settings")
@@ -358,48 +541,439 @@ async def api_update_settings(request: Request) -> dict[str, object]:
         raise HTTPException(status_code=422, detail=errors)
     if updates:
         update_settings_file(get_base_dir(), updates)
-    return build_settings_snapshot(base_dir=get_base_dir())
+    return _settings_snapshot()
 
 
-@app.post("/api/settings/clear-uploads")
-def api_clear_uploads() -> dict[str, str]:
-    clear_directory(get_uploads_dir())
-    return {"status": "ok"}
+def _settings_snapshot() -> dict[str, object]:
+    snapshot = build_settings_snapshot(base_dir=get_base_dir())
+    snapshot["admission"]["usage"] = asdict(_admission_usage())
+    history_jobs, results_bytes = retention_usage(get_db_path())
+    snapshot["retention"]["usage"] = {
+        "history_jobs": history_jobs,
+        "results_bytes": results_bytes,
+    }
+    return snapshot
 
 
-@app.post("/api/settings/clear-results")
-def api_clear_results() -> dict[str, str]:
-    clear_directory(get_results_dir())
-    return {"status": "ok"}
+@app.post("/api/settings/clear-uploads", status_code=202)
+def api_clear_uploads() -> dict[str, object]:
+    uploads_dir = get_uploads_dir()
+    task = get_deletion_manager().submit(
+        "uploads",
+        lambda manager, task: trash_directory_contents(manager, task, uploads_dir),
+    )
+    return {"status": "ok", "task": asdict(task)}
+
+
+@app.post("/api/settings/clear-results", status_code=202)
+def api_clear_results() -> dict[str, object]:
+    db_path = get_db_path()
+    results_dir = get_results_dir()
+
+    def clear(manager: DeletionManager, task: DeletionTask) -> None:
+        trash_directory_contents(
+            manager,
+            task,
+            results_dir,
+            on_trashed=lambda job_ids: clear_result_manifests(
+                db_path, job_ids, time.time()
+            ),
+        )
+
+    task = get_deletion_manager().submit("results", clear)
+    return {"status": "ok", "task": asdict(task)}
+
+
+@app.get("/api/deletions/{task_id}")
+def api_deletion_status(task_id: str) -> dict[str, object]:
+    task = get_deletion_manager().get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404)
+    return asdict(task)
 
 
 @app.post("/upload", response_class=HTMLResponse)
 async def upload_files(
     request: Request,
     files: list[UploadFile] = File(...),
+    model: str | None = Form(None),
+    quick: str | None = Form(None),
+    language: str | None = Form(None),
+    output_formats: list[str] | None = Form(None),
 ):
+    options, errors = validate_job_options(
+        {
+            "model": model,
+            "quick": quick,
+            "language": language,
+            "output_formats": output_formats,
+        }
+    )
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
     uploads_dir = ensure_uploads_dir()
-    db_path = get_db_path()
 
+    stored: list[JobRecord] = []
     for upload in files:
         if not upload.filename:
             continue
-        safe_name = sanitize_filename(upload.filename)
-        display_name = sanitize_display_path(upload.filename, safe_name)
-        job_id = uuid4().hex
-        job_dir = uploads_dir / job_id
-        job_dir.mkdir(parents=True, exist_ok=True)
-        destination = job_dir / safe_name
+        job_id, destination = _allocate_upload(uploads_dir, upload.filename)
         try:
-            with destination.open("wb") as outfile:
-                shutil.copyfileobj(upload.file, outfile)
+            # Starlette spools to an anonymous temp file that cannot be renamed
+            # into place, so copy it, off the event loop.
+            size, sha256 = await asyncio.to_thread(
+                copy_upload, upload.file, destination
+            )
         finally:
             await upload.close()
-        insert_job(db_path, new_job_record(job_id, display_name, destination))
+        job = new_job_record(
+            job_id,
+            sanitize_display_path(upload.filename, destination.name),
+            destination,
+            options,
+        )
+        stored.append(replace(job, upload_bytes=size, sha256=sha256))
 
+    await _queue_uploads(stored)
     return RedirectResponse(url="/?tab=queue", status_code=303)
 
 
+@app.post("/api/uploads")
+async def api_upload_stream(request: Request) -> dict[str, object]:
+    stored = await _ingest_upload_request(request)
+    jobs = await _queue_uploads(stored)
+    return _uploads_response(jobs)
+
+
+@app.post("/api/jobs", status_code=201, response_model=None)
+async def api_submit_jobs(request: Request) -> dict[str, object] | JSONResponse:
+    db_path = get_db_path()
+    key = request.headers.get("idempotency-key")
+    if key is not None:
+        key = key.strip()
+        if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+        # Checked before the body is read, so a retry does not upload again.
+        reserved, stored_response = reserve_idempotency_key(
+            db_path, key, now=time.time(), ttl=IDEMPOTENCY_KEY_TTL
+        )
+        if not reserved:
+            if stored_response is None:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is in progress.",
+                )
+            return JSONResponse(
+                json.loads(stored_response),
+                status_code=201,
+                headers={"Idempotent-Replayed": "true"},
+            )
+    try:
+        stored = await _ingest_upload_request(request, accept_callback=True)
+        if not stored:
+            raise HTTPException(status_code=422, detail=["No files were uploaded"])
+        jobs = await _queue_uploads(stored)
+        etas = estimate_queue_etas(
+            list_eta_jobs(db_path, HISTORY_SAMPLE), datetime.now(timezone.utc)
+        )
+        response = _uploads_response(jobs)
+        for entry in response["jobs"]:
+            eta = etas.get(entry["id"])
+            entry["eta_seconds"] = round(eta) if eta is not None else None
+        known = [entry["eta_seconds"] for entry in response["jobs"]]
+        known = [eta for eta in known if eta is not None]
+        response["eta_seconds"] = max(known) if known else None
+    except BaseException:
+        if key is not None:
+            release_idempotency_key(db_path, key)
+        raise
+    if key is not None:
+        complete_idempotency_key(db_path, key, json.dumps(response))
+    return response
+
+
+async def _ingest_upload_request(
+    request: Request,
+    *,
+    accept_callback: bool = False,
+) -> list[JobRecord]:
+    boundary = multipart_boundary(request.headers.get("content-type"))
+    if boundary is None:
+        raise HTTPException(
+            status_code=415, detail="Expected a multipart/form-data body"
+        )
+    uploads_dir = ensure_uploads_dir()
+    try:
+        result = await ingest_multipart(
+            request.stream(),
+            boundary,
+            lambda filename: _allocate_upload(uploads_dir, filename),
+            uploads_dir,
+        )
+    except IngestError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    fields = result.fields
+    options, errors = validate_job_options(
+        {
+            "model": _last_field(fields, "model"),
+            "quick": _last_field(fields, "quick"),
+            "language": _last_field(fields, "language"),
+            "output_formats": fields.get("output_formats"),
+        }
+    )
+    callback_url = _last_field(fields, "callback_url") if accept_callback else None
+    if callback_url:
+        callback_error = validate_callback_url(callback_url.strip())
+        if callback_error:
+            errors.append(callback_error)
+        else:
+            options["callback_url"] = callback_url.strip()
+    if errors:
+        for ingested in result.files:
+            cleanup_upload_path(ingested.path, uploads_dir, ingested.job_id)
+        raise HTTPException(status_code=422, detail=errors)
+    return [
+        replace(
+            new_job_record(
+                ingested.job_id,
+                sanitize_display_path(ingested.filename, ingested.path.name),
+                ingested.path,
+                options,
+            ),
+            upload_bytes=ingested.size,
+            sha256=ingested.sha256,
+        )
+        for ingested in result.files
+    ]
+
+
+@app.post("/api/upload-sessions", status_code=201)
+async def api_create_upload_session(request: Request) -> dict[str, object]:
+    payload = await request.json()
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail=["Expected a JSON object"])
+    filename = payload.get("filename")
+    size = payload.get("size")
+    if not isinstance(filename, str) or not filename.strip():
+        raise HTTPException(status_code=422, detail=["filename is required"])
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise HTTPException(status_code=422, detail=["size must be a positive integer"])
+    options, errors = validate_job_options(payload)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    rejection = await asyncio.to_thread(_check_admission, size)
+    if rejection is not None:
+        raise _admission_error(rejection)
+    ensure_uploads_dir()
+    store = get_upload_sessions()
+    session = await asyncio.to_thread(store.create, filename, size, options)
+    return store.describe(session)
+
+
+@app.get("/api/upload-sessions/{session_id}")
+def api_upload_session_status(session_id: str) -> dict[str, object]:
+    store = get_upload_sessions()
+    try:
+        return store.describe(store.get(session_id))
+    except UploadSessionError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+
+
+@app.put("/api/upload-sessions/{session_id}")
+async def api_upload_session_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+) -> dict[str, object]:
+    store = get_upload_sessions()
+    try:
+        session = await store.write_chunk(session_id, offset, request.stream())
+    except UploadSessionError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    return store.describe(session)
+
+
+@app.post("/api/upload-sessions/{session_id}/finalize")
+async def api_finalize_upload_session(session_id: str) -> dict[str, object]:
+    uploads_dir = ensure_uploads_dir()
+    store = get_upload_sessions()
+    try:
+        session = store.get(session_id)
+        if session.complete:
+            # Checked here rather than in _queue_uploads: finalize consumes the
+            # session, so a rejected upload must still be there to retry.
+            rejection = await asyncio.to_thread(_check_admission, session.size, 1, True)
+            if rejection is not None:
+                raise _admission_error(rejection)
+        session, job_id, destination, sha256 = await store.finalize(
+            session_id,
+            lambda filename: _allocate_upload(uploads_dir, filename),
+        )
+    except UploadSessionError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    job = new_job_record(
+        job_id,
+        sanitize_display_path(session.filename, destination.name),
+        destination,
+        session.options,
+    )
+    jobs = await _queue_uploads(
+        [replace(job, upload_bytes=session.size, sha256=sha256)], admitted=True
+    )
+    return _uploads_response(jobs)
+
+
+@app.delete("/api/upload-sessions/{session_id}")
+def api_cancel_upload_session(session_id: str) -> dict[str, bool]:
+    try:
+        deleted = get_upload_sessions().delete(session_id)
+    except UploadSessionError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return {"ok": True}
+
+
+def _admission_usage() -> AdmissionUsage:
+    db_path = get_db_path()
+    queued_jobs, queued_bytes = queued_upload_usage(db_path)
+    done_bytes, done_seconds, done_jobs = recent_throughput(db_path)
+    try:
+        free_bytes: int | None = shutil.disk_usage(ensure_uploads_dir()).free
+    except OSError:
+        free_bytes = None
+    return AdmissionUsage(
+        queued_jobs=queued_jobs,
+        queued_bytes=queued_bytes,
+        free_bytes=free_bytes,
+        drain_bytes_per_second=done_bytes / done_seconds if done_seconds else None,
+        seconds_per_job=done_seconds / done_jobs if done_jobs else None,
+    )
+
+
+def _check_admission(
+    incoming_bytes: int | None, incoming_jobs: int = 1, written: bool = False
+) -> AdmissionRejection | None:
+    limits = resolve_admission_limits(read_cached_settings(get_base_dir()))
+    return check_admission(
+        limits, _admission_usage(), incoming_bytes, incoming_jobs, written=written
+    )
+
+
+async def _admit_upload(incoming_bytes: int) -> AdmissionRejection | None:
+    return await asyncio.to_thread(_check_admission, incoming_bytes)
+
+
+def _admission_error(rejection: AdmissionRejection) -> HTTPException:
+    headers = None
+    if rejection.retry_after is not None:
+        headers = {"Retry-After": str(rejection.retry_after)}
+    return HTTPException(
+        status_code=rejection.status_code,
+        detail=rejection.detail,
+        headers=headers,
+    )
+
+
+app.add_middleware(
+    AdmissionMiddleware,
+    paths=("/upload", "/api/uploads", "/api/jobs"),
+    check=_admit_upload,
+)
+
+
+def get_upload_sessions() -> UploadSessionStore:
+    uploads_dir = get_uploads_dir()
+    store = getattr(app.state, "upload_sessions", None)
+    if store is None or store.root.parent != uploads_dir:
+        store = UploadSessionStore(uploads_dir)
+        app.state.upload_sessions = store
+    return store
+
+
+def _uploads_response(jobs: list[JobRecord]) -> dict[str, object]:
+    return {
+        "batch_id": jobs[0].batch_id if jobs else None,
+        "jobs": [
+            {
+                "id": job.id,
+                "filename": job.filename,
+                "status": job.status,
+                "upload_bytes": job.upload_bytes,
+                "sha256": job.sha256,
+            }
+            for job in jobs
+        ],
+    }
+
+
+def _allocate_upload(uploads_dir: Path, filename: str) -> tuple[str, Path]:
+    job_id = uuid4().hex
+    job_dir = sharded_job_dir(uploads_dir, job_id)
+    job_dir.mkdir(parents=True, exist_ok=True)
+    return job_id, job_dir / sanitize_filename(filename)
+
+
+def _last_field(fields: dict[str, list[str]], name: str) -> str | None:
+    values = fields.get(name)
+    return values[-1] if values else None
+
+
+async def _queue_uploads(
+    stored: list[JobRecord], admitted: bool = False
+) -> list[JobRecord]:
+    if not stored:
+        return []
+    if not admitted:
+        # The body was admitted on its Content-Length as one job; check the
+        # files it actually held before queueing them.
+        rejection = await asyncio.to_thread(
+            _check_admission,
+            sum(job.upload_bytes or 0 for job in stored),
+            len(stored),
+            True,
+        )
+        if rejection is not None:
+            for job in stored:
+                cleanup_upload_path(job.upload_path, get_uploads_dir(), job.id)
+            raise _admission_error(rejection)
+    semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+    probed = await asyncio.gather(*(_probe_upload(job, semaphore) for job in stored))
+    # One transaction and one batch per upload, however many files it holds.
+    batch_id = uuid4().hex
+    jobs = [replace(job, batch_id=batch_id) for job in probed]
+    insert_jobs(get_db_path(), jobs, batch_id=batch_id)
+    for job in jobs:
+        if job.status == "failed":
+            # Rejected before reaching the worker, which sends the others.
+            enqueue_webhook_delivery(get_db_path(), job, get_results_dir())
+    return jobs
+
+
+def _prepare_watched_upload(job: JobRecord) -> JobRecord:
+    # Runs on the watch-folder thread, which has no event loop of its own.
+    return asyncio.run(_probe_upload(job, asyncio.Semaphore(1)))
+
+
+async def _probe_upload(job: JobRecord, semaphore: asyncio.Semaphore) -> JobRecord:
+    async with semaphore:
+        try:
+            info = await probe_media(Path(job.upload_path))
+        except MediaProbeError as exc:
+            # Fail it right away instead of letting it reach the worker.
+            logger.info("Rejected undecodable upload %s: %s", job.filename, exc)
+            cleanup_upload_path(job.upload_path, get_uploads_dir(), job.id)
+            return replace(
+                job,
+                status="failed",
+                completed_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                error_message=f"Not a decodable audio or video file: {exc}",
+            )
+    if info is None:
+        return job
+    return replace(job, **asdict(info))
+
+
 @app.get("/api/state")
 def api_state() -> dict[str, object]:
     jobs = get_job_store()
@@ -420,12 +994,12 @@ def api_state() -> dict[str, object]:
 
 
 @app.get("/results/{job_id}/{filename}")
-def download_result(job_id: str, filename: str):
+def download_result(job_id: str, filename: str, request: Request):
     if not is_safe_path_component(job_id) or not is_safe_path_component(filename):
         raise HTTPException(status_code=404)
 
     results_dir = get_results_dir()
-    job_dir = results_dir / job_id
+    job_dir = resolve_job_dir(results_dir, job_id)
     results_dir_resolved = results_dir.resolve()
     job_dir_resolved = job_dir.resolve()
     file_path = (job_dir / filename).resolve()
@@ -433,26 +1007,323 @@ def download_result(job_id: str, filename: str):
     if not job_dir_resolved.is_relative_to(results_dir_resolved):
         raise HTTPException(status_code=404)
 
-    if not file_path.is_file() or not file_path.is_relative_to(job_dir_resolved):
+    if not file_path.is_relative_to(job_dir_resolved):
+        raise HTTPException(status_code=404)
+    stored_path = locate(file_path)
+    if stored_path is None:
+        # Formats the job did not ask for can still be rendered from segments.
+        rendered = _render_from_segments(job_id, filename)
+        if rendered is None:
+            raise HTTPException(status_code=404)
+        return rendered
+    if not stored_path.resolve().is_relative_to(job_dir_resolved):
         raise HTTPException(status_code=404)
+    # Retention evicts the least recently downloaded results first.
+    record_result_access(get_db_path(), job_id)
+
+    if not is_compressed(stored_path):
+        return FileResponse(stored_path)
+    extension = Path(filename).suffix.lstrip(".").lower()
+    media_type = MEDIA_TYPES.get(extension) or (
+        mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        # Sent as stored; the client decompresses.
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(stored_path, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        iter_decompressed(stored_path), media_type=media_type, headers=headers
+    )
 
-    return FileResponse(file_path)
+
+def _render_from_segments(job_id: str, filename: str) -> Response | None:
+    extension = Path(filename).suffix.lstrip(".").lower()
+    if extension not in OUTPUT_FORMATS:
+        return None
+    job = get_job(get_db_path(), job_id)
+    if job is None or job.status != "done":
+        return None
+    if filename != result_filename(job.filename, extension):
+        return None
+    segments = list_job_segments(get_db_path(), job_id)
+    if not segments:
+        return None
+    return _segments_response(segments, extension, job.language)
+
+
+def _segments_response(
+    segments: list[SegmentRecord], extension: str, language: str | None
+) -> Response:
+    result = TranscriptResult(
+        text=" ".join(segment.text.strip() for segment in segments),
+        segments=[
+            Segment(segment.start, segment.end, segment.text) for segment in segments
+        ],
+        language=language,
+    )
+    return Response(render_result(result, extension), media_type=MEDIA_TYPES[extension])
+
+
+@app.get("/api/search")
+def search_history(
+    q: str = Query("", max_length=500),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+) -> dict[str, object]:
+    db_path = get_db_path()
+    if not search_available(db_path):
+        raise HTTPException(
+            status_code=503,
+            detail="Search needs an SQLite build with FTS5.",
+        )
+    total, hits = search(db_path, q, limit=per_page, offset=(page - 1) * per_page)
+    return {
+        "query": q,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "results": [
+            {
+                "job_id": hit.job_id,
+                "filename": hit.filename,
+                "completed_at": hit.completed_at,
+                "snippet": hit.snippet,
+                "rank": hit.rank,
+            }
+            for hit in hits
+        ],
+    }
+
+
+@app.get("/api/export")
+def export_jobs(
+    job_ids: str | None = Query(None),
+    batch_id: str | None = Query(None),
+    start: str | None = Query(None, alias="from"),
+    end: str | None = Query(None, alias="to"),
+    format: str = Query("zip"),
+):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"format must be one of {', '.join(EXPORT_MEDIA_TYPES)}.",
+        )
+    if job_ids is None and batch_id is None and start is None and end is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Pass job_ids, batch_id, or a from/to date range.",
+        )
+    ids = None
+    if job_ids is not None:
+        ids = list(
+            dict.fromkeys(
+                job_id
+                for job_id in (part.strip() for part in job_ids.split(","))
+                if is_safe_path_component(job_id)
+            )
+        )
+    pages = _export_pages(
+        ids,
+        batch_id,
+        _export_bound(start, "from", upper=False),
+        _export_bound(end, "to", upper=True),
+    )
+    first_page = next(pages, None)
+    if first_page is None:
+        raise HTTPException(status_code=404, detail="No finished jobs match.")
+    pages = itertools.chain([first_page], pages)
+    stream = {"zip": stream_results_zip, "jsonl": stream_jsonl, "csv": stream_csv}
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        stream[format](get_db_path(), get_results_dir(), pages),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="transcripts-{stamp}.{format}"'
+            )
+        },
+    )
+
+
+def _export_pages(
+    job_ids: list[str] | None,
+    batch_id: str | None,
+    completed_from: str | None,
+    completed_before: str | None,
+) -> Iterator[list[JobRecord]]:
+    filters = {
+        "batch_id": batch_id,
+        "completed_from": completed_from,
+        "completed_before": completed_before,
+    }
+    db_path = get_db_path()
+    if job_ids is not None:
+        for index in range(0, len(job_ids), ID_CHUNK_SIZE):
+            chunk = job_ids[index : index + ID_CHUNK_SIZE]
+            jobs = list_export_jobs(db_path, job_ids=chunk, **filters)
+            if jobs:
+                yield jobs
+        return
+    after = None
+    while jobs := list_export_jobs(db_path, after=after, **filters):
+        yield jobs
+        after = (jobs[-1].completed_at or "", jobs[-1].id)
+
+
+def _export_bound(value: str | None, name: str, *, upper: bool) -> str | None:
+    """UTC timestamp for a ``from``/``to`` bound; ``to`` becomes exclusive.
+
+    A bare date covers the whole day, so ``to=2024-05-31`` includes May 31.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{name} must be an ISO date or timestamp.",
+        ) from exc
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    if upper:
+        moment += timedelta(days=1) if len(value) == 10 else timedelta(seconds=1)
+    return moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+@app.get("/api/jobs/{job_id}/segments")
+def job_segments(
+    job_id: str,
+    start: str | None = Query(None, alias="from"),
+    end: str | None = Query(None, alias="to"),
+    format: str = Query("json"),
+    limit: int | None = Query(None, ge=1),
+):
+    if not is_safe_path_component(job_id):
+        raise HTTPException(status_code=404)
+    job = get_job(get_db_path(), job_id)
+    if job is None:
+        raise HTTPException(status_code=404)
+    bounds = []
+    for name, value in (("from", start), ("to", end)):
+        seconds = parse_timestamp(value) if value is not None else None
+        if value is not None and seconds is None:
+            raise HTTPException(
+                status_code=422,
+                detail=f"{name} must be seconds or HH:MM:SS.",
+            )
+        bounds.append(seconds)
+    start_seconds, end_seconds = bounds
+    if format not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"format must be one of {', '.join(OUTPUT_FORMATS)}.",
+        )
+    segments = list_job_segments(
+        get_db_path(), job_id, start=start_seconds, end=end_seconds, limit=limit
+    )
+    if format != "json":
+        return _segments_response(segments, format, job.language)
+    return {
+        "job_id": job_id,
+        "from": start_seconds,
+        "to": end_seconds,
+        "segments": [
+            {
+                "id": segment.position,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+            }
+            for segment in segments
+        ],
+    }
 
 
 @app.get("/api/jobs/{job_id}/preview")
 def job_preview(
-    job_id: str, chars: int = Query(300, ge=50, le=2000)
+    job_id: str, chars: int = Query(300, ge=50, le=PREVIEW_CHARS)
 ) -> dict[str, object]:
     if not is_safe_path_component(job_id):
         raise HTTPException(status_code=404)
+    stored = get_job_previews(get_db_path(), [job_id]).get(job_id)
+    if stored is not None and stored[1] is not None:
+        return _stored_preview(job_id, stored, chars)
+    return _file_preview(job_id, chars)
+
+
+@app.post("/api/previews")
+async def job_previews(request: Request) -> dict[str, object]:
+    """Snippets for many history rows in one round trip."""
+    payload = await request.json()
+    job_ids = payload.get("job_ids") if isinstance(payload, dict) else None
+    chars = payload.get("chars", 300) if isinstance(payload, dict) else None
+    if (
+        not isinstance(job_ids, list)
+        or len(job_ids) > MAX_PREVIEW_BATCH
+        or not all(isinstance(job_id, str) for job_id in job_ids)
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail=[f"job_ids must be a list of at most {MAX_PREVIEW_BATCH} ids"],
+        )
+    if (
+        isinstance(chars, bool)
+        or not isinstance(chars, int)
+        or not (50 <= chars <= PREVIEW_CHARS)
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail=[f"chars must be between 50 and {PREVIEW_CHARS}"],
+        )
+    job_ids = [job_id for job_id in job_ids if is_safe_path_component(job_id)]
+    stored = await asyncio.to_thread(get_job_previews, get_db_path(), job_ids)
+    previews = {}
+    for job_id, record in stored.items():
+        if record[1] is not None:
+            previews[job_id] = _stored_preview(job_id, record, chars)
+        else:
+            # Finished before previews were stored; read once and keep it.
+            try:
+                previews[job_id] = await asyncio.to_thread(_file_preview, job_id, chars)
+            except HTTPException:
+                continue
+    return {"previews": previews}
+
+
+def _stored_preview(
+    job_id: str, stored: tuple[str, str | None, bool], chars: int
+) -> dict[str, object]:
+    filename, preview, truncated = stored
+    preview = preview or ""
+    return {
+        "job_id": job_id,
+        "filename": result_filename(filename),
+        "snippet": preview[:chars],
+        "truncated": truncated or len(preview) > chars,
+    }
 
+
+def _file_preview(job_id: str, chars: int) -> dict[str, object]:
     results = list_result_files(job_id)
     filename = pick_preview_result(results)
     if not filename:
         return {"job_id": job_id, "filename": None, "snippet": "", "truncated": False}
 
+    stored = read_segment_text(get_db_path(), job_id, chars)
+    if stored is not None:
+        snippet, truncated = stored
+        return {
+            "job_id": job_id,
+            "filename": filename,
+            "snippet": snippet,
+            "truncated": truncated,
+        }
+
     results_dir = get_results_dir()
-    job_dir = results_dir / job_id
+    job_dir = resolve_job_dir(results_dir, job_id)
     results_dir_resolved = results_dir.resolve()
     job_dir_resolved = job_dir.resolve()
     file_path = (job_dir / filename).resolve()
@@ -460,10 +1331,18 @@ def job_preview(
     if not job_dir_resolved.is_relative_to(results_dir_resolved):
         raise HTTPException(status_code=404)
 
-    if not file_path.is_file() or not file_path.is_relative_to(job_dir_resolved):
+    stored_path = locate(file_path)
+    if (
+        stored_path is None
+        or not file_path.is_relative_to(job_dir_resolved)
+        or not stored_path.resolve().is_relative_to(job_dir_resolved)
+    ):
         raise HTTPException(status_code=404)
 
-    snippet, truncated = _read_preview(file_path, chars)
+    if filename.lower().endswith(".txt"):
+        text, _truncated = _read_preview(stored_path, PREVIEW_CHARS + 1)
+        update_job_preview(get_db_path(), job_id, text)
+    snippet, truncated = _read_preview(stored_path, chars)
     return {
         "job_id": job_id,
         "filename": filename,
@@ -473,7 +1352,7 @@ def job_preview(
 
 
 def _read_preview(file_path: Path, limit: int) -> tuple[str, bool]:
-    with file_path.open("r", encoding="utf-8", errors="replace") as handle:
+    with open_text(file_path) as handle:
         data = handle.read(limit + 1)
     truncated = len(data) > limit
     return data[:limit], truncated
@@ -501,6 +1380,46 @@ def delete_job_from_queue(job_id: str) -> dict[str, bool]:
     return {"ok": True}
 
 
+@app.get("/api/batches/{batch_id}")
+def api_batch_status(batch_id: str) -> dict[str, object]:
+    batch = get_batch(get_db_path(), batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404)
+    return {
+        "id": batch.id,
+        "created_at": batch.created_at,
+        "total": batch.total,
+        "counts": batch.counts,
+    }
+
+
+@app.post("/api/batches/{batch_id}/move")
+async def api_move_batch(batch_id: str, request: Request) -> dict[str, int]:
+    payload = await request.json()
+    position = payload.get("position") if isinstance(payload, dict) else None
+    if position not in {"front", "back"}:
+        raise HTTPException(
+            status_code=422, detail=["position must be 'front' or 'back'"]
+        )
+    db_path = get_db_path()
+    if get_batch(db_path, batch_id) is None:
+        raise HTTPException(status_code=404)
+    moved = move_batch(db_path, batch_id, to_front=position == "front")
+    return {"moved": moved}
+
+
+@app.delete("/api/batches/{batch_id}")
+def api_cancel_batch(batch_id: str) -> dict[str, int]:
+    db_path = get_db_path()
+    if get_batch(db_path, batch_id) is None:
+        raise HTTPException(status_code=404)
+    removed = delete_queued_batch(db_path, batch_id)
+    uploads_dir = get_uploads_dir()
+    for job in removed:
+        cleanup_upload_path(job.upload_path, uploads_dir, job.id)
+    return {"removed": len(removed)}
+
+
 @app.delete("/api/history/{job_id}")
 def delete_history_item(job_id: str) -> dict[str, object]:
     if not is_safe_path_component(job_id):
@@ -514,7 +1433,7 @@ def delete_history_item(job_id: str) -> dict[str, object]:
             status_code=409,
             detail="Only completed jobs can be removed.",
         )
-    result_state = remove_results_dir(job.id)
+    result_state = remove_results_dir(job.id, get_results_dir())
     if result_state == "failed":
         raise HTTPException(
             status_code=500,
@@ -530,29 +1449,27 @@ def delete_history_item(job_id: str) -> dict[str, object]:
     return {"ok": True}
 
 
-@app.post("/api/history/clear")
+@app.post("/api/history/clear", status_code=202)
 def clear_history() -> dict[str, object]:
     db_path = get_db_path()
-    jobs = list_history_jobs(db_path)
-    deletable_ids: list[str] = []
-    deleted_results = 0
-    failed_results = 0
-    for job in jobs:
-        result_state = remove_results_dir(job.id)
-        if result_state == "deleted":
-            deleted_results += 1
-        elif result_state == "failed":
-            failed_results += 1
-            continue
-        cleanup_upload_path(job.upload_path, get_uploads_dir(), job.id)
-        deletable_ids.append(job.id)
-    deleted_jobs = delete_history_jobs(db_path, deletable_ids)
-    response: dict[str, object] = {
-        "ok": True,
-        "deleted_jobs": deleted_jobs,
-        "deleted_results": deleted_results,
-        "failed_results": failed_results,
-    }
-    if deleted_jobs != len(deletable_ids):
-        response["warnings"] = ["Some history entries were already removed."]
-    return response
+    results_dir = get_results_dir()
+    uploads_dir = get_uploads_dir()
+
+    def clear(manager: DeletionManager, task: DeletionTask) -> None:
+        jobs = list_history_jobs(db_path)
+        task.total = len(jobs)
+        for index in range(0, len(jobs), ID_CHUNK_SIZE):
+            deletable_ids: list[str] = []
+            for job in jobs[index : index + ID_CHUNK_SIZE]:
+                if remove_results_dir(job.id, results_dir, task) == "failed":
+                    task.failed += 1
+                    continue
+                cleanup_upload_path(job.upload_path, uploads_dir, job.id)
+                deletable_ids.append(job.id)
+            deleted = delete_history_jobs(db_path, deletable_ids)
+            task.deleted += deleted
+            if deleted != len(deletable_ids) and not task.warnings:
+                task.warnings.append("Some history entries were already removed.")
+
+    task = get_deletion_manager().submit("history", clear)
+    return {"ok": True, "task": asdict(task)}
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import gzip
+import io
+import os
+from pathlib import Path
+import shutil
+from typing import BinaryIO, Iterator, TextIO
+
+GZIP_SUFFIX = ".gz"
+COMPRESSION_LEVEL = 6
+CHUNK_SIZE = 64 * 1024
+
+
+def stored_name(name: str) -> str:
+    return f"{name}{GZIP_SUFFIX}"
+
+
+def logical_name(name: str) -> str:
+    """``talk.txt.gz`` -> ``talk.txt``: the name a result is served under."""
+    if name.endswith(GZIP_SUFFIX):
+        return name[: -len(GZIP_SUFFIX)]
+    return name
+
+
+def is_compressed(path: Path) -> bool:
+    return Path(path).name.endswith(GZIP_SUFFIX)
+
+
+def locate(path: Path) -> Path | None:
+    """The stored file for ``path``, compressed or not, or ``None``.
+
+    ``path`` may name either form, so paths recorded before a result was
+    compressed keep working.
+    """
+    path = Path(path)
+    plain = path.with_name(logical_name(path.name))
+    for candidate in (plain.with_name(stored_name(plain.name)), plain):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def find_result(job_dir: Path, name: str) -> Path | None:
+    return locate(Path(job_dir) / name)
+
+
+def list_result_names(job_dir: Path) -> list[str]:
+    """Names of the results in ``job_dir`` as they are served, read from disk."""
+    try:
+        entries = list(os.scandir(job_dir))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    # Dotfiles are partial writes.
+    return sorted(
+        {
+            logical_name(entry.name)
+            for entry in entries
+            if not entry.name.startswith(".") and entry.is_file()
+        }
+    )
+
+
+@contextmanager
+def open_writer(path: Path) -> Iterator[BinaryIO]:
+    # No name and mtime=0 in the header, so identical transcripts are
+    # byte-identical on disk.
+    with (
+        Path(path).open("wb") as raw,
+        gzip.GzipFile(
+            filename="",
+            mode="wb",
+            fileobj=raw,
+            compresslevel=COMPRESSION_LEVEL,
+            mtime=0,
+        ) as handle,
+    ):
+        yield handle
+
+
+def open_binary(path: Path) -> BinaryIO:
+    if is_compressed(path):
+        return gzip.open(path, "rb")
+    return Path(path).open("rb")
+
+
+def open_text(path: Path) -> TextIO:
+    return io.TextIOWrapper(open_binary(path), encoding="utf-8", errors="replace")
+
+
+def iter_decompressed(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open_binary(path) as handle:
+        while chunk := handle.read(chunk_size):
+            yield chunk
+
+
+def decompress_to(path: Path, directory: Path) -> Path:
+    """Write the plain contents of ``path`` into ``directory``; returns the copy."""
+    target = Path(directory) / logical_name(Path(path).name)
+    with open_binary(path) as source, target.open("wb") as destination:
+        shutil.copyfileobj(source, destination, CHUNK_SIZE)
+    return target
+
+
+def compress_file(path: Path) -> Path:
+    """Replace a plain result with its ``.gz`` form, keeping its mtime.
+
+    The compressed file is renamed into place before the original is removed,
+    so readers always find one of the two.
+    """
+    path = Path(path)
+    target = path.with_name(stored_name(path.name))
+    partial = path.with_name(f".{target.name}.partial")
+    stat = path.stat()
+    with path.open("rb") as source, open_writer(partial) as destination:
+        shutil.copyfileobj(source, destination, CHUNK_SIZE)
+    os.utime(partial, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(partial, target)
+    path.unlink(missing_ok=True)
+    return target
+
+
+def compress_results(job_dir: Path) -> int:
+    """Compress every plain result in ``job_dir``; returns how many."""
+    try:
+        entries = list(os.scandir(job_dir))
+    except FileNotFoundError:
+        return 0
+    compressed = 0
+    for entry in entries:
+        if (
+            entry.name.startswith(".")
+            or entry.name.endswith(GZIP_SUFFIX)
+            or not entry.is_file()
+        ):
+            continue
+        try:
+            compress_file(Path(entry.path))
+        except FileNotFoundError:
+            continue
+        compressed += 1
+    return compressed
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether an ``Accept-Encoding`` header allows a gzip response body."""
+    qualities = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
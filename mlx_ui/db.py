@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
+import json
 from pathlib import Path
 import sqlite3
+from typing import Collection, Iterable
 
 
 @dataclass
@@ -16,6 +18,78 @@ class JobRecord:
     completed_at: str | None = None
     error_message: str | None = None
     queue_position: int | None = None
+    model: str | None = None
+    quick: bool | None = None
+    output_formats: list[str] | None = None
+    status_note: str | None = None
+    duration: float | None = None
+    container: str | None = None
+    audio_streams: int | None = None
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+    upload_bytes: int | None = None
+    sha256: str | None = None
+    batch_id: str | None = None
+    callback_url: str | None = None
+
+
+@dataclass
+class BatchRecord:
+    id: str
+    created_at: str
+    counts: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+@dataclass(frozen=True)
+class SegmentRecord:
+    position: int
+    start: float
+    end: float
+    text: str
+
+
+@dataclass(frozen=True)
+class ResultFile:
+    name: str
+    size: int
+    sha256: str
+    mtime: float
+
+
+@dataclass(frozen=True)
+class RetentionCandidate:
+    id: str
+    filename: str
+    upload_path: str
+    results_bytes: int
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    job_id: str
+    filename: str
+    completed_at: str | None
+    snippet: str
+    rank: float
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    channel: str
+    job_id: str | None
+    payload: str
+    status: str
+    attempts: int
+    available_at: float
+    created_at: str
+    last_error: str | None = None
+    batch_key: str | None = None
 
 
 SCHEMA = """
@@ -29,10 +103,132 @@ CREATE TABLE IF NOT EXISTS jobs (
     started_at TEXT,
     completed_at TEXT,
     error_message TEXT,
-    queue_position INTEGER
+    queue_position INTEGER,
+    model TEXT,
+    quick INTEGER,
+    output_formats TEXT,
+    status_note TEXT,
+    duration REAL,
+    container TEXT,
+    audio_streams INTEGER,
+    audio_codec TEXT,
+    sample_rate INTEGER,
+    channels INTEGER,
+    upload_bytes INTEGER,
+    sha256 TEXT,
+    batch_id TEXT,
+    callback_url TEXT,
+    preview TEXT,
+    preview_truncated INTEGER,
+    results_checked_at REAL,
+    results_bytes INTEGER,
+    last_accessed_at TEXT,
+    affinity_skips INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    response TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watch_ingests (
+    source_key TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    start_seconds REAL NOT NULL,
+    end_seconds REAL NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_segments_start ON segments (job_id, start_seconds);
+CREATE INDEX IF NOT EXISTS idx_segments_end ON segments (job_id, end_seconds);
+CREATE TABLE IF NOT EXISTS result_files (
+    job_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (job_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS transcript_documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    job_id TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    last_error TEXT,
+    batch_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, available_at);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS idx_jobs_results_checked ON jobs (results_checked_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_completed ON jobs (completed_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_last_used
+    ON jobs (COALESCE(last_accessed_at, completed_at, created_at));
+"""
+
+# Rows are keyed by transcript_documents.id, which maps back to the job.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_search USING fts5(
+    filename,
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
 );
 """
 
+JOB_COLUMNS = (
+    "id",
+    "filename",
+    "status",
+    "created_at",
+    "upload_path",
+    "language",
+    "started_at",
+    "completed_at",
+    "error_message",
+    "queue_position",
+    "model",
+    "quick",
+    "output_formats",
+    "status_note",
+    "duration",
+    "container",
+    "audio_streams",
+    "audio_codec",
+    "sample_rate",
+    "channels",
+    "upload_bytes",
+    "sha256",
+    "batch_id",
+    "callback_url",
+)
+_JOB_SELECT = ", ".join(JOB_COLUMNS)
+
+DEFAULT_AFFINITY_WINDOW = 16
+DEFAULT_MAX_AFFINITY_SKIPS = 4
+# Ids per statement, well under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 500
+# Characters of each transcript kept on the job row for previews.
+PREVIEW_CHARS = 2000
+
 
 def _connect(db_path: Path) -> sqlite3.Connection:
     connection = sqlite3.connect(db_path)
@@ -43,8 +239,15 @@ def _connect(db_path: Path) -> sqlite3.Connection:
 def init_db(db_path: Path) -> None:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     with _connect(db_path) as connection:
-        connection.execute(SCHEMA)
+        connection.executescript(SCHEMA)
         _migrate_schema(connection)
+        # Indexes on migrated columns can only be created after the migration.
+        connection.executescript(INDEXES)
+        try:
+            connection.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite builds without FTS5 run without transcript search.
+            pass
         connection.commit()
 
 
@@ -64,10 +267,58 @@ def _migrate_schema(connection: sqlite3.Connection) -> None:
         connection.execute("ALTER TABLE jobs ADD COLUMN error_message TEXT")
     if "queue_position" not in columns:
         connection.execute("ALTER TABLE jobs ADD COLUMN queue_position INTEGER")
+    if "model" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN model TEXT")
+    if "quick" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN quick INTEGER")
+    if "output_formats" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN output_formats TEXT")
+    if "status_note" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN status_note TEXT")
+    for column, column_type in (
+        ("duration", "REAL"),
+        ("container", "TEXT"),
+        ("audio_streams", "INTEGER"),
+        ("audio_codec", "TEXT"),
+        ("sample_rate", "INTEGER"),
+        ("channels", "INTEGER"),
+        ("upload_bytes", "INTEGER"),
+        ("sha256", "TEXT"),
+        ("batch_id", "TEXT"),
+        ("callback_url", "TEXT"),
+        ("preview", "TEXT"),
+        ("preview_truncated", "INTEGER"),
+        ("results_checked_at", "REAL"),
+        ("last_accessed_at", "TEXT"),
+    ):
+        if column not in columns:
+            connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+    if "results_bytes" not in columns:
+        connection.execute("ALTER TABLE jobs ADD COLUMN results_bytes INTEGER")
+        connection.execute(
+            """
+            UPDATE jobs
+            SET results_bytes = (
+                SELECT COALESCE(SUM(size), 0) FROM result_files
+                WHERE result_files.job_id = jobs.id
+            )
+            WHERE results_checked_at IS NOT NULL
+            """
+        )
+    if "affinity_skips" not in columns:
+        connection.execute(
+            "ALTER TABLE jobs ADD COLUMN affinity_skips INTEGER NOT NULL DEFAULT 0"
+        )
     connection.execute(
         "UPDATE jobs SET language = 'en' WHERE language IS NULL OR language = ''"
     )
     _backfill_queue_positions(connection)
+    outbox_columns = {
+        row["name"]
+        for row in connection.execute("PRAGMA table_info(outbox)").fetchall()
+    }
+    if "batch_key" not in outbox_columns:
+        connection.execute("ALTER TABLE outbox ADD COLUMN batch_key TEXT")
 
 
 def _backfill_queue_positions(connection: sqlite3.Connection) -> None:
@@ -97,65 +348,201 @@ def _backfill_queue_positions(connection: sqlite3.Connection) -> None:
 
 
 def insert_job(db_path: Path, job: JobRecord) -> None:
+    insert_jobs(db_path, [job])
+
+
+def insert_jobs(
+    db_path: Path,
+    jobs: list[JobRecord],
+    *,
+    batch_id: str | None = None,
+) -> None:
+    """Insert ``jobs`` in one transaction, queued ones at contiguous positions.
+
+    When ``batch_id`` is given a batch row is created and every job is tagged
+    with it, so the upload can later be moved or cancelled as a group.
+    """
+    if not jobs:
+        return
     with _connect(db_path) as connection:
-        queue_position = job.queue_position
-        if job.status == "queued" and queue_position is None:
-            row = connection.execute(
-                """
-                SELECT MAX(queue_position)
-                FROM jobs
-                WHERE status = 'queued'
-                """
-            ).fetchone()
-            max_position = row[0] if row and row[0] is not None else 0
-            queue_position = max_position + 1
+        connection.execute("BEGIN IMMEDIATE")
+        _insert_jobs(connection, jobs, batch_id)
+        connection.commit()
+
+
+def insert_watched_job(db_path: Path, job: JobRecord, source_key: str) -> bool:
+    """Insert a watch-folder job unless ``source_key`` was already ingested.
+
+    The job and its key are written in one transaction, so a restart between
+    ingesting a file and removing it from the watch folder never queues it
+    twice.
+    """
+    with _connect(db_path) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            "SELECT 1 FROM watch_ingests WHERE source_key = ?",
+            (source_key,),
+        ).fetchone()
+        if row is not None:
+            connection.rollback()
+            return False
+        _insert_jobs(connection, [job], None)
         connection.execute(
             """
-            INSERT INTO jobs (
-                id,
-                filename,
-                status,
-                created_at,
-                upload_path,
-                language,
-                started_at,
-                completed_at,
-                error_message,
-                queue_position
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO watch_ingests (source_key, job_id, ingested_at)
+            VALUES (?, ?, ?)
             """,
-            (
-                job.id,
-                job.filename,
-                job.status,
-                job.created_at,
-                job.upload_path,
-                job.language,
-                job.started_at,
-                job.completed_at,
-                job.error_message,
-                queue_position,
-            ),
+            (source_key, job.id, _now_utc()),
+        )
+        connection.commit()
+    return True
+
+
+def reserve_idempotency_key(
+    db_path: Path,
+    key: str,
+    *,
+    now: float,
+    ttl: float,
+) -> tuple[bool, str | None]:
+    """Claim ``key`` for a new request, or return the response stored for it.
+
+    Returns ``(True, None)`` when the caller now owns the key, and
+    ``(False, response)`` otherwise; ``response`` is ``None`` while the
+    original request is still running. Keys older than ``ttl`` are forgotten.
+    """
+    with _connect(db_path) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < ?",
+            (now - ttl,),
+        )
+        row = connection.execute(
+            "SELECT response FROM idempotency_keys WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is not None:
+            connection.commit()
+            return False, row["response"]
+        connection.execute(
+            """
+            INSERT INTO idempotency_keys (key, response, created_at)
+            VALUES (?, NULL, ?)
+            """,
+            (key, now),
+        )
+        connection.commit()
+    return True, None
+
+
+def complete_idempotency_key(db_path: Path, key: str, response: str) -> None:
+    with _connect(db_path) as connection:
+        connection.execute(
+            "UPDATE idempotency_keys SET response = ? WHERE key = ?",
+            (response, key),
+        )
+        connection.commit()
+
+
+def release_idempotency_key(db_path: Path, key: str) -> None:
+    with _connect(db_path) as connection:
+        connection.execute(
+            "DELETE FROM idempotency_keys WHERE key = ? AND response IS NULL",
+            (key,),
         )
         connection.commit()
 
 
+def has_watch_ingest(db_path: Path, source_key: str) -> bool:
+    with _connect(db_path) as connection:
+        row = connection.execute(
+            "SELECT 1 FROM watch_ingests WHERE source_key = ?",
+            (source_key,),
+        ).fetchone()
+    return row is not None
+
+
+def _insert_jobs(
+    connection: sqlite3.Connection,
+    jobs: list[JobRecord],
+    batch_id: str | None,
+) -> None:
+    row = connection.execute(
+        """
+        SELECT MAX(queue_position)
+        FROM jobs
+        WHERE status = 'queued'
+        """
+    ).fetchone()
+    next_position = (row[0] if row and row[0] is not None else 0) + 1
+    values = []
+    for job in jobs:
+        if batch_id is not None:
+            job = replace(job, batch_id=batch_id)
+        queue_position = job.queue_position
+        if job.status == "queued" and queue_position is None:
+            queue_position = next_position
+            next_position += 1
+        values.append(_job_values(job, queue_position))
+    if batch_id is not None:
+        connection.execute(
+            "INSERT INTO batches (id, created_at) VALUES (?, ?)",
+            (batch_id, _now_utc()),
+        )
+    connection.executemany(
+        f"""
+        INSERT INTO jobs ({_JOB_SELECT})
+        VALUES ({", ".join("?" for _ in JOB_COLUMNS)})
+        """,
+        values,
+    )
+
+
+def _job_values(job: JobRecord, queue_position: int | None) -> tuple[object, ...]:
+    return (
+        job.id,
+        job.filename,
+        job.status,
+        job.created_at,
+        job.upload_path,
+        job.language,
+        job.started_at,
+        job.completed_at,
+        job.error_message,
+        queue_position,
+        job.model,
+        None if job.quick is None else int(job.quick),
+        ",".join(job.output_formats) if job.output_formats else None,
+        job.status_note,
+        job.duration,
+        job.container,
+        job.audio_streams,
+        job.audio_codec,
+        job.sample_rate,
+        job.channels,
+        job.upload_bytes,
+        job.sha256,
+        job.batch_id,
+        job.callback_url,
+    )
+
+
+def _job_from_row(row: sqlite3.Row) -> JobRecord:
+    data = {column: row[column] for column in JOB_COLUMNS}
+    if data["quick"] is not None:
+        data["quick"] = bool(data["quick"])
+    if data["output_formats"]:
+        data["output_formats"] = data["output_formats"].split(",")
+    else:
+        data["output_formats"] = None
+    return JobRecord(**data)
+
+
 def list_jobs(db_path: Path) -> list[JobRecord]:
     with _connect(db_path) as connection:
         rows = connection.execute(
-            """
-            SELECT
-                id,
-                filename,
-                status,
-                created_at,
-                upload_path,
-                language,
-                started_at,
-                completed_at,
-                error_message,
-                queue_position
+            f"""
+            SELECT {_JOB_SELECT}
             FROM jobs
             ORDER BY
                 CASE
@@ -175,24 +562,43 @@ def list_jobs(db_path: Path) -> list[JobRecord]:
             """
         ).fetchall()
 
-    return [JobRecord(**dict(row)) for row in rows]
+    return [_job_from_row(row) for row in rows]
+
+
+def list_eta_jobs(db_path: Path, history: int) -> list[JobRecord]:
+    """Queued and running jobs plus the ``history`` latest timed finished jobs.
+
+    Enough to estimate queue ETAs without reading the whole history.
+    """
+    with _connect(db_path) as connection:
+        active = connection.execute(
+            f"""
+            SELECT {_JOB_SELECT}
+            FROM jobs
+            WHERE status IN ('queued', 'running')
+            """
+        ).fetchall()
+        recent = connection.execute(
+            f"""
+            SELECT {_JOB_SELECT}
+            FROM jobs
+            WHERE status = 'done'
+              AND duration > 0
+              AND started_at IS NOT NULL
+              AND completed_at IS NOT NULL
+            ORDER BY completed_at DESC
+            LIMIT ?
+            """,
+            (history,),
+        ).fetchall()
+    return [_job_from_row(row) for row in [*active, *recent]]
 
 
 def get_job(db_path: Path, job_id: str) -> JobRecord | None:
     with _connect(db_path) as connection:
         row = connection.execute(
-            """
-            SELECT
-                id,
-                filename,
-                status,
-                created_at,
-                upload_path,
-                language,
-                started_at,
-                completed_at,
-                error_message,
-                queue_position
+            f"""
+            SELECT {_JOB_SELECT}
             FROM jobs
             WHERE id = ?
             """,
@@ -200,7 +606,7 @@ def get_job(db_path: Path, job_id: str) -> JobRecord | None:
         ).fetchone()
     if row is None:
         return None
-    return JobRecord(**dict(row))
+    return _job_from_row(row)
 
 
 def delete_queued_job(db_path: Path, job_id: str) -> bool:
@@ -225,6 +631,10 @@ def delete_history_job(db_path: Path, job_id: str) -> bool:
             """,
             (job_id,),
         )
+        if cursor.rowcount > 0:
+            connection.execute("DELETE FROM segments WHERE job_id = ?", (job_id,))
+            connection.execute("DELETE FROM result_files WHERE job_id = ?", (job_id,))
+            _delete_search_documents(connection, [job_id])
         connection.commit()
     return cursor.rowcount > 0
 
@@ -232,40 +642,99 @@ def delete_history_job(db_path: Path, job_id: str) -> bool:
 def list_history_jobs(db_path: Path) -> list[JobRecord]:
     with _connect(db_path) as connection:
         rows = connection.execute(
-            """
-            SELECT
-                id,
-                filename,
-                status,
-                created_at,
-                upload_path,
-                language,
-                started_at,
-                completed_at,
-                error_message,
-                queue_position
+            f"""
+            SELECT {_JOB_SELECT}
             FROM jobs
             WHERE status IN ('done', 'failed')
             """
         ).fetchall()
-    return [JobRecord(**dict(row)) for row in rows]
+    return [_job_from_row(row) for row in rows]
 
 
-def delete_history_jobs(db_path: Path, job_ids: list[str]) -> int:
-    if not job_ids:
-        return 0
-    placeholders = ", ".join("?" for _ in job_ids)
+def list_export_jobs(
+    db_path: Path,
+    *,
+    job_ids: list[str] | None = None,
+    batch_id: str | None = None,
+    completed_from: str | None = None,
+    completed_before: str | None = None,
+    after: tuple[str, str] | None = None,
+    limit: int = ID_CHUNK_SIZE,
+) -> list[JobRecord]:
+    """One page of finished jobs to export, oldest completion first.
+
+    ``after`` is the ``(completed_at, id)`` of the previous page's last job.
+    ``job_ids`` must fit in one statement; callers pass at most
+    ``ID_CHUNK_SIZE`` at a time.
+    """
+    clauses = ["status IN ('done', 'failed')", "completed_at IS NOT NULL"]
+    params: list[object] = []
+    if job_ids is not None:
+        placeholders = ", ".join("?" for _ in job_ids) or "NULL"
+        clauses.append(f"id IN ({placeholders})")
+        params.extend(job_ids)
+    if batch_id is not None:
+        clauses.append("batch_id = ?")
+        params.append(batch_id)
+    if completed_from is not None:
+        clauses.append("completed_at >= ?")
+        params.append(completed_from)
+    if completed_before is not None:
+        clauses.append("completed_at < ?")
+        params.append(completed_before)
+    if after is not None:
+        clauses.append("(completed_at > ? OR (completed_at = ? AND id > ?))")
+        params.extend((after[0], after[0], after[1]))
     with _connect(db_path) as connection:
-        cursor = connection.execute(
+        rows = connection.execute(
             f"""
-            DELETE FROM jobs
-            WHERE status IN ('done', 'failed')
-              AND id IN ({placeholders})
+            SELECT {_JOB_SELECT}
+            FROM jobs
+            WHERE {" AND ".join(clauses)}
+            ORDER BY completed_at ASC, id ASC
+            LIMIT ?
             """,
-            job_ids,
-        )
-        connection.commit()
-    return cursor.rowcount
+            (*params, limit),
+        ).fetchall()
+    return [_job_from_row(row) for row in rows]
+
+
+def delete_history_jobs(db_path: Path, job_ids: list[str]) -> int:
+    """Delete finished jobs and their rows, ``ID_CHUNK_SIZE`` per transaction.
+
+    Each chunk commits on its own, so a long list never holds the write lock
+    for long and the worker can keep recording jobs in between.
+    """
+    removed = 0
+    with _connect(db_path) as connection:
+        for index in range(0, len(job_ids), ID_CHUNK_SIZE):
+            chunk = job_ids[index : index + ID_CHUNK_SIZE]
+            connection.execute("BEGIN IMMEDIATE")
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = connection.execute(
+                f"""
+                SELECT id FROM jobs
+                WHERE status IN ('done', 'failed')
+                  AND id IN ({placeholders})
+                """,
+                chunk,
+            ).fetchall()
+            ids = [row["id"] for row in rows]
+            if not ids:
+                connection.commit()
+                continue
+            placeholders = ", ".join("?" for _ in ids)
+            connection.execute(f"DELETE FROM jobs WHERE id IN ({placeholders})", ids)
+            connection.execute(
+                f"DELETE FROM segments WHERE job_id IN ({placeholders})", ids
+            )
+            connection.execute(
+                f"DELETE FROM result_files WHERE job_id IN ({placeholders})", ids
+            )
+            _delete_search_documents(connection, ids)
+            connection.commit()
+            removed += len(ids)
+    return removed
 
 
 def reorder_queue(db_path: Path, job_ids: list[str]) -> bool:
@@ -300,65 +769,688 @@ def reorder_queue(db_path: Path, job_ids: list[str]) -> bool:
     return True
 
 
-def cancel_running_job(db_path: Path, job_id: str) -> bool:
-    completed_at = _now_utc()
+def queued_upload_usage(db_path: Path) -> tuple[int, int]:
+    """Jobs whose uploads are still on disk, and their total size in bytes."""
     with _connect(db_path) as connection:
-        cursor = connection.execute(
+        row = connection.execute(
             """
-            UPDATE jobs
-            SET status = 'cancelled',
-                completed_at = ?
-            WHERE id = ? AND status = 'running'
-            """,
-            (completed_at, job_id),
+            SELECT COUNT(*), COALESCE(SUM(upload_bytes), 0)
+            FROM jobs
+            WHERE status IN ('queued', 'running')
+            """
+        ).fetchone()
+    return int(row[0]), int(row[1])
+
+
+def list_active_job_ids(db_path: Path) -> set[str]:
+    with _connect(db_path) as connection:
+        rows = connection.execute(
+            "SELECT id FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+    return {row["id"] for row in rows}
+
+
+def record_result_access(db_path: Path, job_id: str) -> None:
+    with _connect(db_path) as connection:
+        connection.execute(
+            "UPDATE jobs SET last_accessed_at = ? WHERE id = ?",
+            (_now_utc(), job_id),
         )
         connection.commit()
-    return cursor.rowcount > 0
 
 
-def update_job_status(
+def retention_usage(db_path: Path) -> tuple[int, int]:
+    """Finished jobs, and the recorded size of their results in bytes."""
+    with _connect(db_path) as connection:
+        row = connection.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(results_bytes), 0)
+            FROM jobs
+            WHERE status IN ('done', 'failed')
+            """
+        ).fetchone()
+    return int(row[0]), int(row[1])
+
+
+def list_retention_candidates(
     db_path: Path,
-    job_id: str,
-    status: str,
+    limit: int,
     *,
-    started_at: str | None = None,
-    completed_at: str | None = None,
-    error_message: str | None = None,
-) -> None:
-    updates: dict[str, str | None] = {"status": status}
-    if started_at is not None:
-        updates["started_at"] = started_at
-    if completed_at is not None:
-        updates["completed_at"] = completed_at
-    if error_message is not None:
-        updates["error_message"] = error_message
-    set_clause = ", ".join(f"{column} = ?" for column in updates)
-    values = list(updates.values()) + [job_id]
+    completed_before: str | None = None,
+    oldest_first: bool = False,
+    with_results: bool = False,
+    heavy_only: bool = False,
+) -> list[RetentionCandidate]:
+    """Finished jobs in the order retention removes them.
+
+    By default the least recently used come first: the latest of their last
+    download and their completion. ``oldest_first`` orders by completion
+    instead. ``with_results`` keeps jobs with recorded result bytes,
+    ``heavy_only`` those with any recorded result other than a ``.txt``
+    transcript, and ``completed_before`` those finished before it.
+    """
+    clauses = ["status IN ('done', 'failed')"]
+    params: list[object] = []
+    if completed_before is not None:
+        clauses.append("COALESCE(completed_at, created_at) < ?")
+        params.append(completed_before)
+    if with_results:
+        clauses.append("results_bytes > 0")
+    if heavy_only:
+        clauses.append(
+            """EXISTS (
+                SELECT 1 FROM result_files
+                WHERE result_files.job_id = jobs.id AND name NOT LIKE '%.txt'
+            )"""
+        )
+    if oldest_first:
+        order = "COALESCE(completed_at, created_at), id"
+    else:
+        order = "COALESCE(last_accessed_at, completed_at, created_at), id"
+    params.append(limit)
     with _connect(db_path) as connection:
-        connection.execute(
+        rows = connection.execute(
             f"""
-            UPDATE jobs
-            SET {set_clause}
-            WHERE id = ?
+            SELECT id, filename, upload_path, COALESCE(results_bytes, 0)
+            FROM jobs
+            WHERE {" AND ".join(clauses)}
+            ORDER BY {order}
+            LIMIT ?
             """,
-            values,
-        )
-        connection.commit()
+            params,
+        ).fetchall()
+    return [RetentionCandidate(*row) for row in rows]
 
 
-def recover_running_jobs(
-    db_path: Path,
-    *,
-    error_message: str = "Recovered after crash",
-) -> int:
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    completed_at = _now_utc()
+def recent_throughput(db_path: Path, sample: int = 20) -> tuple[int, float, int]:
+    """Upload bytes, processing seconds and count of the latest finished jobs."""
     with _connect(db_path) as connection:
-        cursor = connection.execute(
+        row = connection.execute(
             """
-            UPDATE jobs
-            SET status = 'failed',
-                completed_at = ?,
+            SELECT COALESCE(SUM(upload_bytes), 0), COALESCE(SUM(elapsed), 0), COUNT(*)
+            FROM (
+                SELECT
+                    upload_bytes,
+                    (julianday(completed_at) - julianday(started_at)) * 86400
+                        AS elapsed
+                FROM jobs
+                WHERE status = 'done'
+                  AND upload_bytes IS NOT NULL
+                  AND started_at IS NOT NULL
+                  AND completed_at IS NOT NULL
+                ORDER BY completed_at DESC
+                LIMIT ?
+            )
+            """,
+            (sample,),
+        ).fetchone()
+    return int(row[0]), max(float(row[1]), 0.0), int(row[2])
+
+
+def get_batch(db_path: Path, batch_id: str) -> BatchRecord | None:
+    with _connect(db_path) as connection:
+        row = connection.execute(
+            "SELECT id, created_at FROM batches WHERE id = ?",
+            (batch_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        counts = connection.execute(
+            """
+            SELECT status, COUNT(*) AS total
+            FROM jobs
+            WHERE batch_id = ?
+            GROUP BY status
+            """,
+            (batch_id,),
+        ).fetchall()
+    return BatchRecord(
+        id=row["id"],
+        created_at=row["created_at"],
+        counts={count["status"]: count["total"] for count in counts},
+    )
+
+
+def move_batch(db_path: Path, batch_id: str, *, to_front: bool) -> int:
+    """Move a batch's queued jobs to the front or back, keeping their order."""
+    with _connect(db_path) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        rows = connection.execute(
+            """
+            SELECT id, batch_id
+            FROM jobs
+            WHERE status = 'queued'
+            ORDER BY queue_position ASC, created_at ASC
+            """
+        ).fetchall()
+        members = [row["id"] for row in rows if row["batch_id"] == batch_id]
+        if not members:
+            return 0
+        others = [row["id"] for row in rows if row["batch_id"] != batch_id]
+        ordered = members + others if to_front else others + members
+        connection.executemany(
+            "UPDATE jobs SET queue_position = ? WHERE id = ?",
+            [(index, job_id) for index, job_id in enumerate(ordered, start=1)],
+        )
+        connection.commit()
+    return len(members)
+
+
+def delete_queued_batch(db_path: Path, batch_id: str) -> list[JobRecord]:
+    """Remove a batch's queued jobs, returning them for upload cleanup."""
+    with _connect(db_path) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        rows = connection.execute(
+            f"""
+            SELECT {_JOB_SELECT}
+            FROM jobs
+            WHERE batch_id = ? AND status = 'queued'
+            """,
+            (batch_id,),
+        ).fetchall()
+        connection.execute(
+            "DELETE FROM jobs WHERE batch_id = ? AND status = 'queued'",
+            (batch_id,),
+        )
+        connection.commit()
+    return [_job_from_row(row) for row in rows]
+
+
+def replace_job_segments(
+    db_path: Path,
+    job_id: str,
+    segments: Iterable[tuple[float, float, str]],
+) -> int:
+    """Store a job's segments, replacing any from an earlier run."""
+    rows = [
+        (job_id, position, float(start), float(end), text)
+        for position, (start, end, text) in enumerate(segments)
+    ]
+    with _connect(db_path) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM segments WHERE job_id = ?", (job_id,))
+        connection.executemany(
+            """
+            INSERT INTO segments (job_id, position, start_seconds, end_seconds, text)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        connection.commit()
+    return len(rows)
+
+
+def list_job_segments(
+    db_path: Path,
+    job_id: str,
+    *,
+    start: float | None = None,
+    end: float | None = None,
+    limit: int | None = None,
+) -> list[SegmentRecord]:
+    """Segments overlapping ``start``..``end`` (either bound may be open).
+
+    Segments are stored in time order, so each bound is a single index seek
+    that pins a position; the rows in between are read by primary key.
+    """
+    with _connect(db_path) as connection:
+        first = 0
+        if start is not None:
+            row = connection.execute(
+                """
+                SELECT position FROM segments
+                WHERE job_id = ? AND end_seconds > ?
+                ORDER BY end_seconds ASC
+                LIMIT 1
+                """,
+                (job_id, start),
+            ).fetchone()
+            if row is None:
+                return []
+            first = row["position"]
+        last = None
+        if end is not None:
+            row = connection.execute(
+                """
+                SELECT position FROM segments
+                WHERE job_id = ? AND start_seconds <= ?
+                ORDER BY start_seconds DESC
+                LIMIT 1
+                """,
+                (job_id, end),
+            ).fetchone()
+            if row is None:
+                return []
+            last = row["position"]
+        rows = connection.execute(
+            """
+            SELECT position, start_seconds, end_seconds, text
+            FROM segments
+            WHERE job_id = ? AND position >= ? AND position <= ?
+            ORDER BY position ASC
+            LIMIT ?
+            """,
+            (
+                job_id,
+                first,
+                last if last is not None else 1 << 62,
+                limit if limit is not None else -1,
+            ),
+        ).fetchall()
+    return [
+        SegmentRecord(
+            position=row["position"],
+            start=row["start_seconds"],
+            end=row["end_seconds"],
+            text=row["text"],
+        )
+        for row in rows
+    ]
+
+
+def read_segment_text(
+    db_path: Path, job_id: str, limit: int
+) -> tuple[str, bool] | None:
+    """The first ``limit`` characters of a job's transcript, or ``None``."""
+    parts: list[str] = []
+    length = 0
+    with _connect(db_path) as connection:
+        cursor = connection.execute(
+            "SELECT text FROM segments WHERE job_id = ? ORDER BY position ASC",
+            (job_id,),
+        )
+        for row in cursor:
+            text = row["text"].strip()
+            if not text:
+                continue
+            parts.append(text)
+            length += len(text) + 1
+            if length > limit:
+                break
+        else:
+            if not parts:
+                return None
+    joined = " ".join(parts)
+    return joined[:limit], len(joined) > limit
+
+
+def search_available(db_path: Path) -> bool:
+    with _connect(db_path) as connection:
+        return _has_search(connection)
+
+
+def index_transcript(db_path: Path, job_id: str, filename: str, text: str) -> bool:
+    """Add or replace a job's transcript in the search index.
+
+    Returns ``False`` only when there is no search index. A job deleted since
+    its transcript was read is skipped, so it leaves no orphaned entry.
+    """
+    with _connect(db_path) as connection:
+        if not _has_search(connection):
+            return False
+        connection.execute("BEGIN IMMEDIATE")
+        exists = connection.execute(
+            "SELECT 1 FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if exists is None:
+            connection.commit()
+            return True
+        connection.execute(
+            "INSERT OR IGNORE INTO transcript_documents (job_id) VALUES (?)",
+            (job_id,),
+        )
+        document_id = connection.execute(
+            "SELECT id FROM transcript_documents WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()[0]
+        connection.execute(
+            "DELETE FROM transcript_search WHERE rowid = ?",
+            (document_id,),
+        )
+        connection.execute(
+            "INSERT INTO transcript_search (rowid, filename, text) VALUES (?, ?, ?)",
+            (document_id, filename, text),
+        )
+        connection.commit()
+    return True
+
+
+def list_unindexed_jobs(db_path: Path, limit: int) -> list[JobRecord]:
+    """Finished jobs that are not in the search index yet."""
+    with _connect(db_path) as connection:
+        rows = connection.execute(
+            f"""
+            SELECT {_JOB_SELECT}
+            FROM jobs
+            WHERE status = 'done'
+              AND id NOT IN (SELECT job_id FROM transcript_documents)
+            ORDER BY completed_at DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+    return [_job_from_row(row) for row in rows]
+
+
+def search_transcripts(
+    db_path: Path,
+    match: str,
+    *,
+    limit: int,
+    offset: int = 0,
+    highlight: tuple[str, str] = ("[", "]"),
+) -> tuple[int, list[SearchHit]]:
+    """Rank transcripts matching the FTS5 expression ``match`` by bm25.
+
+    Returns the total number of matches and one page of hits.
+    """
+    with _connect(db_path) as connection:
+        # Joined like the page below, so stray index rows are never counted.
+        total = connection.execute(
+            """
+            SELECT COUNT(*)
+            FROM transcript_search
+            JOIN transcript_documents AS documents
+              ON documents.id = transcript_search.rowid
+            JOIN jobs ON jobs.id = documents.job_id
+            WHERE transcript_search MATCH ?
+            """,
+            (match,),
+        ).fetchone()[0]
+        rows = connection.execute(
+            """
+            SELECT
+                documents.job_id,
+                jobs.filename,
+                jobs.completed_at,
+                snippet(transcript_search, 1, ?, ?, '…', 16) AS snippet,
+                bm25(transcript_search) AS rank
+            FROM transcript_search
+            JOIN transcript_documents AS documents
+              ON documents.id = transcript_search.rowid
+            JOIN jobs ON jobs.id = documents.job_id
+            WHERE transcript_search MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+            """,
+            (highlight[0], highlight[1], match, limit, offset),
+        ).fetchall()
+    return total, [
+        SearchHit(
+            job_id=row["job_id"],
+            filename=row["filename"],
+            completed_at=row["completed_at"],
+            snippet=row["snippet"],
+            rank=row["rank"],
+        )
+        for row in rows
+    ]
+
+
+def _has_search(connection: sqlite3.Connection) -> bool:
+    row = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        ("transcript_search",),
+    ).fetchone()
+    return row is not None
+
+
+def _delete_search_documents(
+    connection: sqlite3.Connection, job_ids: list[str]
+) -> None:
+    if not job_ids or not _has_search(connection):
+        return
+    placeholders = ", ".join("?" for _ in job_ids)
+    connection.execute(
+        f"""
+        DELETE FROM transcript_search
+        WHERE rowid IN (
+            SELECT id FROM transcript_documents WHERE job_id IN ({placeholders})
+        )
+        """,
+        job_ids,
+    )
+    connection.execute(
+        f"DELETE FROM transcript_documents WHERE job_id IN ({placeholders})",
+        job_ids,
+    )
+
+
+def replace_result_files(
+    db_path: Path, job_id: str, files: list[ResultFile], *, checked_at: float
+) -> None:
+    with _connect(db_path) as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM result_files WHERE job_id = ?", (job_id,))
+        connection.executemany(
+            """
+            INSERT INTO result_files (job_id, name, size, sha256, mtime)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (job_id, entry.name, entry.size, entry.sha256, entry.mtime)
+                for entry in files
+            ],
+        )
+        connection.execute(
+            "UPDATE jobs SET results_checked_at = ?, results_bytes = ? WHERE id = ?",
+            (checked_at, sum(entry.size for entry in files), job_id),
+        )
+        connection.commit()
+
+
+def mark_results_checked(db_path: Path, job_ids: list[str], checked_at: float) -> None:
+    with _connect(db_path) as connection:
+        for index in range(0, len(job_ids), ID_CHUNK_SIZE):
+            chunk = job_ids[index : index + ID_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            connection.execute(
+                f"UPDATE jobs SET results_checked_at = ? WHERE id IN ({placeholders})",
+                [checked_at, *chunk],
+            )
+        connection.commit()
+
+
+def list_result_manifests(
+    db_path: Path, job_ids: list[str]
+) -> dict[str, list[ResultFile]]:
+    """Recorded result files per job, sorted by name.
+
+    Jobs whose results were never recorded are left out, so callers can tell
+    them apart from jobs that have no results.
+    """
+    manifests: dict[str, list[ResultFile]] = {}
+    with _connect(db_path) as connection:
+        for index in range(0, len(job_ids), ID_CHUNK_SIZE):
+            chunk = job_ids[index : index + ID_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            recorded = connection.execute(
+                f"""
+                SELECT id FROM jobs
+                WHERE id IN ({placeholders}) AND results_checked_at IS NOT NULL
+                """,
+                chunk,
+            ).fetchall()
+            for row in recorded:
+                manifests[row["id"]] = []
+            rows = connection.execute(
+                f"""
+                SELECT job_id, name, size, sha256, mtime
+                FROM result_files
+                WHERE job_id IN ({placeholders})
+                ORDER BY job_id, name
+                """,
+                chunk,
+            ).fetchall()
+            for row in rows:
+                if row["job_id"] in manifests:
+                    manifests[row["job_id"]].append(
+                        ResultFile(
+                            name=row["name"],
+                            size=row["size"],
+                            sha256=row["sha256"],
+                            mtime=row["mtime"],
+                        )
+                    )
+    return manifests
+
+
+def list_jobs_to_reconcile(db_path: Path, limit: int) -> list[str]:
+    """Finished jobs whose result manifest was checked longest ago (or never)."""
+    with _connect(db_path) as connection:
+        rows = connection.execute(
+            """
+            SELECT id FROM jobs
+            WHERE status IN ('done', 'failed')
+            ORDER BY results_checked_at ASC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+    return [row["id"] for row in rows]
+
+
+def clear_result_manifests(
+    db_path: Path, job_ids: list[str], checked_at: float
+) -> None:
+    """Record that the results of ``job_ids`` were removed."""
+    with _connect(db_path) as connection:
+        for index in range(0, len(job_ids), ID_CHUNK_SIZE):
+            chunk = job_ids[index : index + ID_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                f"DELETE FROM result_files WHERE job_id IN ({placeholders})", chunk
+            )
+            connection.execute(
+                f"""
+                UPDATE jobs SET results_checked_at = ?, results_bytes = 0
+                WHERE id IN ({placeholders}) AND results_checked_at IS NOT NULL
+                """,
+                [checked_at, *chunk],
+            )
+            connection.commit()
+
+
+def update_job_preview(db_path: Path, job_id: str, text: str) -> None:
+    """Keep the first ``PREVIEW_CHARS`` characters of ``text`` on the job."""
+    with _connect(db_path) as connection:
+        connection.execute(
+            "UPDATE jobs SET preview = ?, preview_truncated = ? WHERE id = ?",
+            (text[:PREVIEW_CHARS], int(len(text) > PREVIEW_CHARS), job_id),
+        )
+        connection.commit()
+
+
+def get_job_previews(
+    db_path: Path, job_ids: list[str]
+) -> dict[str, tuple[str, str | None, bool]]:
+    """Map job ids to ``(filename, preview, truncated)``.
+
+    ``preview`` is ``None`` for jobs finished before previews were stored.
+    """
+    previews: dict[str, tuple[str, str | None, bool]] = {}
+    with _connect(db_path) as connection:
+        for index in range(0, len(job_ids), ID_CHUNK_SIZE):
+            chunk = job_ids[index : index + ID_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = connection.execute(
+                f"""
+                SELECT id, filename, preview, preview_truncated
+                FROM jobs
+                WHERE id IN ({placeholders}) AND status = 'done'
+                """,
+                chunk,
+            ).fetchall()
+            for row in rows:
+                previews[row["id"]] = (
+                    row["filename"],
+                    row["preview"],
+                    bool(row["preview_truncated"]),
+                )
+    return previews
+
+
+def cancel_running_job(db_path: Path, job_id: str) -> bool:
+    completed_at = _now_utc()
+    with _connect(db_path) as connection:
+        cursor = connection.execute(
+            """
+            UPDATE jobs
+            SET status = 'cancelled',
+                completed_at = ?
+            WHERE id = ? AND status = 'running'
+            """,
+            (completed_at, job_id),
+        )
+        connection.commit()
+    return cursor.rowcount > 0
+
+
+def update_job_status(
+    db_path: Path,
+    job_id: str,
+    status: str,
+    *,
+    started_at: str | None = None,
+    completed_at: str | None = None,
+    error_message: str | None = None,
+    status_note: str | None = None,
+) -> None:
+    updates: dict[str, str | None] = {"status": status}
+    if started_at is not None:
+        updates["started_at"] = started_at
+    if completed_at is not None:
+        updates["completed_at"] = completed_at
+    if error_message is not None:
+        updates["error_message"] = error_message
+    if status_note is not None:
+        updates["status_note"] = status_note
+    set_clause = ", ".join(f"{column} = ?" for column in updates)
+    values = list(updates.values()) + [job_id]
+    with _connect(db_path) as connection:
+        connection.execute(
+            f"""
+            UPDATE jobs
+            SET {set_clause}
+            WHERE id = ?
+            """,
+            values,
+        )
+        connection.commit()
+
+
+def update_job_language(db_path: Path, job_id: str, language: str) -> None:
+    with _connect(db_path) as connection:
+        connection.execute(
+            "UPDATE jobs SET language = ? WHERE id = ?",
+            (language, job_id),
+        )
+        connection.commit()
+
+
+def update_upload_path(db_path: Path, job_id: str, upload_path: str) -> None:
+    with _connect(db_path) as connection:
+        connection.execute(
+            "UPDATE jobs SET upload_path = ? WHERE id = ?",
+            (upload_path, job_id),
+        )
+        connection.commit()
+
+
+def recover_running_jobs(
+    db_path: Path,
+    *,
+    error_message: str = "Recovered after crash",
+) -> int:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    completed_at = _now_utc()
+    with _connect(db_path) as connection:
+        cursor = connection.execute(
+            """
+            UPDATE jobs
+            SET status = 'failed',
+                completed_at = ?,
                 error_message = CASE
                     WHEN error_message IS NULL OR error_message = '' THEN ?
                     ELSE error_message
@@ -371,7 +1463,22 @@ def recover_running_jobs(
     return cursor.rowcount
 
 
-def claim_next_job(db_path: Path) -> JobRecord | None:
+def claim_next_job(
+    db_path: Path,
+    *,
+    preferred_models: Collection[str] = (),
+    default_model: str | None = None,
+    affinity_window: int = DEFAULT_AFFINITY_WINDOW,
+    max_affinity_skips: int = DEFAULT_MAX_AFFINITY_SKIPS,
+) -> JobRecord | None:
+    """Mark the next queued job as running and return it.
+
+    Jobs run in queue order, except that when ``preferred_models`` is given the
+    first job within the next ``affinity_window`` queued jobs whose model
+    (``default_model`` when the job has none) is already loaded wins. Jobs
+    passed over this way are skipped at most ``max_affinity_skips`` times, so a
+    job needing another model is never starved.
+    """
     db_path.parent.mkdir(parents=True, exist_ok=True)
     connection = sqlite3.connect(db_path, isolation_level=None)
     connection.row_factory = sqlite3.Row
@@ -388,31 +1495,40 @@ def claim_next_job(db_path: Path) -> JobRecord | None:
         if running is not None:
             connection.execute("COMMIT")
             return None
-        row = connection.execute(
-            """
-            SELECT
-                id,
-                filename,
-                status,
-                created_at,
-                upload_path,
-                language,
-                started_at,
-                completed_at,
-                error_message,
-                queue_position
+        limit = max(affinity_window, 1) if preferred_models else 1
+        rows = connection.execute(
+            f"""
+            SELECT {_JOB_SELECT}, affinity_skips
             FROM jobs
             WHERE status = 'queued'
             ORDER BY
                 queue_position IS NULL,
                 queue_position ASC,
                 created_at ASC
-            LIMIT 1
-            """
-        ).fetchone()
-        if row is None:
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        if not rows:
             connection.execute("COMMIT")
             return None
+        row = _pick_affine_row(
+            rows,
+            preferred_models,
+            default_model,
+            max_affinity_skips,
+        )
+        skipped_ids = [candidate["id"] for candidate in rows[: rows.index(row)]]
+        if skipped_ids:
+            placeholders = ", ".join("?" for _ in skipped_ids)
+            connection.execute(
+                f"""
+                UPDATE jobs
+                SET affinity_skips = affinity_skips + 1
+                WHERE id IN ({placeholders})
+                """,
+                skipped_ids,
+            )
         job_id = row["id"]
         started_at = _now_utc()
         connection.execute(
@@ -424,15 +1540,286 @@ def claim_next_job(db_path: Path) -> JobRecord | None:
             (started_at, job_id),
         )
         connection.execute("COMMIT")
-        job_data = dict(row)
-        job_data["status"] = "running"
-        job_data["started_at"] = started_at
-        return JobRecord(**job_data)
+        job = _job_from_row(row)
+        job.status = "running"
+        job.started_at = started_at
+        return job
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+
+def _pick_affine_row(
+    rows: list[sqlite3.Row],
+    preferred_models: Collection[str],
+    default_model: str | None,
+    max_affinity_skips: int,
+) -> sqlite3.Row:
+    for row in rows:
+        if (row["model"] or default_model) in preferred_models:
+            return row
+        if row["affinity_skips"] >= max_affinity_skips:
+            return row
+    return rows[0]
+
+
+def enqueue_outbox_entry(
+    db_path: Path,
+    channel: str,
+    payload: dict[str, object],
+    *,
+    job_id: str | None = None,
+    available_at: float,
+) -> int:
+    with _connect(db_path) as connection:
+        cursor = connection.execute(
+            """
+            INSERT INTO outbox (
+                channel,
+                job_id,
+                payload,
+                status,
+                attempts,
+                available_at,
+                created_at
+            )
+            VALUES (?, ?, ?, 'pending', 0, ?, ?)
+            """,
+            (channel, job_id, json.dumps(payload), available_at, _now_utc()),
+        )
+        connection.commit()
+    return int(cursor.lastrowid)
+
+
+def claim_due_outbox_entry(
+    db_path: Path,
+    now: float,
+    channels: list[str],
+) -> OutboxEntry | None:
+    if not channels:
+        return None
+    placeholders = ", ".join("?" for _ in channels)
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            f"""
+            SELECT
+                id,
+                channel,
+                job_id,
+                payload,
+                status,
+                attempts,
+                available_at,
+                created_at,
+                last_error,
+                batch_key
+            FROM outbox
+            WHERE status = 'pending'
+              AND available_at <= ?
+              AND channel IN ({placeholders})
+            ORDER BY available_at ASC, id ASC
+            LIMIT 1
+            """,
+            [now, *channels],
+        ).fetchone()
+        if row is None:
+            connection.execute("COMMIT")
+            return None
+        connection.execute(
+            "UPDATE outbox SET status = 'sending' WHERE id = ?",
+            (row["id"],),
+        )
+        connection.execute("COMMIT")
     except Exception:
         connection.execute("ROLLBACK")
         raise
     finally:
         connection.close()
+    entry_data = dict(row)
+    entry_data["status"] = "sending"
+    return OutboxEntry(**entry_data)
+
+
+def append_outbox_batch(
+    db_path: Path,
+    channel: str,
+    batch_key: str,
+    item: dict[str, object],
+    *,
+    payload: dict[str, object],
+    now: float,
+    window: float,
+    max_items: int,
+) -> int:
+    """Add ``item`` to the open batch for ``batch_key`` or start a new one.
+
+    A batch stays open while it is pending, has never been attempted and holds
+    fewer than ``max_items`` items. It becomes due ``window`` seconds after it
+    was opened, or immediately once it is full.
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            """
+            SELECT id, payload
+            FROM outbox
+            WHERE channel = ?
+              AND batch_key = ?
+              AND status = 'pending'
+              AND attempts = 0
+            ORDER BY id DESC
+            LIMIT 1
+            """,
+            (channel, batch_key),
+        ).fetchone()
+        batch = json.loads(row["payload"]) if row is not None else None
+        if batch is not None and len(batch.get("items", [])) < max_items:
+            entry_id = int(row["id"])
+            batch["items"].append(item)
+            if len(batch["items"]) >= max_items:
+                connection.execute(
+                    "UPDATE outbox SET payload = ?, available_at = ? WHERE id = ?",
+                    (json.dumps(batch), now, entry_id),
+                )
+            else:
+                connection.execute(
+                    "UPDATE outbox SET payload = ? WHERE id = ?",
+                    (json.dumps(batch), entry_id),
+                )
+        else:
+            batch = {**payload, "items": [item]}
+            available_at = now if max_items <= 1 else now + window
+            cursor = connection.execute(
+                """
+                INSERT INTO outbox (
+                    channel,
+                    payload,
+                    status,
+                    attempts,
+                    available_at,
+                    created_at,
+                    batch_key
+                )
+                VALUES (?, ?, 'pending', 0, ?, ?, ?)
+                """,
+                (channel, json.dumps(batch), available_at, _now_utc(), batch_key),
+            )
+            entry_id = int(cursor.lastrowid)
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+    return entry_id
+
+
+def list_outbox_entries(
+    db_path: Path,
+    channel: str | None = None,
+) -> list[OutboxEntry]:
+    query = """
+        SELECT
+            id,
+            channel,
+            job_id,
+            payload,
+            status,
+            attempts,
+            available_at,
+            created_at,
+            last_error,
+            batch_key
+        FROM outbox
+    """
+    params: list[object] = []
+    if channel is not None:
+        query += " WHERE channel = ?"
+        params.append(channel)
+    query += " ORDER BY id ASC"
+    with _connect(db_path) as connection:
+        rows = connection.execute(query, params).fetchall()
+    return [OutboxEntry(**dict(row)) for row in rows]
+
+
+def delete_outbox_entry(db_path: Path, entry_id: int) -> None:
+    with _connect(db_path) as connection:
+        connection.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        connection.commit()
+
+
+def retry_outbox_entry(
+    db_path: Path,
+    entry_id: int,
+    *,
+    available_at: float,
+    error_message: str,
+    payload: dict[str, object] | None = None,
+) -> None:
+    updates: dict[str, object] = {
+        "status": "pending",
+        "available_at": available_at,
+        "last_error": error_message,
+    }
+    if payload is not None:
+        updates["payload"] = json.dumps(payload)
+    set_clause = ", ".join(f"{column} = ?" for column in updates)
+    values = list(updates.values()) + [entry_id]
+    with _connect(db_path) as connection:
+        connection.execute(
+            f"""
+            UPDATE outbox
+            SET attempts = attempts + 1, {set_clause}
+            WHERE id = ?
+            """,
+            values,
+        )
+        connection.commit()
+
+
+def recover_outbox_entries(db_path: Path) -> int:
+    with _connect(db_path) as connection:
+        cursor = connection.execute(
+            "UPDATE outbox SET status = 'pending' WHERE status = 'sending'"
+        )
+        connection.commit()
+    return cursor.rowcount
+
+
+def fail_outbox_entry(db_path: Path, entry_id: int, error_message: str) -> None:
+    with _connect(db_path) as connection:
+        connection.execute(
+            """
+            UPDATE outbox
+            SET status = 'failed',
+                attempts = attempts + 1,
+                last_error = ?
+            WHERE id = ?
+            """,
+            (error_message, entry_id),
+        )
+        connection.commit()
+
+
+def defer_outbox_channel(db_path: Path, channel: str, available_at: float) -> int:
+    with _connect(db_path) as connection:
+        cursor = connection.execute(
+            """
+            UPDATE outbox
+            SET available_at = ?
+            WHERE channel = ? AND status = 'pending' AND available_at < ?
+            """,
+            (available_at, channel, available_at),
+        )
+        connection.commit()
+    return cursor.rowcount
 
 
 def _now_utc() -> str:
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from mlx_ui.db import JobRecord
+
+# Processing seconds per second of audio when there is no history yet.
+DEFAULT_REALTIME_FACTOR = 0.5
+# Mirrors the browser's upload estimate for files without a known duration.
+FALLBACK_BYTES_PER_SECOND = 4 * 1024 * 1024 / 60
+PER_JOB_OVERHEAD_SECONDS = 15.0
+HISTORY_SAMPLE = 20
+
+
+def estimate_realtime_factor(jobs: list[JobRecord]) -> float:
+    """Average processing time per second of audio over recent finished jobs."""
+    samples = []
+    for job in jobs:
+        if job.status != "done" or not job.duration:
+            continue
+        elapsed = _elapsed_seconds(job.started_at, job.completed_at)
+        if elapsed is not None:
+            samples.append((job.completed_at or "", elapsed, job.duration))
+    samples.sort(reverse=True)
+    recent = samples[:HISTORY_SAMPLE]
+    total_audio = sum(duration for _completed, _elapsed, duration in recent)
+    if total_audio <= 0:
+        return DEFAULT_REALTIME_FACTOR
+    return sum(elapsed for _completed, elapsed, _duration in recent) / total_audio
+
+
+def estimate_job_seconds(job: JobRecord, realtime_factor: float) -> float:
+    if job.duration:
+        return job.duration * realtime_factor + PER_JOB_OVERHEAD_SECONDS
+    if job.upload_bytes:
+        return job.upload_bytes / FALLBACK_BYTES_PER_SECOND + PER_JOB_OVERHEAD_SECONDS
+    return PER_JOB_OVERHEAD_SECONDS
+
+
+def estimate_queue_etas(jobs: list[JobRecord], now: datetime) -> dict[str, float]:
+    """Seconds from ``now`` until each running or queued job should finish.
+
+    The queue runs one job at a time, so a queued job's ETA is what is left of
+    the running job plus the estimates of every job up to and including it.
+    """
+    factor = estimate_realtime_factor(jobs)
+    etas: dict[str, float] = {}
+    cumulative = 0.0
+    for job in jobs:
+        if job.status != "running":
+            continue
+        elapsed = _elapsed_seconds(job.started_at, now.isoformat()) or 0.0
+        remaining = max(estimate_job_seconds(job, factor) - elapsed, 0.0)
+        cumulative += remaining
+        etas[job.id] = remaining
+    queued = sorted(
+        (job for job in jobs if job.status == "queued"),
+        key=lambda job: (
+            job.queue_position if job.queue_position is not None else 1 << 62,
+            job.created_at,
+        ),
+    )
+    for job in queued:
+        cumulative += estimate_job_seconds(job, factor)
+        etas[job.id] = cumulative
+    return etas
+
+
+def _elapsed_seconds(start: str | None, end: str | None) -> float | None:
+    if not start or not end:
+        return None
+    try:
+        delta = datetime.fromisoformat(end) - datetime.fromisoformat(start)
+    except ValueError:
+        return None
+    return max(delta.total_seconds(), 0.0)
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+import gzip
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import struct
+import time
+from typing import BinaryIO, Iterable, Iterator
+import zlib
+
+from mlx_ui.compression import (
+    CHUNK_SIZE,
+    find_result,
+    is_compressed,
+    list_result_names,
+    open_text,
+)
+from mlx_ui.db import JobRecord, list_result_manifests
+from mlx_ui.formatters import result_filename
+from mlx_ui.layout import resolve_job_dir
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = (
+    "id",
+    "batch_id",
+    "filename",
+    "status",
+    "language",
+    "model",
+    "created_at",
+    "started_at",
+    "completed_at",
+    "duration",
+    "upload_bytes",
+    "sha256",
+    "error_message",
+    "results",
+    "text",
+)
+
+ZIP_VERSION = 20
+ZIP64_VERSION = 45
+ZIP_MADE_BY = (3 << 8) | ZIP64_VERSION  # Unix
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+METHOD_DEFLATED = 8
+MAX_16 = 0xFFFF
+MAX_32 = 0xFFFFFFFF
+GZIP_FLAG_HCRC = 0x02
+GZIP_FLAG_EXTRA = 0x04
+GZIP_FLAG_NAME = 0x08
+GZIP_FLAG_COMMENT = 0x10
+
+
+@dataclass
+class _ZipEntry:
+    name: bytes
+    flags: int
+    dos_time: int
+    dos_date: int
+    crc: int
+    compressed_size: int
+    size: int
+    offset: int
+
+
+class ZipStream:
+    """Writes a ZIP archive front to back, as chunks, without seeking.
+
+    Results already stored as gzip are copied in as they are: a gzip member
+    is a raw deflate stream plus its CRC and length, which is exactly what a
+    deflated ZIP entry holds, so nothing is recompressed. The member is
+    inflated once, without keeping the output, to check it before its header
+    is written. Plain files are deflated as they stream. Memory use is one
+    chunk plus a small record per entry for the central directory, whatever
+    the file sizes.
+    """
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self._entries: list[_ZipEntry] = []
+
+    def add_file(self, name: str, path: Path) -> Iterator[bytes]:
+        # Opened before anything is emitted, so a missing file adds nothing.
+        with Path(path).open("rb") as handle:
+            if is_compressed(path):
+                yield from self._add_gzip(name, handle)
+            else:
+                yield from self._add_plain(name, handle)
+
+    def close(self) -> Iterator[bytes]:
+        directory_offset = self.offset
+        for entry in self._entries:
+            extra = b""
+            offset = entry.offset
+            if offset >= MAX_32:
+                extra = struct.pack("<HHQ", 0x0001, 8, offset)
+                offset = MAX_32
+            yield self._emit(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,
+                    ZIP_MADE_BY,
+                    ZIP64_VERSION if extra else ZIP_VERSION,
+                    entry.flags,
+                    METHOD_DEFLATED,
+                    entry.dos_time,
+                    entry.dos_date,
+                    entry.crc,
+                    entry.compressed_size,
+                    entry.size,
+                    len(entry.name),
+                    len(extra),
+                    0,
+                    0,
+                    0,
+                    0o100644 << 16,
+                    offset,
+                )
+                + entry.name
+                + extra
+            )
+        directory_size = self.offset - directory_offset
+        count = len(self._entries)
+        if count >= MAX_16 or directory_offset >= MAX_32 or directory_size >= MAX_32:
+            record_offset = self.offset
+            yield self._emit(
+                struct.pack(
+                    "<IQHHIIQQQQ",
+                    0x06064B50,
+                    44,
+                    ZIP_MADE_BY,
+                    ZIP64_VERSION,
+                    0,
+                    0,
+                    count,
+                    count,
+                    directory_size,
+                    directory_offset,
+                )
+                + struct.pack("<IIQI", 0x07064B50, 0, record_offset, 1)
+            )
+            count = min(count, MAX_16)
+            directory_size = min(directory_size, MAX_32)
+            directory_offset = min(directory_offset, MAX_32)
+        yield self._emit(
+            struct.pack(
+                "<IHHHHIIH",
+                0x06054B50,
+                0,
+                0,
+                count,
+                count,
+                directory_size,
+                directory_offset,
+                0,
+            )
+        )
+
+    def _add_gzip(self, name: str, handle: BinaryIO) -> Iterator[bytes]:
+        start, length, crc, size = _gzip_member(handle)
+        _verify_deflate(handle, start, length, crc, size)
+        entry = self._entry(name, handle, FLAG_UTF8, crc, length, size)
+        yield self._emit(_local_header(entry))
+        handle.seek(start)
+        remaining = length
+        while remaining:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise OSError(f"{name} shrank while exporting")
+            remaining -= len(chunk)
+            yield self._emit(chunk)
+        self._entries.append(entry)
+
+    def _add_plain(self, name: str, handle: BinaryIO) -> Iterator[bytes]:
+        if os.fstat(handle.fileno()).st_size >= MAX_32:
+            raise OSError(f"{name} is too large to export")
+        # The CRC is known only at the end, so it follows in a data descriptor.
+        entry = self._entry(name, handle, FLAG_UTF8 | FLAG_DATA_DESCRIPTOR, 0, 0, 0)
+        yield self._emit(_local_header(entry))
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        while chunk := handle.read(CHUNK_SIZE):
+            entry.crc = zlib.crc32(chunk, entry.crc)
+            entry.size += len(chunk)
+            compressed = compressor.compress(chunk)
+            if compressed:
+                entry.compressed_size += len(compressed)
+                yield self._emit(compressed)
+        compressed = compressor.flush()
+        entry.compressed_size += len(compressed)
+        yield self._emit(compressed)
+        yield self._emit(
+            struct.pack(
+                "<IIII", 0x08074B50, entry.crc, entry.compressed_size, entry.size
+            )
+        )
+        self._entries.append(entry)
+
+    def _entry(
+        self,
+        name: str,
+        handle: BinaryIO,
+        flags: int,
+        crc: int,
+        compressed_size: int,
+        size: int,
+    ) -> _ZipEntry:
+        dos_time, dos_date = _dos_timestamp(os.fstat(handle.fileno()).st_mtime)
+        return _ZipEntry(
+            name=name.encode("utf-8"),
+            flags=flags,
+            dos_time=dos_time,
+            dos_date=dos_date,
+            crc=crc,
+            compressed_size=compressed_size,
+            size=size,
+            offset=self.offset,
+        )
+
+    def _emit(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+
+def stream_results_zip(
+    db_path: Path, results_dir: Path, pages: Iterable[list[JobRecord]]
+) -> Iterator[bytes]:
+    """ZIP of every result of the jobs in ``pages``, one folder per job."""
+    archive = ZipStream()
+    folders: set[str] = set()
+    for jobs, names_by_job in _with_result_names(db_path, results_dir, pages):
+        for job in jobs:
+            names = names_by_job[job.id]
+            if not names:
+                continue
+            folder = _unique_folder(job, folders)
+            job_dir = resolve_job_dir(results_dir, job.id)
+            for name in names:
+                path = find_result(job_dir, name)
+                if path is None:
+                    continue
+                try:
+                    yield from archive.add_file(f"{folder}/{name}", path)
+                except FileNotFoundError:
+                    # Deleted after it was listed.
+                    continue
+                except (OSError, EOFError) as exc:
+                    # Anything already sent for it is skipped by the central
+                    # directory, so the archive stays valid without it.
+                    logger.warning("Left %s out of the export: %s", path, exc)
+    yield from archive.close()
+
+
+def stream_jsonl(
+    db_path: Path, results_dir: Path, pages: Iterable[list[JobRecord]]
+) -> Iterator[bytes]:
+    for record in _iter_records(db_path, results_dir, pages):
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def stream_csv(
+    db_path: Path, results_dir: Path, pages: Iterable[list[JobRecord]]
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for record in _iter_records(db_path, results_dir, pages):
+        record["results"] = " ".join(record["results"])
+        writer.writerow(record[field] for field in EXPORT_FIELDS)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _iter_records(
+    db_path: Path, results_dir: Path, pages: Iterable[list[JobRecord]]
+) -> Iterator[dict[str, object]]:
+    for jobs, names_by_job in _with_result_names(db_path, results_dir, pages):
+        for job in jobs:
+            record: dict[str, object] = {
+                field: getattr(job, field) for field in EXPORT_FIELDS[:-2]
+            }
+            record["results"] = names_by_job[job.id]
+            record["text"] = _read_transcript(results_dir, job)
+            yield record
+
+
+def _with_result_names(
+    db_path: Path, results_dir: Path, pages: Iterable[list[JobRecord]]
+) -> Iterator[tuple[list[JobRecord], dict[str, list[str]]]]:
+    for jobs in pages:
+        manifests = list_result_manifests(db_path, [job.id for job in jobs])
+        names_by_job = {}
+        for job in jobs:
+            manifest = manifests.get(job.id)
+            if manifest is None:
+                job_dir = resolve_job_dir(results_dir, job.id)
+                names_by_job[job.id] = list_result_names(job_dir)
+            else:
+                names_by_job[job.id] = [entry.name for entry in manifest]
+        yield jobs, names_by_job
+
+
+def _read_transcript(results_dir: Path, job: JobRecord) -> str:
+    job_dir = resolve_job_dir(results_dir, job.id)
+    path = find_result(job_dir, result_filename(job.filename))
+    if path is None:
+        return ""
+    try:
+        with open_text(path) as handle:
+            return handle.read().strip()
+    except FileNotFoundError:
+        return ""
+    except (OSError, EOFError, zlib.error) as exc:
+        logger.warning("Left the text of %s out of the export: %s", path, exc)
+        return ""
+
+
+def _unique_folder(job: JobRecord, used: set[str]) -> str:
+    stem = Path(job.filename).stem.strip() or job.id
+    folder = stem
+    counter = 2
+    while folder in used:
+        folder = f"{stem} ({counter})"
+        counter += 1
+    used.add(folder)
+    return folder
+
+
+def _local_header(entry: _ZipEntry) -> bytes:
+    return (
+        struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            ZIP_VERSION,
+            entry.flags,
+            METHOD_DEFLATED,
+            entry.dos_time,
+            entry.dos_date,
+            entry.crc,
+            entry.compressed_size,
+            entry.size,
+            len(entry.name),
+            0,
+        )
+        + entry.name
+    )
+
+
+def _gzip_member(handle: BinaryIO) -> tuple[int, int, int, int]:
+    """Locate the deflate data of a single-member gzip file.
+
+    Returns ``(offset, length, crc32, uncompressed size)``. Results are
+    always written as one member, so the trailer describes the whole file.
+    """
+    header = handle.read(10)
+    if len(header) < 10 or header[:3] != b"\x1f\x8b\x08":
+        raise gzip.BadGzipFile("not a gzip file")
+    flags = header[3]
+    if flags & GZIP_FLAG_EXTRA:
+        (extra_length,) = struct.unpack("<H", handle.read(2))
+        handle.seek(extra_length, 1)
+    for flag in (GZIP_FLAG_NAME, GZIP_FLAG_COMMENT):
+        if flags & flag:
+            while handle.read(1) not in {b"\x00", b""}:
+                pass
+    if flags & GZIP_FLAG_HCRC:
+        handle.seek(2, 1)
+    start = handle.tell()
+    end = handle.seek(-8, 2)
+    crc, size = struct.unpack("<II", handle.read(8))
+    if end < start:
+        raise gzip.BadGzipFile("truncated gzip file")
+    return start, end - start, crc, size
+
+
+def _verify_deflate(
+    handle: BinaryIO, start: int, length: int, crc: int, size: int
+) -> None:
+    """Inflate ``length`` bytes at ``start`` and check them against the trailer."""
+    handle.seek(start)
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+    actual_crc = 0
+    actual_size = 0
+    remaining = length
+    try:
+        while remaining:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise EOFError("gzip file shrank while exporting")
+            remaining -= len(chunk)
+            # Bounded output, so a highly compressed result stays one chunk.
+            while chunk:
+                data = inflater.decompress(chunk, CHUNK_SIZE)
+                actual_crc = zlib.crc32(data, actual_crc)
+                actual_size += len(data)
+                chunk = inflater.unconsumed_tail
+        data = inflater.flush()
+    except zlib.error as exc:
+        raise gzip.BadGzipFile(f"corrupt deflate data: {exc}") from exc
+    actual_crc = zlib.crc32(data, actual_crc)
+    actual_size += len(data)
+    if not inflater.eof or inflater.unused_data:
+        raise gzip.BadGzipFile("deflate data does not end with the member")
+    if (actual_crc, actual_size & MAX_32) != (crc, size):
+        raise gzip.BadGzipFile("CRC or length does not match the gzip trailer")
+
+
+def _dos_timestamp(mtime: float) -> tuple[int, int]:
+    moment = time.localtime(mtime)
+    if moment.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (
+        (moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2),
+        ((moment.tm_year - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday,
+    )
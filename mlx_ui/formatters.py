@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import io
+import json
+import math
+import os
+from pathlib import Path
+import re
+from typing import Callable, Iterable, TextIO
+
+from mlx_ui.compression import open_writer, stored_name
+from mlx_ui.db import JobRecord
+from mlx_ui.layout import resolve_job_dir
+
+DEFAULT_OUTPUT_FORMATS = ("txt",)
+TIMESTAMPED_LINE = re.compile(
+    r"^\[(?P<start>[\d:.,]+)\s*-->\s*(?P<end>[\d:.,]+)\]\s*(?P<text>.*)$"
+)
+
+
+@dataclass(frozen=True)
+class Segment:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class TranscriptResult:
+    """What a backend produced for one job, before any file is written."""
+
+    text: str
+    segments: list[Segment] = field(default_factory=list)
+    language: str | None = None
+
+
+def _write_txt(result: TranscriptResult, handle: TextIO) -> None:
+    transcript = result.text.strip()
+    if transcript:
+        handle.write(transcript)
+        handle.write("\n")
+
+
+def _write_srt(result: TranscriptResult, handle: TextIO) -> None:
+    for index, segment in enumerate(_cues(result), start=1):
+        start = _timestamp(segment.start, ",")
+        end = _timestamp(segment.end, ",")
+        handle.write(f"{index}\n{start} --> {end}\n{segment.text}\n\n")
+
+
+def _write_vtt(result: TranscriptResult, handle: TextIO) -> None:
+    handle.write("WEBVTT\n\n")
+    for segment in _cues(result):
+        start = _timestamp(segment.start, ".")
+        end = _timestamp(segment.end, ".")
+        handle.write(f"{start} --> {end}\n{segment.text}\n\n")
+
+
+def _write_json(result: TranscriptResult, handle: TextIO) -> None:
+    # Written piecewise so long transcripts never exist twice in memory.
+    handle.write('{"text": ')
+    handle.write(json.dumps(result.text.strip(), ensure_ascii=False))
+    handle.write(', "language": ')
+    handle.write(json.dumps(result.language))
+    handle.write(', "segments": [')
+    for index, segment in enumerate(result.segments):
+        if index:
+            handle.write(", ")
+        handle.write(
+            json.dumps(
+                {
+                    "id": index,
+                    "start": round(segment.start, 3),
+                    "end": round(segment.end, 3),
+                    "text": segment.text.strip(),
+                },
+                ensure_ascii=False,
+            )
+        )
+    handle.write("]}\n")
+
+
+FORMATTERS: dict[str, Callable[[TranscriptResult, TextIO], None]] = {
+    "txt": _write_txt,
+    "srt": _write_srt,
+    "vtt": _write_vtt,
+    "json": _write_json,
+}
+OUTPUT_FORMATS = tuple(FORMATTERS)
+MEDIA_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+    "json": "application/json",
+}
+
+
+def write_results(
+    job: JobRecord,
+    results_dir: Path,
+    result: TranscriptResult,
+    formats: Iterable[str] | None = None,
+) -> list[Path]:
+    """Write ``result`` once per requested format; the ``.txt`` path comes first.
+
+    Each file is gzip-compressed as it is streamed to a temporary name, then
+    renamed into place as ``<stem>.<format>.gz``, so a crash never leaves a
+    truncated result behind.
+    """
+    requested = set(formats or DEFAULT_OUTPUT_FORMATS) | {"txt"}
+    job_dir = resolve_job_dir(results_dir, job.id)
+    job_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name in OUTPUT_FORMATS:
+        if name not in requested:
+            continue
+        path = job_dir / stored_name(result_filename(job.filename, name))
+        partial = path.with_name(f".{path.name}.partial")
+        with (
+            open_writer(partial) as raw,
+            io.TextIOWrapper(raw, encoding="utf-8", newline="\n") as handle,
+        ):
+            FORMATTERS[name](result, handle)
+        os.replace(partial, path)
+        paths.append(path)
+    return paths
+
+
+def render_result(result: TranscriptResult, name: str) -> str:
+    buffer = io.StringIO()
+    FORMATTERS[name](result, buffer)
+    return buffer.getvalue()
+
+
+def result_filename(source_name: str, extension: str = "txt") -> str:
+    base = Path(source_name).stem.strip()
+    if not base:
+        base = "transcript"
+    return f"{base}.{extension}"
+
+
+def parse_timestamped_text(
+    text: str, duration: float | None = None
+) -> TranscriptResult:
+    """Build a result from CLI output.
+
+    Lines such as ``[00:01.000 --> 00:04.500] Hello`` become segments. Output
+    without timings becomes a single segment spanning ``duration``.
+    """
+    segments = []
+    plain_lines = []
+    for line in text.splitlines():
+        match = TIMESTAMPED_LINE.match(line.strip())
+        start = end = None
+        if match:
+            start = parse_timestamp(match.group("start"))
+            end = parse_timestamp(match.group("end"))
+        if start is None or end is None:
+            plain_lines.append(line)
+            continue
+        segment_text = match.group("text").strip()
+        if segment_text:
+            segments.append(Segment(start, end, segment_text))
+    if segments:
+        return TranscriptResult(
+            text=" ".join(segment.text for segment in segments),
+            segments=segments,
+        )
+    transcript = "\n".join(plain_lines).strip()
+    if not transcript:
+        return TranscriptResult(text="")
+    return TranscriptResult(
+        text=transcript,
+        segments=[Segment(0.0, float(duration or 0.0), transcript)],
+    )
+
+
+def parse_timestamp(value: str) -> float | None:
+    """Seconds from ``"83.5"``, ``"01:23"`` or ``"01:23:00,500"``."""
+    parts = value.replace(",", ".").split(":")
+    try:
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        return None
+    if not 1 <= len(numbers) <= 3 or not all(
+        math.isfinite(number) and number >= 0 for number in numbers
+    ):
+        return None
+    seconds = 0.0
+    for number in numbers:
+        seconds = seconds * 60 + number
+    return seconds
+
+
+def _cues(result: TranscriptResult) -> Iterable[Segment]:
+    for segment in result.segments:
+        text = segment.text.strip()
+        if text:
+            yield Segment(segment.start, max(segment.end, segment.start), text)
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = max(int(round(seconds * 1000)), 0)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import hashlib
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable
+
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+
+from mlx_ui.uploads import cleanup_upload_path
+
+WRITE_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class IngestError(Exception):
+    pass
+
+
+@dataclass
+class IngestedFile:
+    job_id: str
+    filename: str
+    path: Path
+    size: int = 0
+    sha256: str = ""
+
+
+@dataclass
+class IngestResult:
+    files: list[IngestedFile] = field(default_factory=list)
+    fields: dict[str, list[str]] = field(default_factory=dict)
+
+
+class _HashingWriter:
+    """Writes to ``path`` while hashing; every method runs in a worker thread."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file: BinaryIO | None = None
+
+    def write(self, data: bytes) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("wb")
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def close(self) -> None:
+        if self._file is None:
+            # Zero-byte parts still produce a file.
+            self.write(b"")
+        assert self._file is not None
+        self._file.close()
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    @property
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def copy_upload(source: BinaryIO, destination: Path) -> tuple[int, str]:
+    """Copy ``source`` to ``destination``, returning its size and SHA-256."""
+    writer = _HashingWriter(destination)
+    try:
+        while chunk := source.read(WRITE_CHUNK_SIZE):
+            writer.write(chunk)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.size, writer.hexdigest
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(WRITE_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def multipart_boundary(content_type: str | None) -> bytes | None:
+    if not content_type:
+        return None
+    media_type, params = parse_options_header(content_type)
+    if media_type != b"multipart/form-data":
+        return None
+    return params.get(b"boundary") or None
+
+
+async def ingest_multipart(
+    stream: AsyncIterator[bytes],
+    boundary: bytes,
+    allocate: Callable[[str], tuple[str, Path]],
+    uploads_dir: Path,
+) -> IngestResult:
+    """Parse a multipart body as it arrives, writing file parts to disk.
+
+    ``allocate`` maps a client filename to ``(job_id, destination)`` under
+    ``uploads_dir``. File data is buffered up to ``WRITE_CHUNK_SIZE`` and then
+    written and hashed in a worker thread, so the event loop never blocks on
+    disk and the request is never spooled to a temporary file first. Partial
+    files are removed when the body is malformed or the client disconnects.
+    """
+    parser = _MultipartIngest(boundary, allocate, uploads_dir)
+    try:
+        async for chunk in stream:
+            parser.feed(chunk)
+            await parser.flush()
+        parser.finish()
+        await parser.flush()
+    except BaseException:
+        await parser.discard()
+        raise
+    return parser.result
+
+
+@dataclass
+class _FilePart:
+    ingested: IngestedFile
+    writer: _HashingWriter
+    buffer: bytearray = field(default_factory=bytearray)
+    complete: bool = False
+
+
+class _MultipartIngest:
+    def __init__(
+        self,
+        boundary: bytes,
+        allocate: Callable[[str], tuple[str, Path]],
+        uploads_dir: Path,
+    ) -> None:
+        self.result = IngestResult()
+        self._allocate = allocate
+        self._uploads_dir = uploads_dir
+        self._parts: list[_FilePart] = []
+        self._pending: list[_FilePart] = []
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: dict[bytes, bytes] = {}
+        self._current: _FilePart | None = None
+        self._field_name: str | None = None
+        self._field_value = bytearray()
+        self._ended = False
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_end": self._on_end,
+            },
+        )
+
+    def feed(self, chunk: bytes) -> None:
+        try:
+            self._parser.write(chunk)
+        except IngestError:
+            raise
+        except Exception as exc:
+            raise IngestError(f"Malformed multipart body: {exc}") from exc
+
+    def finish(self) -> None:
+        self._parser.finalize()
+        if not self._ended:
+            raise IngestError("Multipart body is incomplete")
+
+    async def flush(self) -> None:
+        for part in list(self._pending):
+            if len(part.buffer) < WRITE_CHUNK_SIZE and not part.complete:
+                continue
+            data = bytes(part.buffer)
+            part.buffer.clear()
+            if data:
+                await asyncio.to_thread(part.writer.write, data)
+            if part.complete:
+                await asyncio.to_thread(part.writer.close)
+                part.ingested.size = part.writer.size
+                part.ingested.sha256 = part.writer.hexdigest
+                self._pending.remove(part)
+
+    async def discard(self) -> None:
+        for part in self._parts:
+            await asyncio.to_thread(part.writer.abort)
+            cleanup_upload_path(
+                part.ingested.path, self._uploads_dir, part.ingested.job_id
+            )
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _disposition, options = parse_options_header(
+            self._headers.get(b"content-disposition", b"")
+        )
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        if filename is None:
+            self._field_name = name
+            self._field_value = bytearray()
+            return
+        decoded = filename.decode("utf-8", "replace")
+        if not decoded:
+            # Browsers send an empty file part when nothing was selected.
+            self._current = None
+            return
+        job_id, destination = self._allocate(decoded)
+        ingested = IngestedFile(job_id=job_id, filename=decoded, path=destination)
+        part = _FilePart(ingested=ingested, writer=_HashingWriter(destination))
+        self._current = part
+        self._parts.append(part)
+        self._pending.append(part)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current is not None:
+            self._current.buffer += data[start:end]
+        elif self._field_name is not None:
+            self._field_value += data[start:end]
+            if len(self._field_value) > MAX_FIELD_SIZE:
+                raise IngestError(f"Form field '{self._field_name}' is too large")
+
+    def _on_part_end(self) -> None:
+        if self._current is not None:
+            self._current.complete = True
+            self.result.files.append(self._current.ingested)
+            self._current = None
+        elif self._field_name is not None:
+            value = self._field_value.decode("utf-8", "replace")
+            self.result.fields.setdefault(self._field_name, []).append(value)
+            self._field_name = None
+
+    def _on_end(self) -> None:
+        self._ended = True
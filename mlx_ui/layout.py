@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import os
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+SHARD_WIDTH = 2
+SHARD_LEVELS = 2
+
+
+@dataclass
+class MigrationReport:
+    moved: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+
+
+def is_safe_path_component(value: str) -> bool:
+    return value not in {"", ".", ".."} and Path(value).name == value
+
+
+def shard_parts(job_id: str) -> tuple[str, ...]:
+    """Shard directory names for ``job_id``: ``"abcd1234"`` -> ``("ab", "cd")``."""
+    padded = job_id.ljust(SHARD_WIDTH * SHARD_LEVELS, "_")
+    return tuple(
+        padded[level * SHARD_WIDTH : (level + 1) * SHARD_WIDTH]
+        for level in range(SHARD_LEVELS)
+    )
+
+
+def sharded_job_dir(root: Path, job_id: str) -> Path:
+    _check_job_id(job_id)
+    return Path(root).joinpath(*shard_parts(job_id), job_id)
+
+
+def resolve_job_dir(root: Path, job_id: str) -> Path:
+    """Directory holding ``job_id``'s files under ``root``.
+
+    New jobs live at ``<root>/ab/cd/<job_id>/``. A job that still has a flat
+    ``<root>/<job_id>/`` directory from before sharding is served from there
+    until ``migrate_to_sharded`` moves it, so the app keeps working while a
+    migration runs.
+    """
+    sharded = sharded_job_dir(root, job_id)
+    legacy = Path(root) / job_id
+    if not sharded.exists() and legacy.is_dir():
+        return legacy
+    return sharded
+
+
+def job_ids_under(path: Path) -> list[str]:
+    """Ids of the job directories inside ``path``, an entry of a root.
+
+    A shard directory holds ``<cd>/<job_id>/`` below it; any other directory
+    is a flat job directory from before sharding.
+    """
+    path = Path(path)
+    if not _is_shard_name(path.name):
+        return [path.name] if path.is_dir() and not path.is_symlink() else []
+    job_ids = []
+    try:
+        for shard in os.scandir(path):
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_dir(follow_symlinks=False):
+                    job_ids.append(entry.name)
+    except FileNotFoundError:
+        pass
+    return job_ids
+
+
+def prune_empty_shards(path: Path, root: Path) -> None:
+    """Remove the shard directories above ``path`` that are now empty."""
+    root = Path(root).resolve()
+    parent = Path(path).resolve().parent
+    while parent != root and parent.is_relative_to(root):
+        if not _is_shard_name(parent.name):
+            return
+        try:
+            parent.rmdir()
+        except OSError:
+            return
+        parent = parent.parent
+
+
+def migrate_to_sharded(
+    root: Path, skip: Iterable[str] = (), dry_run: bool = False
+) -> MigrationReport:
+    """Move flat ``<root>/<job_id>/`` directories into the sharded layout.
+
+    Each job moves with a single rename, so readers see the old or the new
+    path and never a half-copied directory. Jobs in ``skip`` (queued or
+    running ones, whose files are still being written) are left alone and
+    can be moved by a later run.
+    """
+    root = Path(root)
+    skipped_ids = set(skip)
+    report = MigrationReport()
+    try:
+        entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return report
+    for entry in entries:
+        name = entry.name
+        if (
+            name.startswith(".")
+            or _is_shard_name(name)
+            or not is_safe_path_component(name)
+            or not entry.is_dir(follow_symlinks=False)
+        ):
+            continue
+        if name in skipped_ids:
+            report.skipped.append(name)
+            continue
+        target = sharded_job_dir(root, name)
+        if target.exists():
+            logger.warning("Not migrating %s: %s already exists", name, target)
+            report.conflicts.append(name)
+            continue
+        if not dry_run:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(entry.path, target)
+            except FileNotFoundError:
+                # Deleted while the migration was running.
+                continue
+        report.moved.append(name)
+    return report
+
+
+def _check_job_id(job_id: str) -> None:
+    if not is_safe_path_component(job_id):
+        raise ValueError(f"Unsafe job id: {job_id!r}")
+
+
+def _is_shard_name(name: str) -> bool:
+    # Job ids are far longer than a shard name, so the two never collide.
+    return len(name) == SHARD_WIDTH and not name.startswith(".")
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable
+
+from mlx_ui.compression import is_compressed, logical_name
+from mlx_ui.db import (
+    ResultFile,
+    list_jobs_to_reconcile,
+    list_result_manifests,
+    mark_results_checked,
+    replace_result_files,
+)
+from mlx_ui.ingest import hash_file
+from mlx_ui.layout import resolve_job_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECONCILE_INTERVAL = 10.0
+DEFAULT_RECONCILE_BATCH = 200
+
+_reconciler_lock = threading.Lock()
+_reconciler_instance: ResultReconciler | None = None
+
+
+def scan_results(
+    job_dir: Path, previous: list[ResultFile] | None = None
+) -> list[ResultFile]:
+    """List the result files in ``job_dir``, sorted by name.
+
+    Compressed files are listed under the name they are served as, with
+    their size and hash on disk. Hashes from ``previous`` are reused for
+    files whose size and mtime are unchanged, so a rescan of an untouched
+    directory reads no file contents.
+    """
+    known = {entry.name: entry for entry in previous or []}
+    files: dict[str, ResultFile] = {}
+    try:
+        entries = list(os.scandir(job_dir))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    for entry in entries:
+        # Dotfiles are partial writes from the formatter pipeline.
+        if entry.name.startswith(".") or not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        name = logical_name(entry.name)
+        if name in files and not is_compressed(Path(entry.name)):
+            # Mid-compression: the .gz copy is already in place.
+            continue
+        cached = known.get(name)
+        if cached and cached.size == stat.st_size and cached.mtime == stat.st_mtime:
+            sha256 = cached.sha256
+        else:
+            try:
+                sha256 = hash_file(Path(entry.path))
+            except FileNotFoundError:
+                continue
+        files[name] = ResultFile(name, stat.st_size, sha256, stat.st_mtime)
+    return [files[name] for name in sorted(files)]
+
+
+def record_results(
+    db_path: Path,
+    results_dir: Path,
+    job_id: str,
+    clock: Callable[[], float] = time.time,
+) -> list[ResultFile]:
+    files = scan_results(resolve_job_dir(results_dir, job_id))
+    replace_result_files(db_path, job_id, files, checked_at=clock())
+    return files
+
+
+class ResultReconciler:
+    """Walks finished jobs a batch at a time and repairs manifest drift."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        results_dir: Path,
+        interval: float = DEFAULT_RECONCILE_INTERVAL,
+        batch_size: int = DEFAULT_RECONCILE_BATCH,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.results_dir = Path(results_dir)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="mlx-ui-result-reconciler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Result reconciler pass failed")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self) -> int:
+        """Check one batch; returns how many manifests were rewritten."""
+        job_ids = list_jobs_to_reconcile(self.db_path, self.batch_size)
+        if not job_ids:
+            return 0
+        manifests = list_result_manifests(self.db_path, job_ids)
+        now = self.clock()
+        unchanged = []
+        repaired = 0
+        for job_id in job_ids:
+            previous = manifests.get(job_id)
+            job_dir = resolve_job_dir(self.results_dir, job_id)
+            files = scan_results(job_dir, previous)
+            if files == previous:
+                unchanged.append(job_id)
+                continue
+            if previous is not None:
+                logger.info("Repaired result manifest for job %s", job_id)
+            replace_result_files(self.db_path, job_id, files, checked_at=now)
+            repaired += 1
+        mark_results_checked(self.db_path, unchanged, now)
+        return repaired
+
+
+def start_result_reconciler(
+    db_path: Path,
+    results_dir: Path,
+    interval: float = DEFAULT_RECONCILE_INTERVAL,
+) -> ResultReconciler:
+    global _reconciler_instance
+    with _reconciler_lock:
+        if _reconciler_instance and _reconciler_instance.is_running():
+            return _reconciler_instance
+        _reconciler_instance = ResultReconciler(
+            db_path=db_path,
+            results_dir=results_dir,
+            interval=interval,
+        )
+        _reconciler_instance.start()
+        return _reconciler_instance
+
+
+def stop_result_reconciler(timeout: float | None = None) -> None:
+    global _reconciler_instance
+    with _reconciler_lock:
+        if not _reconciler_instance:
+            return
+        _reconciler_instance.stop(timeout=timeout)
+        _reconciler_instance = None
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import subprocess
+
+SAMPLE_RATE = 16000
+FFPROBE_TIMEOUT = 30
+SILENCE_THRESHOLD_DB = -50.0
+SILENCE_WINDOW_SECONDS = 0.5
+SILENCE_BLOCK_WINDOWS = 60
+
+
+class MediaProbeError(Exception):
+    """Raised when ffprobe cannot read a file as audio or video."""
+
+
+@dataclass
+class MediaInfo:
+    container: str | None
+    duration: float | None
+    audio_streams: int
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+
+
+def load_audio(
+    path: Path,
+    *,
+    seconds: float | None = None,
+    sample_rate: int = SAMPLE_RATE,
+):
+    """Decode ``path`` to mono float32 PCM, optionally only its first seconds.
+
+    Mirrors ``whisper.load_audio`` but lets ffmpeg stop early, so probing the
+    start of a long recording does not decode all of it.
+    """
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+    except Exception as exc:  # pragma: no cover - depends on optional dep
+        raise RuntimeError("Decoding audio requires numpy.") from exc
+    command = ["ffmpeg", "-nostdin", "-threads", "0", "-i", str(path)]
+    if seconds is not None:
+        command += ["-t", f"{seconds:g}"]
+    command += ["-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le"]
+    command += ["-ar", str(sample_rate), "-"]
+    try:
+        result = subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError as exc:
+        raise RuntimeError("ffmpeg is not installed or not on PATH.") from exc
+    except subprocess.CalledProcessError as exc:
+        stderr = exc.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"ffmpeg failed to decode audio: {stderr}") from exc
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def ffprobe_command(path: Path) -> list[str]:
+    return [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=format_name,duration:stream=codec_type,codec_name,sample_rate,channels",
+        "-of",
+        "json",
+        str(path),
+    ]
+
+
+def parse_ffprobe_output(output: str) -> MediaInfo:
+    try:
+        payload = json.loads(output or "{}")
+    except json.JSONDecodeError as exc:
+        raise MediaProbeError("ffprobe returned invalid JSON") from exc
+    if not isinstance(payload, dict):
+        raise MediaProbeError("ffprobe returned invalid JSON")
+    streams = [
+        stream for stream in payload.get("streams") or [] if isinstance(stream, dict)
+    ]
+    media_streams = [
+        stream for stream in streams if stream.get("codec_type") in {"audio", "video"}
+    ]
+    if not media_streams:
+        raise MediaProbeError("No audio or video streams found")
+    audio = [stream for stream in streams if stream.get("codec_type") == "audio"]
+    first_audio = audio[0] if audio else {}
+    fmt = payload.get("format") or {}
+    return MediaInfo(
+        container=fmt.get("format_name") or None,
+        duration=_parse_number(fmt.get("duration"), float),
+        audio_streams=len(audio),
+        audio_codec=first_audio.get("codec_name") or None,
+        sample_rate=_parse_number(first_audio.get("sample_rate"), int),
+        channels=_parse_number(first_audio.get("channels"), int),
+    )
+
+
+async def probe_media(path: Path) -> MediaInfo | None:
+    """Describe ``path`` with ffprobe without blocking the event loop.
+
+    Returns ``None`` when ffprobe is unavailable and raises
+    ``MediaProbeError`` when the file is not decodable media.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *ffprobe_command(path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError:
+        return None
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(), timeout=FFPROBE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+    if process.returncode != 0:
+        message = stderr.decode("utf-8", "replace").strip().splitlines()
+        raise MediaProbeError(message[-1] if message else "ffprobe failed")
+    return parse_ffprobe_output(stdout.decode("utf-8", "replace"))
+
+
+def _parse_number(value: object, kind: type[int] | type[float]):  # type: ignore[no-untyped-def]
+    if value is None:
+        return None
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def count_audio_streams(path: Path) -> int | None:
+    """Return how many audio streams ``path`` has, or ``None`` if unknown."""
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a",
+        "-show_entries",
+        "stream=index",
+        "-of",
+        "csv=p=0",
+        str(path),
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            timeout=FFPROBE_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        # Undecodable files are left to the backend, which reports the error.
+        return None
+    return sum(1 for line in result.stdout.splitlines() if line.strip())
+
+
+def is_silent(
+    path: Path,
+    *,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    window_seconds: float = SILENCE_WINDOW_SECONDS,
+    sample_rate: int = SAMPLE_RATE,
+) -> bool | None:
+    """Return whether every window of the decoded audio stays below threshold.
+
+    PCM is streamed from ffmpeg in blocks and the RMS of each window is computed
+    with numpy; decoding stops at the first audible window, so ordinary
+    recordings cost a single block. ``None`` means the scan could not
+    run (no numpy or ffmpeg, or a decode error).
+    """
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+    except Exception:
+        return None
+    threshold = 10 ** (threshold_db / 20)
+    window = max(int(sample_rate * window_seconds), 1)
+    block_bytes = window * SILENCE_BLOCK_WINDOWS * 2
+    command = ["ffmpeg", "-nostdin", "-v", "error", "-i", str(path)]
+    command += ["-map", "0:a:0", "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le"]
+    command += ["-ar", str(sample_rate), "-"]
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    audible = False
+    try:
+        # Reads return whole blocks until EOF, so windows never straddle them.
+        while not audible:
+            chunk = process.stdout.read(block_bytes)
+            if not chunk:
+                break
+            usable = len(chunk) // 2 * 2
+            samples = np.frombuffer(chunk[:usable], np.int16).astype(np.float32)
+            audible = _loudest_window_rms(samples / 32768.0, window) > threshold
+    finally:
+        if audible:
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+    if audible:
+        return False
+    if returncode != 0:
+        return None
+    return True
+
+
+def _loudest_window_rms(samples, window: int) -> float:  # type: ignore[no-untyped-def]
+    import numpy as np  # type: ignore[import-not-found]
+
+    full = samples.size // window * window
+    loudest = 0.0
+    if full:
+        frames = samples[:full].reshape(-1, window)
+        loudest = float(np.sqrt(np.mean(frames * frames, axis=1)).max())
+    tail = samples[full:]
+    if tail.size:
+        loudest = max(loudest, float(np.sqrt(np.mean(tail * tail))))
+    return loudest
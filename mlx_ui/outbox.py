@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Mapping
+
+from mlx_ui.db import (
+    OutboxEntry,
+    claim_due_outbox_entry,
+    defer_outbox_channel,
+    delete_outbox_entry,
+    fail_outbox_entry,
+    recover_outbox_entries,
+    retry_outbox_entry,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BACKOFF_BASE = 2.0
+DEFAULT_BACKOFF_CAP = 300.0
+
+OutboxHandler = Callable[[dict[str, object]], None]
+
+_sender_lock = threading.Lock()
+_sender_instance: OutboxSender | None = None
+
+
+class DeliveryError(Exception):
+    def __init__(
+        self,
+        message: str,
+        *,
+        retry_after: float | None = None,
+        retryable: bool = True,
+        channel_wide: bool = True,
+    ) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.retryable = retryable
+        # Whether ``retry_after`` holds back every entry on the channel.
+        self.channel_wide = channel_wide
+
+
+def compute_backoff(
+    attempt: int,
+    base: float = DEFAULT_BACKOFF_BASE,
+    cap: float = DEFAULT_BACKOFF_CAP,
+) -> float:
+    return min(cap, base * (2 ** max(attempt - 1, 0)))
+
+
+class OutboxSender:
+    def __init__(
+        self,
+        db_path: Path,
+        handlers: Mapping[str, OutboxHandler],
+        poll_interval: float = 0.5,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.handlers = dict(handlers)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        recovered = recover_outbox_entries(self.db_path)
+        if recovered:
+            logger.info("Requeued %s interrupted outbox delivery(ies).", recovered)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="mlx-ui-outbox",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:
+                logger.exception("Outbox sender iteration failed")
+                processed = False
+            if not processed:
+                self._stop_event.wait(self.poll_interval)
+
+    def run_once(self) -> bool:
+        entry = claim_due_outbox_entry(
+            self.db_path,
+            self.clock(),
+            channels=list(self.handlers),
+        )
+        if entry is None:
+            return False
+        handler = self.handlers[entry.channel]
+        payload: dict[str, object] | None = None
+        try:
+            decoded = json.loads(entry.payload)
+            if not isinstance(decoded, dict):
+                raise DeliveryError("Outbox payload is not an object", retryable=False)
+            payload = decoded
+            handler(payload)
+        except json.JSONDecodeError:
+            self._handle_failure(
+                entry,
+                DeliveryError("Outbox payload is not valid JSON", retryable=False),
+                payload,
+            )
+            return True
+        except DeliveryError as exc:
+            self._handle_failure(entry, exc, payload)
+            return True
+        except Exception as exc:
+            logger.exception("Outbox handler crashed for entry %s", entry.id)
+            self._handle_failure(entry, DeliveryError(exc.__class__.__name__), payload)
+            return True
+        delete_outbox_entry(self.db_path, entry.id)
+        return True
+
+    def _handle_failure(
+        self,
+        entry: OutboxEntry,
+        error: DeliveryError,
+        payload: dict[str, object] | None,
+    ) -> None:
+        attempts = entry.attempts + 1
+        message = str(error) or error.__class__.__name__
+        if not error.retryable or attempts >= self.max_attempts:
+            fail_outbox_entry(self.db_path, entry.id, message)
+            logger.warning(
+                "Outbox delivery %s (%s, job %s) gave up after %s attempt(s): %s",
+                entry.id,
+                entry.channel,
+                entry.job_id,
+                attempts,
+                message,
+            )
+            return
+        if error.retry_after is not None:
+            delay = max(float(error.retry_after), 0.0)
+        else:
+            delay = compute_backoff(attempts)
+        available_at = self.clock() + delay
+        # Handlers may record progress in the payload (e.g. which parts of a
+        # multi-step delivery already went out); keep it for the next attempt.
+        retry_outbox_entry(
+            self.db_path,
+            entry.id,
+            available_at=available_at,
+            error_message=message,
+            payload=payload,
+        )
+        if error.retry_after is not None and error.channel_wide:
+            # Rate limits apply to the whole channel, not just this entry.
+            defer_outbox_channel(self.db_path, entry.channel, available_at)
+        logger.info(
+            "Outbox delivery %s (%s, job %s) failed, retrying in %.1fs: %s",
+            entry.id,
+            entry.channel,
+            entry.job_id,
+            delay,
+            message,
+        )
+
+
+def start_outbox_sender(
+    db_path: Path,
+    handlers: Mapping[str, OutboxHandler],
+    poll_interval: float = 0.5,
+) -> OutboxSender:
+    global _sender_instance
+    with _sender_lock:
+        if _sender_instance and _sender_instance.is_running():
+            return _sender_instance
+        _sender_instance = OutboxSender(
+            db_path=db_path,
+            handlers=handlers,
+            poll_interval=poll_interval,
+        )
+        _sender_instance.start()
+        return _sender_instance
+
+
+def stop_outbox_sender(timeout: float | None = None) -> None:
+    global _sender_instance
+    with _sender_lock:
+        if not _sender_instance:
+            return
+        _sender_instance.stop(timeout=timeout)
+        _sender_instance = None
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Callable
+
+from mlx_ui.compression import find_result, list_result_names
+from mlx_ui.db import (
+    RetentionCandidate,
+    delete_history_jobs,
+    list_retention_candidates,
+    retention_usage,
+)
+from mlx_ui.layout import resolve_job_dir
+from mlx_ui.manifest import record_results
+from mlx_ui.trash import discard_job_dir, get_deletion_manager
+from mlx_ui.uploads import cleanup_upload_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JANITOR_INTERVAL = 600.0
+DEFAULT_JANITOR_BATCH = 200
+TRANSCRIPT_SUFFIX = ".txt"
+
+_janitor_lock = threading.Lock()
+_janitor_instance: RetentionJanitor | None = None
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How much finished work to keep; ``0`` disables a limit."""
+
+    max_age_days: int = 0
+    max_results_bytes: int = 0
+    max_history: int = 0
+    # Over the byte quota, drop every format but the .txt transcript before
+    # removing whole jobs.
+    keep_transcripts: bool = True
+
+
+@dataclass
+class RetentionReport:
+    expired: int = 0
+    over_history: int = 0
+    trimmed: int = 0
+    evicted: int = 0
+    freed_bytes: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.expired or self.over_history or self.trimmed or self.evicted)
+
+
+class RetentionJanitor:
+    """Applies the retention policy to finished jobs every ``interval`` seconds.
+
+    Jobs past ``max_age_days`` go first, then the oldest jobs beyond
+    ``max_history``. While the results are over ``max_results_bytes``, the
+    least recently downloaded jobs are trimmed to their transcript and then
+    removed. Sizes come from ``jobs.results_bytes``, kept with the result
+    manifest, so a pass never walks the results directory.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        results_dir: Path,
+        uploads_dir: Path,
+        policy: Callable[[], RetentionPolicy],
+        interval: float = DEFAULT_JANITOR_INTERVAL,
+        batch_size: int = DEFAULT_JANITOR_BATCH,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.results_dir = Path(results_dir)
+        self.uploads_dir = Path(uploads_dir)
+        self.policy = policy
+        self.interval = interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="mlx-ui-retention-janitor",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                report = self.run_once()
+                if report.changed:
+                    logger.info(
+                        "Retention removed %s expired and %s surplus job(s), "
+                        "trimmed %s and evicted %s for space (%s bytes freed)",
+                        report.expired,
+                        report.over_history,
+                        report.trimmed,
+                        report.evicted,
+                        report.freed_bytes,
+                    )
+            except Exception:
+                logger.exception("Retention pass failed")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self) -> RetentionReport:
+        policy = self.policy()
+        report = RetentionReport()
+        if policy.max_age_days:
+            cutoff = datetime.fromtimestamp(
+                self.clock() - policy.max_age_days * 86400, tz=timezone.utc
+            ).isoformat(timespec="seconds")
+            while not self._stop_event.is_set():
+                jobs = list_retention_candidates(
+                    self.db_path,
+                    self.batch_size,
+                    completed_before=cutoff,
+                    oldest_first=True,
+                )
+                removed = self._remove_jobs(jobs, report)
+                report.expired += removed
+                if not removed:
+                    break
+        if policy.max_history:
+            while not self._stop_event.is_set():
+                count, _ = retention_usage(self.db_path)
+                excess = count - policy.max_history
+                if excess <= 0:
+                    break
+                jobs = list_retention_candidates(
+                    self.db_path, min(excess, self.batch_size), oldest_first=True
+                )
+                removed = self._remove_jobs(jobs, report)
+                report.over_history += removed
+                if not removed:
+                    break
+        if policy.max_results_bytes:
+            self._enforce_quota(policy, report)
+        return report
+
+    def _enforce_quota(self, policy: RetentionPolicy, report: RetentionReport) -> None:
+        _, used = retention_usage(self.db_path)
+        if policy.keep_transcripts:
+            while used > policy.max_results_bytes and not self._stop_event.is_set():
+                jobs = list_retention_candidates(
+                    self.db_path, self.batch_size, heavy_only=True
+                )
+                freed_in_batch = 0
+                for job in jobs:
+                    freed = self._trim(job)
+                    if freed:
+                        report.trimmed += 1
+                    report.freed_bytes += freed
+                    freed_in_batch += freed
+                    used -= freed
+                    if used <= policy.max_results_bytes:
+                        break
+                if not freed_in_batch:
+                    break
+        while used > policy.max_results_bytes and not self._stop_event.is_set():
+            jobs = list_retention_candidates(
+                self.db_path, self.batch_size, with_results=True
+            )
+            selected = []
+            planned = used
+            for job in jobs:
+                if planned <= policy.max_results_bytes:
+                    break
+                selected.append(job)
+                planned -= job.results_bytes
+            before = report.freed_bytes
+            removed = self._remove_jobs(selected, report)
+            report.evicted += removed
+            used -= report.freed_bytes - before
+            if not removed:
+                break
+
+    def _trim(self, job: RetentionCandidate) -> int:
+        """Delete every result of ``job`` but its transcripts; returns bytes freed."""
+        job_dir = resolve_job_dir(self.results_dir, job.id)
+        for name in list_result_names(job_dir):
+            if name.endswith(TRANSCRIPT_SUFFIX):
+                continue
+            path = find_result(job_dir, name)
+            if path is None:
+                continue
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as exc:
+                logger.warning("Failed to trim %s: %s", path, exc)
+        files = record_results(self.db_path, self.results_dir, job.id, clock=self.clock)
+        return max(job.results_bytes - sum(entry.size for entry in files), 0)
+
+    def _remove_jobs(
+        self, jobs: list[RetentionCandidate], report: RetentionReport
+    ) -> int:
+        manager = get_deletion_manager()
+        removable = []
+        for job in jobs:
+            if discard_job_dir(manager, self.results_dir, job.id) == "failed":
+                continue
+            cleanup_upload_path(job.upload_path, self.uploads_dir, job.id)
+            removable.append(job)
+        removed = delete_history_jobs(self.db_path, [job.id for job in removable])
+        report.freed_bytes += sum(job.results_bytes for job in removable)
+        return removed
+
+
+def start_retention_janitor(
+    db_path: Path,
+    results_dir: Path,
+    uploads_dir: Path,
+    policy: Callable[[], RetentionPolicy],
+    interval: float = DEFAULT_JANITOR_INTERVAL,
+) -> RetentionJanitor:
+    global _janitor_instance
+    with _janitor_lock:
+        if _janitor_instance and _janitor_instance.is_running():
+            return _janitor_instance
+        _janitor_instance = RetentionJanitor(
+            db_path=db_path,
+            results_dir=results_dir,
+            uploads_dir=uploads_dir,
+            policy=policy,
+            interval=interval,
+        )
+        _janitor_instance.start()
+        return _janitor_instance
+
+
+def stop_retention_janitor(timeout: float | None = None) -> None:
+    global _janitor_instance
+    with _janitor_lock:
+        if not _janitor_instance:
+            return
+        _janitor_instance.stop(timeout=timeout)
+        _janitor_instance = None
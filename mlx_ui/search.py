@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import html
+import logging
+from pathlib import Path
+import re
+import zlib
+
+from mlx_ui.compression import find_result, open_text
+from mlx_ui.db import (
+    JobRecord,
+    SearchHit,
+    index_transcript,
+    list_unindexed_jobs,
+    search_transcripts,
+)
+from mlx_ui.formatters import result_filename
+from mlx_ui.layout import resolve_job_dir
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 200
+MAX_QUERY_TERMS = 16
+# Control characters cannot appear in transcripts, so they survive escaping.
+HIGHLIGHT_OPEN = "\x02"
+HIGHLIGHT_CLOSE = "\x03"
+QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn a search box entry into an FTS5 expression.
+
+    Every word must match; ``"quoted words"`` match as a phrase and a trailing
+    ``*`` matches prefixes. FTS5 operators are treated as plain words, so no
+    input can produce a syntax error.
+    """
+    terms = []
+    for phrase, word in QUERY_TERM.findall(query):
+        text = phrase or word
+        prefix = bool(word) and text.endswith("*")
+        text = text.rstrip("*").replace('"', "").strip()
+        if not text:
+            continue
+        terms.append(f'"{text}"' + ("*" if prefix else ""))
+        if len(terms) == MAX_QUERY_TERMS:
+            break
+    return " ".join(terms) or None
+
+
+def search(
+    db_path: Path, query: str, *, limit: int, offset: int = 0
+) -> tuple[int, list[SearchHit]]:
+    match = build_match_query(query)
+    if match is None:
+        return 0, []
+    total, hits = search_transcripts(
+        db_path,
+        match,
+        limit=limit,
+        offset=offset,
+        highlight=(HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE),
+    )
+    return total, [
+        SearchHit(
+            job_id=hit.job_id,
+            filename=hit.filename,
+            completed_at=hit.completed_at,
+            snippet=render_snippet(hit.snippet),
+            rank=hit.rank,
+        )
+        for hit in hits
+    ]
+
+
+def render_snippet(snippet: str) -> str:
+    """Escape a snippet for HTML and turn highlight markers into ``<mark>``."""
+    return (
+        html.escape(snippet)
+        .replace(HIGHLIGHT_OPEN, "<mark>")
+        .replace(HIGHLIGHT_CLOSE, "</mark>")
+    )
+
+
+def index_job_transcript(db_path: Path, results_dir: Path, job: JobRecord) -> bool:
+    job_dir = resolve_job_dir(results_dir, job.id)
+    path = find_result(job_dir, result_filename(job.filename))
+    text = ""
+    if path is not None:
+        try:
+            with open_text(path) as handle:
+                text = handle.read()
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, zlib.error) as exc:
+            # Indexed as empty, so the backfill moves past it next time.
+            logger.warning("Indexing %s without its unreadable text: %s", path, exc)
+    return index_transcript(db_path, job.id, job.filename, text)
+
+
+def index_missing_transcripts(
+    db_path: Path, results_dir: Path, batch_size: int = BACKFILL_BATCH_SIZE
+) -> int:
+    """Index finished jobs from before search existed; returns how many."""
+    indexed = 0
+    while True:
+        jobs = list_unindexed_jobs(db_path, batch_size)
+        if not jobs:
+            break
+        for job in jobs:
+            if not index_job_transcript(db_path, results_dir, job):
+                return indexed
+            indexed += 1
+    if indexed:
+        logger.info("Indexed %s earlier transcript(s) for search", indexed)
+    return indexed
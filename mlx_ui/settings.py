@@ -1,27 +1,35 @@
 from __future__ import annotations
 
+from dataclasses import asdict, dataclass
 import json
 import os
 from datetime import datetime, timezone
 from pathlib import Path
+import re
 import threading
 from typing import Mapping
 
-from mlx_ui.telegram import mask_secret
+from mlx_ui.admission import AdmissionLimits
+from mlx_ui.formatters import OUTPUT_FORMATS
+from mlx_ui.retention import RetentionPolicy
 from mlx_ui.update_check import (
     DISABLE_UPDATE_CHECK_ENV,
     is_update_check_disabled,
     read_local_version,
 )
 from mlx_ui.transcriber import (
+    AUTO_LANGUAGE,
     BACKEND_ENV,
     DEFAULT_BACKEND,
     DEFAULT_WHISPER_MODEL,
     WHISPER_CACHE_DIR_ENV,
+    WHISPER_LANGUAGE_MODELS_ENV,
     WHISPER_MODEL_ENV,
     FakeTranscriber,
+    Transcriber,
     WhisperTranscriber,
     WtmTranscriber,
+    parse_language_models,
 )
 
 DEFAULT_SETTINGS: dict[str, object] = {
@@ -30,14 +38,43 @@ DEFAULT_SETTINGS: dict[str, object] = {
     "wtm_quick": False,
     "output_formats": ["txt"],
     "whisper_model": DEFAULT_WHISPER_MODEL,
+    "whisper_language_models": {},
 }
 
 ALLOWED_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
-ALLOWED_OUTPUT_FORMATS = ("txt", "srt", "vtt", "json")
+ALLOWED_OUTPUT_FORMATS = OUTPUT_FORMATS
+
+JOB_MODEL_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+JOB_LANGUAGE_PATTERN = re.compile(r"^[a-z]{2,3}$")
+
+TELEGRAM_DIGEST_WINDOW_ENV = "TELEGRAM_DIGEST_WINDOW"
+TELEGRAM_DIGEST_MAX_ITEMS_ENV = "TELEGRAM_DIGEST_MAX_ITEMS"
+ADMISSION_ENV_VARS = {
+    "max_queued_jobs": "MAX_QUEUED_JOBS",
+    "max_queued_bytes": "MAX_QUEUED_BYTES",
+    "min_free_bytes": "MIN_FREE_DISK_BYTES",
+}
+RETENTION_ENV_VARS = {
+    "retention_max_age_days": "RETENTION_MAX_AGE_DAYS",
+    "retention_max_results_bytes": "RETENTION_MAX_RESULTS_BYTES",
+    "retention_max_history": "RETENTION_MAX_HISTORY",
+}
+RETENTION_KEEP_TRANSCRIPTS_ENV = "RETENTION_KEEP_TRANSCRIPTS"
+DEFAULT_DIGEST_WINDOW = 0
+DEFAULT_DIGEST_MAX_ITEMS = 50
 
 _SETTINGS_LOCK = threading.Lock()
 
 
+@dataclass(frozen=True)
+class _CachedSettings:
+    signature: tuple[int, int, int] | None
+    values: dict[str, object]
+
+
+_SETTINGS_CACHE: dict[Path, _CachedSettings] = {}
+
+
 def get_settings_path(base_dir: Path | None = None) -> Path:
     if base_dir is None:
         base_dir = Path(__file__).resolve().parent.parent
@@ -53,6 +90,42 @@ def read_settings_file(path: Path) -> dict[str, object]:
         return {}
     if not isinstance(payload, dict):
         return {}
+    return parse_settings_payload(payload)
+
+
+def read_cached_settings(base_dir: Path | None = None) -> dict[str, object]:
+    """Return the parsed settings file, re-reading it only when it changed.
+
+    The file is identified by inode, mtime and size, so both in-place edits and
+    atomic replacements are picked up. Callers get a copy they may modify.
+    """
+    path = get_settings_path(base_dir)
+    signature = _settings_signature(path)
+    cached = _SETTINGS_CACHE.get(path)
+    if cached is None or cached.signature != signature:
+        values = read_settings_file(path)
+        cached = _CachedSettings(signature=signature, values=values)
+        with _SETTINGS_LOCK:
+            _SETTINGS_CACHE[path] = cached
+    return _copy_settings(cached.values)
+
+
+def _settings_signature(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _copy_settings(values: dict[str, object]) -> dict[str, object]:
+    return {
+        key: value.copy() if isinstance(value, (list, dict)) else value
+        for key, value in values.items()
+    }
+
+
+def parse_settings_payload(payload: dict[str, object]) -> dict[str, object]:
     parsed: dict[str, object] = {}
     update_check = payload.get("update_check_enabled")
     if isinstance(update_check, bool):
@@ -73,6 +146,11 @@ def read_settings_file(path: Path) -> dict[str, object]:
         cleaned = whisper_model.strip()
         if cleaned:
             parsed["whisper_model"] = cleaned
+    language_models = payload.get("whisper_language_models")
+    if language_models is not None:
+        normalized_rules = normalize_language_models(language_models)
+        if normalized_rules is not None:
+            parsed["whisper_language_models"] = normalized_rules
     telegram_token = payload.get("telegram_token")
     if isinstance(telegram_token, str):
         cleaned = telegram_token.strip()
@@ -83,9 +161,27 @@ def read_settings_file(path: Path) -> dict[str, object]:
         cleaned = telegram_chat_id.strip()
         if cleaned:
             parsed["telegram_chat_id"] = cleaned
+    digest_window = payload.get("telegram_digest_window")
+    if _is_number(digest_window) and digest_window >= 0:
+        parsed["telegram_digest_window"] = digest_window
+    digest_max_items = payload.get("telegram_digest_max_items")
+    if isinstance(digest_max_items, int) and not isinstance(digest_max_items, bool):
+        if digest_max_items >= 1:
+            parsed["telegram_digest_max_items"] = digest_max_items
+    for key in (*ADMISSION_ENV_VARS, *RETENTION_ENV_VARS):
+        limit = payload.get(key)
+        if isinstance(limit, int) and not isinstance(limit, bool) and limit >= 0:
+            parsed[key] = limit
+    keep_transcripts = payload.get("retention_keep_transcripts")
+    if isinstance(keep_transcripts, bool):
+        parsed["retention_keep_transcripts"] = keep_transcripts
     return parsed
 
 
+def _is_number(value: object) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
 def normalize_log_level(value: str | None) -> str:
     if not value:
         return DEFAULT_SETTINGS["log_level"]
@@ -109,6 +205,26 @@ def normalize_output_formats(value: object) -> list[str] | None:
     return [fmt for fmt in ALLOWED_OUTPUT_FORMATS if fmt in seen]
 
 
+def normalize_language_models(value: object) -> dict[str, str] | None:
+    """Validate language routing rules given as a mapping or ``"en=small.en"``."""
+    if isinstance(value, str):
+        value = parse_language_models(value)
+    if not isinstance(value, dict):
+        return None
+    rules: dict[str, str] = {}
+    for language, model_name in value.items():
+        if not isinstance(language, str) or not isinstance(model_name, str):
+            return None
+        language = language.strip().lower()
+        model_name = model_name.strip()
+        if not JOB_LANGUAGE_PATTERN.match(language):
+            return None
+        if not JOB_MODEL_PATTERN.match(model_name):
+            return None
+        rules[language] = model_name
+    return rules
+
+
 def parse_bool(value: str | None) -> bool | None:
     if value is None:
         return None
@@ -126,8 +242,7 @@ def compute_effective_settings(
 ) -> tuple[dict[str, object], dict[str, str], dict[str, object]]:
     if env is None:
         env = os.environ
-    path = get_settings_path(base_dir)
-    file_settings = read_settings_file(path)
+    file_settings = read_cached_settings(base_dir)
     effective: dict[str, object] = {}
     sources: dict[str, str] = {}
 
@@ -185,6 +300,21 @@ def compute_effective_settings(
         effective["whisper_model"] = DEFAULT_SETTINGS["whisper_model"]
         sources["whisper_model"] = "default"
 
+    rules_env = env.get(WHISPER_LANGUAGE_MODELS_ENV)
+    if rules_env is not None and rules_env.strip() != "":
+        effective["whisper_language_models"] = (
+            normalize_language_models(rules_env) or {}
+        )
+        sources["whisper_language_models"] = "env"
+    elif "whisper_language_models" in file_settings:
+        effective["whisper_language_models"] = dict(
+            file_settings["whisper_language_models"]
+        )
+        sources["whisper_language_models"] = "file"
+    else:
+        effective["whisper_language_models"] = {}
+        sources["whisper_language_models"] = "default"
+
     return effective, sources, file_settings
 
 
@@ -205,6 +335,10 @@ def update_settings_file(
         current = read_settings_file(path)
         current.update(updates)
         write_settings_file(path, current)
+        _SETTINGS_CACHE[path] = _CachedSettings(
+            signature=_settings_signature(path),
+            values=parse_settings_payload(current),
+        )
         return current
 
 
@@ -255,6 +389,15 @@ def validate_settings_payload(payload: object) -> tuple[dict[str, object], list[
         else:
             errors.append("whisper_model must be a string")
 
+    if "whisper_language_models" in payload:
+        normalized_rules = normalize_language_models(payload["whisper_language_models"])
+        if normalized_rules is None:
+            errors.append(
+                "whisper_language_models must map language codes to model names"
+            )
+        else:
+            updates["whisper_language_models"] = normalized_rules
+
     if "telegram_token" in payload:
         value = payload["telegram_token"]
         if isinstance(value, str):
@@ -269,15 +412,101 @@ def validate_settings_payload(payload: object) -> tuple[dict[str, object], list[
         else:
             errors.append("telegram_chat_id must be a string")
 
+    if "telegram_digest_window" in payload:
+        value = payload["telegram_digest_window"]
+        if _is_number(value) and value >= 0:
+            updates["telegram_digest_window"] = value
+        else:
+            errors.append("telegram_digest_window must be a non-negative number")
+
+    if "telegram_digest_max_items" in payload:
+        value = payload["telegram_digest_max_items"]
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 1:
+            updates["telegram_digest_max_items"] = value
+        else:
+            errors.append("telegram_digest_max_items must be a positive integer")
+
+    for key in (*ADMISSION_ENV_VARS, *RETENTION_ENV_VARS):
+        if key not in payload:
+            continue
+        value = payload[key]
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            updates[key] = value
+        else:
+            errors.append(f"{key} must be a non-negative integer (0 disables it)")
+
+    if "retention_keep_transcripts" in payload:
+        value = payload["retention_keep_transcripts"]
+        if isinstance(value, bool):
+            updates["retention_keep_transcripts"] = value
+        else:
+            errors.append("retention_keep_transcripts must be a boolean")
+
     return updates, errors
 
 
+def validate_job_options(
+    payload: Mapping[str, object],
+) -> tuple[dict[str, object], list[str]]:
+    """Validate per-job overrides of the global transcription settings.
+
+    Blank values mean "use the settings"; the result maps ``JobRecord`` fields
+    to their overrides.
+    """
+    options: dict[str, object] = {}
+    errors: list[str] = []
+
+    model = payload.get("model")
+    if isinstance(model, str) and model.strip():
+        candidate = model.strip()
+        if JOB_MODEL_PATTERN.match(candidate):
+            options["model"] = candidate
+        else:
+            errors.append("model must be a Whisper model name")
+    elif model is not None and not isinstance(model, str):
+        errors.append("model must be a string")
+
+    quick = payload.get("quick")
+    if isinstance(quick, bool):
+        options["quick"] = quick
+    elif isinstance(quick, str) and quick.strip():
+        parsed_quick = parse_bool(quick)
+        if parsed_quick is None:
+            errors.append("quick must be a boolean")
+        else:
+            options["quick"] = parsed_quick
+    elif quick is not None and not isinstance(quick, str):
+        errors.append("quick must be a boolean")
+
+    language = payload.get("language")
+    if isinstance(language, str) and language.strip():
+        candidate = language.strip().lower()
+        if candidate == AUTO_LANGUAGE or JOB_LANGUAGE_PATTERN.match(candidate):
+            options["language"] = candidate
+        else:
+            errors.append("language must be 'any' or an ISO 639 language code")
+    elif language is not None and not isinstance(language, str):
+        errors.append("language must be a string")
+
+    output_formats = payload.get("output_formats")
+    if isinstance(output_formats, str):
+        output_formats = [item for item in output_formats.split(",") if item.strip()]
+    if output_formats:
+        normalized_formats = normalize_output_formats(output_formats)
+        if normalized_formats is None:
+            errors.append("output_formats must be a list of strings")
+        else:
+            options["output_formats"] = normalized_formats
+
+    return options, errors
+
+
 def build_settings_snapshot(
     base_dir: Path | None = None,
     env: Mapping[str, str] | None = None,
 ) -> dict[str, object]:
     path = get_settings_path(base_dir)
-    effective, sources, _file_settings = compute_effective_settings(
+    effective, sources, file_settings = compute_effective_settings(
         base_dir=base_dir,
         env=env,
     )
@@ -299,8 +528,18 @@ def build_settings_snapshot(
                 "log_level": "LOG_LEVEL",
                 "wtm_quick": "WTM_QUICK",
                 "whisper_model": WHISPER_MODEL_ENV,
+                "whisper_language_models": WHISPER_LANGUAGE_MODELS_ENV,
+                **ADMISSION_ENV_VARS,
+                **RETENTION_ENV_VARS,
+                "retention_keep_transcripts": RETENTION_KEEP_TRANSCRIPTS_ENV,
             }
         },
+        "admission": {
+            "limits": asdict(resolve_admission_limits(file_settings, env)),
+        },
+        "retention": {
+            "policy": asdict(resolve_retention_policy(file_settings, env)),
+        },
     }
 
 
@@ -310,8 +549,7 @@ def build_telegram_snapshot(
 ) -> dict[str, object]:
     if env is None:
         env = os.environ
-    path = get_settings_path(base_dir)
-    file_settings = read_settings_file(path)
+    file_settings = read_cached_settings(base_dir)
     token_env = env.get("TELEGRAM_BOT_TOKEN", "").strip()
     chat_env = env.get("TELEGRAM_CHAT_ID", "").strip()
     token_file = str(file_settings.get("telegram_token", "")).strip()
@@ -333,6 +571,8 @@ def build_telegram_snapshot(
         chat_id = chat_env or chat_file
         configured = False
 
+    digest_window, digest_max_items = resolve_telegram_digest(file_settings, env)
+
     return {
         "configured": configured,
         "source": source,
@@ -346,9 +586,114 @@ def build_telegram_snapshot(
             "token": bool(token_file),
             "chat_id": bool(chat_file),
         },
+        "digest": {
+            "enabled": digest_window > 0,
+            "window": digest_window,
+            "max_items": digest_max_items,
+            "env_vars": {
+                "window": TELEGRAM_DIGEST_WINDOW_ENV,
+                "max_items": TELEGRAM_DIGEST_MAX_ITEMS_ENV,
+            },
+        },
     }
 
 
+def resolve_telegram_digest(
+    file_settings: Mapping[str, object],
+    env: Mapping[str, str] | None = None,
+) -> tuple[float, int]:
+    if env is None:
+        env = os.environ
+    window: float = DEFAULT_DIGEST_WINDOW
+    window_env = env.get(TELEGRAM_DIGEST_WINDOW_ENV, "").strip()
+    if window_env:
+        try:
+            parsed_window = float(window_env)
+        except ValueError:
+            parsed_window = -1
+        if parsed_window >= 0:
+            window = parsed_window
+    elif _is_number(file_settings.get("telegram_digest_window")):
+        window = float(file_settings["telegram_digest_window"])
+    if float(window).is_integer():
+        window = int(window)
+
+    max_items = DEFAULT_DIGEST_MAX_ITEMS
+    max_items_env = env.get(TELEGRAM_DIGEST_MAX_ITEMS_ENV, "").strip()
+    if max_items_env:
+        try:
+            parsed_max = int(max_items_env)
+        except ValueError:
+            parsed_max = 0
+        if parsed_max >= 1:
+            max_items = parsed_max
+    elif _is_number(file_settings.get("telegram_digest_max_items")):
+        max_items = int(file_settings["telegram_digest_max_items"])
+    return window, max_items
+
+
+def resolve_admission_limits(
+    file_settings: Mapping[str, object],
+    env: Mapping[str, str] | None = None,
+) -> AdmissionLimits:
+    if env is None:
+        env = os.environ
+    defaults = AdmissionLimits()
+    values: dict[str, int] = {}
+    for key, env_name in ADMISSION_ENV_VARS.items():
+        value = getattr(defaults, key)
+        env_value = env.get(env_name, "").strip()
+        if env_value:
+            try:
+                parsed = int(env_value)
+            except ValueError:
+                parsed = -1
+            if parsed >= 0:
+                value = parsed
+        elif _is_number(file_settings.get(key)) and file_settings[key] >= 0:
+            value = int(file_settings[key])
+        values[key] = value
+    return AdmissionLimits(**values)
+
+
+def resolve_retention_policy(
+    file_settings: Mapping[str, object],
+    env: Mapping[str, str] | None = None,
+) -> RetentionPolicy:
+    if env is None:
+        env = os.environ
+    defaults = RetentionPolicy()
+    values: dict[str, object] = {}
+    for key, env_name in RETENTION_ENV_VARS.items():
+        field_name = key.removeprefix("retention_")
+        value = getattr(defaults, field_name)
+        env_value = env.get(env_name, "").strip()
+        if env_value:
+            try:
+                parsed = int(env_value)
+            except ValueError:
+                parsed = -1
+            if parsed >= 0:
+                value = parsed
+        elif _is_number(file_settings.get(key)) and file_settings[key] >= 0:
+            value = int(file_settings[key])
+        values[field_name] = value
+    keep_env = parse_bool(env.get(RETENTION_KEEP_TRANSCRIPTS_ENV))
+    if keep_env is not None:
+        values["keep_transcripts"] = keep_env
+    elif isinstance(file_settings.get("retention_keep_transcripts"), bool):
+        values["keep_transcripts"] = file_settings["retention_keep_transcripts"]
+    return RetentionPolicy(**values)
+
+
+def mask_secret(value: str, visible: int = 4) -> str:
+    if not value:
+        return ""
+    if len(value) <= visible:
+        return "*" * len(value)
+    return f"{'*' * (len(value) - visible)}{value[-visible:]}"
+
+
 def list_downloaded_models(env: Mapping[str, str] | None = None) -> list[str]:
     if env is None:
         env = os.environ
@@ -461,10 +806,66 @@ def resolve_transcriber_with_settings(
         env=env,
     )
     backend = env.get(BACKEND_ENV, DEFAULT_BACKEND).strip().lower()
+    return _build_transcriber(backend, effective)
+
+
+def configure_transcriber_with_settings(
+    transcriber: Transcriber,
+    base_dir: Path | None = None,
+    env: Mapping[str, str] | None = None,
+) -> Transcriber:
+    """Apply current settings to ``transcriber``.
+
+    The instance is updated in place when it already serves the configured
+    backend, so a warm model survives the change; otherwise a new transcriber
+    is built.
+    """
+    if env is None:
+        env = os.environ
+    effective, _sources, _file_settings = compute_effective_settings(
+        base_dir=base_dir,
+        env=env,
+    )
+    backend = env.get(BACKEND_ENV, DEFAULT_BACKEND).strip().lower()
+    if backend in {"wtm", "mlx", "wtm-cli"} and isinstance(transcriber, WtmTranscriber):
+        transcriber.configure(quick=bool(effective["wtm_quick"]))
+        return transcriber
+    if backend in {"whisper", "openai-whisper", "openai"} and isinstance(
+        transcriber, WhisperTranscriber
+    ):
+        transcriber.configure(
+            model_name=str(effective["whisper_model"]),
+            language_models=effective["whisper_language_models"],
+        )
+        return transcriber
+    if backend in {"fake", "noop", "test"} and isinstance(transcriber, FakeTranscriber):
+        return transcriber
+    return _build_transcriber(backend, effective)
+
+
+class SettingsWatcher:
+    """Reports whether settings.json changed since the previous poll."""
+
+    def __init__(self, base_dir: Path | None = None) -> None:
+        self.path = get_settings_path(base_dir)
+        self._signature = _settings_signature(self.path)
+
+    def poll(self) -> bool:
+        signature = _settings_signature(self.path)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+
+def _build_transcriber(backend: str, effective: Mapping[str, object]) -> Transcriber:
     if backend in {"wtm", "mlx", "wtm-cli"}:
         return WtmTranscriber(quick=bool(effective["wtm_quick"]))
     if backend in {"whisper", "openai-whisper", "openai"}:
-        return WhisperTranscriber(model_name=str(effective["whisper_model"]))
+        return WhisperTranscriber(
+            model_name=str(effective["whisper_model"]),
+            language_models=effective["whisper_language_models"],
+        )
     if backend in {"fake", "noop", "test"}:
         return FakeTranscriber()
     raise ValueError(
@@ -1,68 +1,88 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
+from datetime import datetime, timezone
+import http.client
+import io
 import json
 import logging
 import mimetypes
 import os
 from pathlib import Path
+import shutil
+import ssl
+import tempfile
+import threading
+import time
+from typing import Callable, Iterable, Iterator
 import urllib.error
 import urllib.parse
 import urllib.request
 import uuid
-
-from mlx_ui.db import JobRecord
+import zipfile
+
+from mlx_ui.compression import (
+    CHUNK_SIZE,
+    decompress_to,
+    is_compressed,
+    locate,
+    logical_name,
+    open_binary,
+)
+from mlx_ui.db import JobRecord, append_outbox_batch, enqueue_outbox_entry
+from mlx_ui.layout import SHARD_LEVELS
+from mlx_ui.outbox import DeliveryError
+from mlx_ui.settings import (
+    DEFAULT_DIGEST_MAX_ITEMS,
+    DEFAULT_DIGEST_WINDOW,
+    mask_secret,
+    read_cached_settings,
+    resolve_telegram_digest,
+)
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 10.0
+MULTIPART_CHUNK_SIZE = 64 * 1024
+DEFAULT_API_URL = "https://api.telegram.org"
+TELEGRAM_API_URL_ENV = "TELEGRAM_API_URL"
+MAX_MESSAGE_LENGTH = 4096
+OUTBOX_CHANNEL = "telegram"
+DIGEST_BATCH_KEY = "digest"
 
 
 @dataclass(frozen=True)
 class TelegramConfig:
     token: str
     chat_id: str
+    api_url: str = DEFAULT_API_URL
+    digest_window: float = DEFAULT_DIGEST_WINDOW
+    digest_max_items: int = DEFAULT_DIGEST_MAX_ITEMS
+
+    @property
+    def digest_enabled(self) -> bool:
+        return self.digest_window > 0
 
 
 def read_telegram_config(base_dir: Path | None = None) -> TelegramConfig | None:
+    api_url = os.getenv(TELEGRAM_API_URL_ENV, "").strip().rstrip("/")
+    api_url = api_url or DEFAULT_API_URL
+    file_settings = read_cached_settings(base_dir)
     token = os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
     chat_id = os.getenv("TELEGRAM_CHAT_ID", "").strip()
-    if token and chat_id:
-        return TelegramConfig(token=token, chat_id=chat_id)
-
-    token_file, chat_id_file = _read_telegram_settings_file(base_dir)
-    if token_file and chat_id_file:
-        return TelegramConfig(token=token_file, chat_id=chat_id_file)
-    return None
-
-
-def _read_telegram_settings_file(base_dir: Path | None = None) -> tuple[str, str]:
-    if base_dir is None:
-        base_dir = Path(__file__).resolve().parent.parent
-    settings_path = Path(base_dir) / "data" / "settings.json"
-    if not settings_path.is_file():
-        return "", ""
-    try:
-        payload = json.loads(settings_path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
-        return "", ""
-    if not isinstance(payload, dict):
-        return "", ""
-    token = payload.get("telegram_token")
-    chat_id = payload.get("telegram_chat_id")
-    if not isinstance(token, str) or not isinstance(chat_id, str):
-        return "", ""
-    token = token.strip()
-    chat_id = chat_id.strip()
-    if not token or not chat_id:
-        return "", ""
-    return token, chat_id
-
-
-def mask_secret(value: str, visible: int = 4) -> str:
-    if not value:
-        return ""
-    if len(value) <= visible:
-        return "*" * len(value)
-    return f"{'*' * (len(value) - visible)}{value[-visible:]}"
+    if not (token and chat_id):
+        token = str(file_settings.get("telegram_token", ""))
+        chat_id = str(file_settings.get("telegram_chat_id", ""))
+    if not (token and chat_id):
+        return None
+    digest_window, digest_max_items = resolve_telegram_digest(file_settings)
+    return TelegramConfig(
+        token=token,
+        chat_id=chat_id,
+        api_url=api_url,
+        digest_window=digest_window,
+        digest_max_items=digest_max_items,
+    )
 
 
 def maybe_send_telegram(
@@ -77,8 +97,8 @@ def maybe_send_telegram(
     if config is None:
         return
 
-    result_path = Path(result_path)
-    if not result_path.is_file():
+    stored_path = locate(Path(result_path))
+    if stored_path is None:
         logger.warning(
             "Telegram delivery skipped for job %s: missing result %s",
             job.id,
@@ -87,15 +107,10 @@ def maybe_send_telegram(
         return
 
     try:
-        send_telegram_message(
-            config,
-            text=f"Transcription complete: {job.filename}",
-            timeout=timeout,
-        )
         send_telegram_document(
             config,
-            result_path,
-            caption=f"Transcription complete: {job.filename}",
+            stored_path,
+            caption=_completion_text(job.filename),
             timeout=timeout,
         )
     except Exception as exc:
@@ -109,20 +124,171 @@ def maybe_send_telegram(
         )
 
 
+def enqueue_telegram_delivery(
+    db_path: Path,
+    job: JobRecord,
+    result_path: Path,
+    base_dir: Path | None = None,
+) -> bool:
+    if base_dir is None:
+        base_dir = _infer_base_dir_from_result(result_path)
+    config = read_telegram_config(base_dir)
+    if config is None:
+        return False
+    base_dir_value = str(base_dir) if base_dir is not None else None
+    now = time.time()
+    if config.digest_enabled:
+        append_outbox_batch(
+            db_path,
+            OUTBOX_CHANNEL,
+            DIGEST_BATCH_KEY,
+            {"job_id": job.id, "filename": job.filename, "path": str(result_path)},
+            payload={"method": "sendDigest", "base_dir": base_dir_value},
+            now=now,
+            window=config.digest_window,
+            max_items=config.digest_max_items,
+        )
+        return True
+    enqueue_outbox_entry(
+        db_path,
+        OUTBOX_CHANNEL,
+        {
+            "method": "sendDocument",
+            "path": str(result_path),
+            "caption": _completion_text(job.filename),
+            "base_dir": base_dir_value,
+        },
+        job_id=job.id,
+        available_at=now,
+    )
+    return True
+
+
+def deliver_telegram_payload(
+    payload: dict[str, object],
+    timeout: float = DEFAULT_TIMEOUT,
+) -> None:
+    base_dir_value = payload.get("base_dir")
+    base_dir = Path(base_dir_value) if isinstance(base_dir_value, str) else None
+    config = read_telegram_config(base_dir)
+    if config is None:
+        raise DeliveryError("Telegram is not configured", retryable=False)
+    method = payload.get("method")
+    try:
+        if method == "sendMessage":
+            send_telegram_message(config, str(payload.get("text", "")), timeout)
+        elif method == "sendDocument":
+            requested_path = Path(str(payload.get("path", "")))
+            file_path = locate(requested_path)
+            if file_path is None:
+                raise DeliveryError(
+                    f"missing result {requested_path.name}", retryable=False
+                )
+            caption = payload.get("caption")
+            send_telegram_document(
+                config,
+                file_path,
+                caption=str(caption) if caption else None,
+                timeout=timeout,
+            )
+        elif method == "sendDigest":
+            _deliver_digest(config, payload, timeout)
+        else:
+            raise DeliveryError(
+                f"unsupported Telegram method {method!r}", retryable=False
+            )
+    except urllib.error.HTTPError as exc:
+        raise DeliveryError(
+            _describe_telegram_error(exc, config),
+            retry_after=_retry_after_seconds(exc),
+            retryable=exc.code == 429 or exc.code >= 500,
+        ) from exc
+    except OSError as exc:
+        raise DeliveryError(_describe_telegram_error(exc, config)) from exc
+
+
+def _deliver_digest(
+    config: TelegramConfig,
+    payload: dict[str, object],
+    timeout: float,
+) -> None:
+    raw_items = payload.get("items")
+    if not isinstance(raw_items, list):
+        raise DeliveryError("digest payload has no items", retryable=False)
+    items = [item for item in raw_items if isinstance(item, dict)]
+    if not items:
+        return
+    if not payload.get("summary_sent"):
+        send_telegram_message(config, build_digest_summary(items), timeout)
+        # Recorded so a retry after a failed upload does not repeat the summary.
+        payload["summary_sent"] = True
+    files = [
+        (str(item.get("filename", "")), locate(Path(str(item.get("path", "")))))
+        for item in items
+    ]
+    files = [(name, path) for name, path in files if path is not None]
+    if not files:
+        return
+    with tempfile.TemporaryDirectory(prefix="mlx-ui-digest-") as tmp_dir:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        archive_path = Path(tmp_dir) / f"transcripts-{stamp}.zip"
+        write_digest_archive(archive_path, files)
+        send_telegram_document(
+            config,
+            archive_path,
+            caption=f"{len(files)} transcript(s)",
+            timeout=timeout,
+        )
+
+
+def build_digest_summary(items: list[dict[str, object]]) -> str:
+    header = f"Transcriptions complete: {len(items)}"
+    lines = [header]
+    length = len(header)
+    for index, item in enumerate(items):
+        line = f"• {item.get('filename', '')}"
+        remaining = len(items) - index
+        # Leave room for the "and N more" trailer.
+        if length + len(line) + 1 > MAX_MESSAGE_LENGTH - 32:
+            lines.append(f"… and {remaining} more")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def write_digest_archive(archive_path: Path, files: list[tuple[str, Path]]) -> None:
+    used: set[str] = set()
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for display_name, path in files:
+            plain = Path(logical_name(path.name))
+            stem = Path(display_name).stem.strip() or plain.stem
+            arcname = f"{stem}{plain.suffix}"
+            counter = 2
+            while arcname in used:
+                arcname = f"{stem} ({counter}){plain.suffix}"
+                counter += 1
+            used.add(arcname)
+            with open_binary(path) as source, zf.open(arcname, "w") as target:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+
+def _completion_text(filename: str) -> str:
+    return f"Transcription complete: {filename}"
+
+
 def send_telegram_message(
     config: TelegramConfig,
     text: str,
     timeout: float = DEFAULT_TIMEOUT,
+    client: TelegramClient | None = None,
 ) -> None:
-    payload = urllib.parse.urlencode({"chat_id": config.chat_id, "text": text}).encode(
-        "utf-8"
-    )
-    request = urllib.request.Request(
-        _api_url(config.token, "sendMessage"),
-        data=payload,
-        method="POST",
+    client = client or get_telegram_client()
+    client.post_form(
+        _api_url(config, "sendMessage"),
+        {"chat_id": config.chat_id, "text": text},
+        timeout=timeout,
     )
-    _perform_request(request, timeout)
 
 
 def send_telegram_document(
@@ -130,31 +296,252 @@ def send_telegram_document(
     file_path: Path,
     caption: str | None = None,
     timeout: float = DEFAULT_TIMEOUT,
+    client: TelegramClient | None = None,
 ) -> None:
     file_path = Path(file_path)
+    if is_compressed(file_path):
+        # Recipients get the plain file, not the copy stored on disk.
+        with tempfile.TemporaryDirectory(prefix="mlx-ui-send-") as tmp_dir:
+            send_telegram_document(
+                config,
+                decompress_to(file_path, Path(tmp_dir)),
+                caption=caption,
+                timeout=timeout,
+                client=client,
+            )
+        return
     content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
     fields: dict[str, str] = {"chat_id": config.chat_id}
     if caption:
         fields["caption"] = caption
-    body, content_type_header = _encode_multipart(
-        fields,
-        {"document": (file_path.name, file_path.read_bytes(), content_type)},
-    )
-    request = urllib.request.Request(
-        _api_url(config.token, "sendDocument"),
-        data=body,
-        method="POST",
-        headers={
-            "Content-Type": content_type_header,
-            "Content-Length": str(len(body)),
-        },
+    client = client or get_telegram_client()
+    client.post_multipart(
+        _api_url(config, "sendDocument"),
+        MultipartBody(fields, {"document": (file_path.name, file_path, content_type)}),
+        timeout=timeout,
     )
-    _perform_request(request, timeout)
 
 
-def _perform_request(request: urllib.request.Request, timeout: float) -> None:
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        response.read()
+class MultipartBody:
+    """multipart/form-data body that streams file parts from disk."""
+
+    def __init__(
+        self,
+        fields: dict[str, str],
+        files: dict[str, tuple[str, Path, str]],
+        chunk_size: int = MULTIPART_CHUNK_SIZE,
+    ) -> None:
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self._parts: list[bytes | tuple[Path, int]] = []
+        for name, value in fields.items():
+            self._parts.append(
+                (
+                    f"--{self.boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                    f"{value}\r\n"
+                ).encode("utf-8")
+            )
+        for name, (filename, path, content_type) in files.items():
+            path = Path(path)
+            self._parts.append(
+                (
+                    f"--{self.boundary}\r\n"
+                    'Content-Disposition: form-data; name="'
+                    f'{name}"; filename="{filename}"\r\n'
+                    f"Content-Type: {content_type}\r\n\r\n"
+                ).encode("utf-8")
+            )
+            self._parts.append((path, path.stat().st_size))
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def content_length(self) -> int:
+        return sum(
+            part[1] if isinstance(part, tuple) else len(part) for part in self._parts
+        )
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        for part in self._parts:
+            if not isinstance(part, tuple):
+                yield part
+                continue
+            path, size = part
+            remaining = size
+            with path.open("rb") as handle:
+                while remaining > 0:
+                    chunk = handle.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        raise OSError(f"{path.name} shrank while uploading")
+                    remaining -= len(chunk)
+                    yield chunk
+
+
+class TelegramClient:
+    """Small keep-alive HTTP client for the Bot API.
+
+    Idle connections are pooled per host and reused across requests, so
+    consecutive deliveries skip the TCP and TLS handshakes.
+    """
+
+    def __init__(self, max_idle_per_host: int = 2) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context: ssl.SSLContext | None = None
+
+    def post_form(
+        self,
+        url: str,
+        fields: dict[str, str],
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> bytes:
+        body = urllib.parse.urlencode(fields).encode("utf-8")
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Content-Length": str(len(body)),
+        }
+        return self._post(url, headers, lambda: body, timeout)
+
+    def post_multipart(
+        self,
+        url: str,
+        body: MultipartBody,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> bytes:
+        headers = {
+            "Content-Type": body.content_type,
+            "Content-Length": str(body.content_length),
+        }
+        return self._post(url, headers, body.iter_chunks, timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for connection in idle:
+            connection.close()
+
+    def _post(
+        self,
+        url: str,
+        headers: dict[str, str],
+        body_factory: Callable[[], bytes | Iterable[bytes]],
+        timeout: float,
+    ) -> bytes:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, host, port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        retried = False
+        while True:
+            connection, reused = self._acquire(key, timeout)
+            try:
+                connection.request("POST", target, body=body_factory(), headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (ConnectionResetError, BrokenPipeError, http.client.BadStatusLine):
+                connection.close()
+                # The server may drop an idle keep-alive connection at any time;
+                # retry once on a fresh one before reporting the failure.
+                if reused and not retried:
+                    retried = True
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            if response.status >= 400:
+                raise urllib.error.HTTPError(
+                    url,
+                    response.status,
+                    response.reason,
+                    response.headers,
+                    io.BytesIO(data),
+                )
+            return data
+
+    def _acquire(
+        self, key: tuple[str, str, int], timeout: float
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            connection = idle.pop() if idle else None
+        if connection is not None:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+        return self._connect(key, timeout), False
+
+    def _release(
+        self, key: tuple[str, str, int], connection: http.client.HTTPConnection
+    ) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _connect(
+        self, key: tuple[str, str, int], timeout: float
+    ) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        proxy = None
+        if not urllib.request.proxy_bypass(host):
+            proxy = urllib.request.getproxies().get(scheme)
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            if proxy:
+                proxy_parts = urllib.parse.urlsplit(proxy)
+                connection = http.client.HTTPSConnection(
+                    proxy_parts.hostname or "",
+                    proxy_parts.port or 8080,
+                    timeout=timeout,
+                    context=self._ssl_context,
+                )
+                connection.set_tunnel(host, port)
+                return connection
+            return http.client.HTTPSConnection(
+                host, port, timeout=timeout, context=self._ssl_context
+            )
+        if proxy:
+            proxy_parts = urllib.parse.urlsplit(proxy)
+            connection = http.client.HTTPConnection(
+                proxy_parts.hostname or "",
+                proxy_parts.port or 8080,
+                timeout=timeout,
+            )
+            connection.set_tunnel(host, port)
+            return connection
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+
+_client_lock = threading.Lock()
+_client_instance: TelegramClient | None = None
+
+
+def get_telegram_client() -> TelegramClient:
+    global _client_instance
+    with _client_lock:
+        if _client_instance is None:
+            _client_instance = TelegramClient()
+        return _client_instance
 
 
 def _infer_base_dir_from_result(result_path: Path) -> Path | None:
@@ -162,8 +549,11 @@ def _infer_base_dir_from_result(result_path: Path) -> Path | None:
         resolved = Path(result_path).resolve()
     except OSError:
         resolved = Path(result_path)
-    results_dir = resolved.parent.parent
-    if results_dir.name != "results":
+    # <results>/<job_id>/<file>, or <results>/ab/cd/<job_id>/<file> when sharded.
+    for results_dir in resolved.parents[1 : 2 + SHARD_LEVELS]:
+        if results_dir.name == "results":
+            break
+    else:
         return None
     parent = results_dir.parent
     if parent.name == "data":
@@ -171,37 +561,29 @@ def _infer_base_dir_from_result(result_path: Path) -> Path | None:
     return parent
 
 
-def _encode_multipart(
-    fields: dict[str, str],
-    files: dict[str, tuple[str, bytes, str]],
-) -> tuple[bytes, str]:
-    boundary = uuid.uuid4().hex
-    body_parts: list[bytes] = []
-    for name, value in fields.items():
-        body_parts.append(f"--{boundary}\r\n".encode("utf-8"))
-        body_parts.append(
-            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode("utf-8")
-        )
-        body_parts.append(str(value).encode("utf-8"))
-        body_parts.append(b"\r\n")
-    for name, (filename, content, content_type) in files.items():
-        body_parts.append(f"--{boundary}\r\n".encode("utf-8"))
-        body_parts.append(
-            (
-                'Content-Disposition: form-data; name="'
-                f'{name}"; filename="{filename}"\r\n'
-            ).encode("utf-8")
-        )
-        body_parts.append(f"Content-Type: {content_type}\r\n\r\n".encode("utf-8"))
-        body_parts.append(content)
-        body_parts.append(b"\r\n")
-    body_parts.append(f"--{boundary}--\r\n".encode("utf-8"))
-    body = b"".join(body_parts)
-    return body, f"multipart/form-data; boundary={boundary}"
+def _api_url(config: TelegramConfig, method: str) -> str:
+    return f"{config.api_url}/bot{config.token}/{method}"
 
 
-def _api_url(token: str, method: str) -> str:
-    return f"https://api.telegram.org/bot{token}/{method}"
+def _retry_after_seconds(exc: urllib.error.HTTPError) -> float | None:
+    if exc.code != 429:
+        return None
+    header = exc.headers.get("Retry-After") if exc.headers else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        payload = json.loads(exc.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    parameters = payload.get("parameters") if isinstance(payload, dict) else None
+    if isinstance(parameters, dict):
+        retry_after = parameters.get("retry_after")
+        if isinstance(retry_after, (int, float)):
+            return float(retry_after)
+    return None
 
 
 def _describe_telegram_error(exc: Exception, config: TelegramConfig) -> str:
@@ -1,11 +1,19 @@
+from collections import OrderedDict
 import logging
 import os
 from pathlib import Path
 import subprocess
 import sys
-from typing import Protocol
+from typing import Mapping, Protocol
 
 from mlx_ui.db import JobRecord
+from mlx_ui.formatters import (
+    Segment,
+    TranscriptResult,
+    parse_timestamped_text,
+    write_results,
+)
+from mlx_ui.media import load_audio
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +23,13 @@ WHISPER_MODEL_ENV = "WHISPER_MODEL"
 WHISPER_DEVICE_ENV = "WHISPER_DEVICE"
 WHISPER_FP16_ENV = "WHISPER_FP16"
 WHISPER_CACHE_DIR_ENV = "WHISPER_CACHE_DIR"
+WHISPER_MAX_RESIDENT_ENV = "WHISPER_MAX_RESIDENT_MODELS"
+WHISPER_LANGUAGE_MODELS_ENV = "WHISPER_LANGUAGE_MODELS"
+DEFAULT_MAX_RESIDENT_MODELS = 2
 DEFAULT_WHISPER_MODEL = "large-v3-turbo"
+AUTO_LANGUAGE = "any"
+LANGUAGE_ID_SECONDS = 30
+LANGUAGE_ID_MIN_PROBABILITY = 0.5
 
 
 class Transcriber(Protocol):
@@ -25,13 +39,17 @@ class Transcriber(Protocol):
 
 class FakeTranscriber:
     def transcribe(self, job: JobRecord, results_dir: Path) -> Path:
-        results_dir = Path(results_dir)
-        job_dir = results_dir / job.id
-        job_dir.mkdir(parents=True, exist_ok=True)
-        result_path = job_dir / _result_filename(job.filename)
-        content = f"Fake transcript for {job.filename} ({job.id})\n"
-        result_path.write_text(content, encoding="utf-8")
-        return result_path
+        return write_results(
+            job, results_dir, self.transcribe_result(job), job.output_formats
+        )[0]
+
+    def transcribe_result(self, job: JobRecord) -> TranscriptResult:
+        text = f"Fake transcript for {job.filename} ({job.id})"
+        return TranscriptResult(
+            text=text,
+            segments=[Segment(0.0, float(job.duration or 1.0), text)],
+            language=_job_language(job),
+        )
 
 
 class WtmTranscriber:
@@ -45,18 +63,25 @@ class WtmTranscriber:
             quick if quick is not None else _parse_bool_env("WTM_QUICK", default=False)
         )
 
+    def configure(self, quick: bool) -> None:
+        self.quick = quick
+
     def transcribe(self, job: JobRecord, results_dir: Path) -> Path:
-        results_dir = Path(results_dir)
-        results_dir.mkdir(parents=True, exist_ok=True)
-        job_dir = results_dir / job.id
-        job_dir.mkdir(parents=True, exist_ok=True)
+        return write_results(
+            job, results_dir, self.transcribe_result(job), job.output_formats
+        )[0]
+
+    def transcribe_result(self, job: JobRecord) -> TranscriptResult:
         source_path = Path(job.upload_path)
+        quick = job.quick if job.quick is not None else self.quick
+        # wtm can only be told "English" or "detect"; other languages detect.
+        any_lang = _job_language(job) != "en"
         command = [
             self.wtm_path,
             "--path_audio",
             str(source_path),
-            "--any_lang=True",
-            f"--quick={'True' if self.quick else 'False'}",
+            f"--any_lang={'True' if any_lang else 'False'}",
+            f"--quick={'True' if quick else 'False'}",
         ]
         logger.info("Running wtm for job %s", job.id)
         try:
@@ -69,13 +94,7 @@ class WtmTranscriber:
         except subprocess.CalledProcessError as exc:
             message = _format_wtm_error(exc)
             raise RuntimeError(message) from exc
-        transcript = (result.stdout or "").strip()
-        result_path = job_dir / _result_filename(job.filename)
-        result_path.write_text(
-            transcript + ("\n" if transcript else ""),
-            encoding="utf-8",
-        )
-        return result_path
+        return parse_timestamped_text(result.stdout or "", job.duration)
 
 
 class WhisperTranscriber:
@@ -84,11 +103,18 @@ class WhisperTranscriber:
         model_name: str | None = None,
         device: str | None = None,
         fp16: bool | None = None,
+        max_resident_models: int | None = None,
+        language_models: Mapping[str, str] | None = None,
     ) -> None:
         self.model_name = model_name or os.getenv(
             WHISPER_MODEL_ENV,
             DEFAULT_WHISPER_MODEL,
         )
+        self.language_models = (
+            dict(language_models)
+            if language_models is not None
+            else parse_language_models(os.getenv(WHISPER_LANGUAGE_MODELS_ENV, ""))
+        )
         self.device = device or os.getenv(WHISPER_DEVICE_ENV, "cpu")
         self.fp16 = (
             fp16
@@ -99,41 +125,108 @@ class WhisperTranscriber:
             )
         )
         self.cache_dir = _resolve_whisper_cache_dir()
-        self._model = None
+        self.max_resident_models = max(
+            1,
+            max_resident_models
+            or _parse_int_env(WHISPER_MAX_RESIDENT_ENV, DEFAULT_MAX_RESIDENT_MODELS),
+        )
+        self._models: OrderedDict[str, object] = OrderedDict()
         self._whisper = None
+        self.model_loads = 0
+
+    def configure(
+        self,
+        model_name: str,
+        language_models: Mapping[str, str] | None = None,
+    ) -> None:
+        # Loaded models stay resident, so switching back to one is free.
+        self.model_name = model_name
+        if language_models is not None:
+            self.language_models = dict(language_models)
+
+    @property
+    def loaded_models(self) -> list[str]:
+        return list(self._models)
 
     def transcribe(self, job: JobRecord, results_dir: Path) -> Path:
-        results_dir = Path(results_dir)
-        results_dir.mkdir(parents=True, exist_ok=True)
-        job_dir = results_dir / job.id
-        job_dir.mkdir(parents=True, exist_ok=True)
+        return write_results(
+            job, results_dir, self.transcribe_result(job), job.output_formats
+        )[0]
+
+    def transcribe_result(self, job: JobRecord) -> TranscriptResult:
         source_path = Path(job.upload_path)
-        model = self._ensure_model()
+        model_name = job.model or self._route_model(job)
+        model = self._ensure_model(model_name)
         fp16 = self.fp16 and not self.device.lower().startswith("cpu")
         logger.info(
             "Running whisper for job %s (model=%s, device=%s)",
             job.id,
-            self.model_name,
+            model_name,
             self.device,
         )
         try:
             result = model.transcribe(
                 str(source_path),
                 fp16=fp16,
+                language=_job_language(job),
             )
         except Exception as exc:  # pragma: no cover - passthrough for backend errors
             raise RuntimeError(f"whisper failed: {exc}") from exc
-        transcript = (result.get("text") or "").strip()
-        result_path = job_dir / _result_filename(job.filename)
-        result_path.write_text(
-            transcript + ("\n" if transcript else ""),
-            encoding="utf-8",
+        return _whisper_result(result)
+
+    def detect_language(self, job: JobRecord) -> str | None:
+        """Identify the spoken language from the first 30 seconds of audio.
+
+        Returns ``None`` when no routing rules are configured, no multilingual
+        model is available or the guess is not confident enough; the full pass
+        then detects the language itself.
+        """
+        if not self.language_models:
+            # Nothing to route, so skip the extra model load and decode.
+            return None
+        model_name = self._language_id_model(job)
+        if model_name is None:
+            return None
+        model = self._ensure_model(model_name)
+        whisper = self._whisper
+        audio = load_audio(Path(job.upload_path), seconds=LANGUAGE_ID_SECONDS)
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio),
+            n_mels=model.dims.n_mels,
+        ).to(model.device)
+        _tokens, probs = model.detect_language(mel)
+        language, probability = max(probs.items(), key=lambda item: item[1])
+        logger.info(
+            "Detected language %s (p=%.2f) for job %s with %s",
+            language,
+            probability,
+            job.id,
+            model_name,
         )
-        return result_path
+        if probability < LANGUAGE_ID_MIN_PROBABILITY:
+            return None
+        return language
 
-    def _ensure_model(self):
-        if self._model is not None:
-            return self._model
+    def _language_id_model(self, job: JobRecord) -> str | None:
+        # Reuse a model that is loaded (or about to be) instead of loading one
+        # just for detection; English-only models cannot identify languages.
+        candidates = [job.model, *reversed(self._models), self.model_name]
+        for candidate in candidates:
+            if candidate and not _is_english_only(candidate):
+                return candidate
+        return None
+
+    def _route_model(self, job: JobRecord) -> str:
+        language = _job_language(job)
+        if language is None:
+            return self.model_name
+        return self.language_models.get(language, self.model_name)
+
+    def _ensure_model(self, model_name: str):
+        model = self._models.get(model_name)
+        if model is not None:
+            self._models.move_to_end(model_name)
+            return model
         try:
             import whisper  # type: ignore[import-not-found]
         except Exception as exc:  # pragma: no cover - depends on optional dep
@@ -144,16 +237,21 @@ class WhisperTranscriber:
         self._whisper = whisper
         try:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
-            self._model = whisper.load_model(
-                self.model_name,
+            model = whisper.load_model(
+                model_name,
                 device=self.device,
                 download_root=str(self.cache_dir),
             )
         except Exception as exc:  # pragma: no cover - depends on backend download
             raise RuntimeError(
-                f"Failed to load Whisper model '{self.model_name}': {exc}"
+                f"Failed to load Whisper model '{model_name}': {exc}"
             ) from exc
-        return self._model
+        self.model_loads += 1
+        self._models[model_name] = model
+        while len(self._models) > self.max_resident_models:
+            evicted, _ = self._models.popitem(last=False)
+            logger.info("Unloaded Whisper model %s", evicted)
+        return model
 
 
 def _format_wtm_error(error: subprocess.CalledProcessError) -> str:
@@ -201,11 +299,54 @@ def _parse_bool_env(name: str, default: bool) -> bool:
     return default
 
 
-def _result_filename(source_name: str) -> str:
-    base = Path(source_name).stem.strip()
-    if not base:
-        base = "transcript"
-    return f"{base}.txt"
+def _parse_int_env(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _job_language(job: JobRecord) -> str | None:
+    language = (job.language or "").strip().lower()
+    if not language or language == AUTO_LANGUAGE:
+        return None
+    return language
+
+
+def _is_english_only(model_name: str) -> bool:
+    return model_name.endswith(".en")
+
+
+def parse_language_models(value: str) -> dict[str, str]:
+    """Parse ``"en=small.en, de=medium"`` into a language to model mapping."""
+    rules: dict[str, str] = {}
+    for item in value.split(","):
+        language, separator, model_name = item.partition("=")
+        language = language.strip().lower()
+        model_name = model_name.strip()
+        if separator and language and model_name:
+            rules[language] = model_name
+    return rules
+
+
+def _whisper_result(result: Mapping[str, object]) -> TranscriptResult:
+    segments = []
+    for item in result.get("segments") or []:
+        try:
+            segments.append(
+                Segment(float(item["start"]), float(item["end"]), str(item["text"]))
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+    language = result.get("language")
+    return TranscriptResult(
+        text=str(result.get("text") or ""),
+        segments=segments,
+        language=language if isinstance(language, str) else None,
+    )
 
 
 def resolve_transcriber() -> Transcriber:
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+import logging
+import os
+from pathlib import Path
+import shutil
+import threading
+import time
+from typing import Callable
+import uuid
+
+from mlx_ui.layout import is_safe_path_component, prune_empty_shards, resolve_job_dir
+
+logger = logging.getLogger(__name__)
+
+TRASH_DIRNAME = ".trash"
+DEFAULT_GC_WORKERS = 2
+MAX_FINISHED_TASKS = 20
+MOVE_ATTEMPTS = 5
+
+_manager_lock = threading.Lock()
+_manager_instance: DeletionManager | None = None
+
+
+@dataclass
+class DeletionTask:
+    id: str
+    kind: str
+    status: str = "running"
+    total: int = 0
+    deleted: int = 0
+    failed: int = 0
+    collecting: int = 0
+    started_at: float = 0.0
+    finished_at: float | None = None
+    warnings: list[str] = field(default_factory=list)
+
+
+def trash_dir(root: Path) -> Path:
+    return Path(root) / TRASH_DIRNAME
+
+
+def move_to_trash(path: Path, root: Path) -> Path:
+    """Rename ``path`` into ``root``'s trash; returns its new location.
+
+    The trash sits inside ``root``, so this is a rename on one filesystem:
+    ``path`` disappears at once however much it holds.
+    """
+    path = Path(path)
+    trash = trash_dir(root)
+    target = trash / f"{uuid.uuid4().hex}-{path.name}"
+    for attempt in range(MOVE_ATTEMPTS):
+        try:
+            trash.mkdir(exist_ok=True)
+            os.rename(path, target)
+            return target
+        except (FileExistsError, FileNotFoundError):
+            # The trash is removed whenever it empties, which can happen
+            # between the two calls above; make it again.
+            if attempt == MOVE_ATTEMPTS - 1 or not os.path.lexists(path):
+                raise
+    return target
+
+
+def discard_job_dir(
+    manager: DeletionManager,
+    root: Path,
+    job_id: str,
+    task: DeletionTask | None = None,
+) -> str:
+    """Move ``job_id``'s directory under ``root`` to the trash.
+
+    Returns ``"deleted"``, ``"missing"`` or ``"failed"``.
+    """
+    if not is_safe_path_component(job_id):
+        logger.warning("Refusing to remove results for unsafe job id %s", job_id)
+        return "failed"
+    root = Path(root).resolve()
+    job_dir = resolve_job_dir(root, job_id).resolve()
+    if not job_dir.is_relative_to(root):
+        logger.warning(
+            "Refusing to remove results outside results dir for job %s", job_id
+        )
+        return "failed"
+    if not job_dir.exists():
+        return "missing"
+    try:
+        if not manager.discard(job_dir, root, task):
+            return "failed"
+    except FileNotFoundError:
+        return "missing"
+    prune_empty_shards(job_dir, root)
+    return "deleted"
+
+
+class DeletionManager:
+    """Runs deletions in the background and reports their progress.
+
+    A task's ``work`` moves things into the trash and deletes database rows;
+    the trash is then emptied by a small, fixed pool of threads, so removing
+    a large history never starts more than ``workers`` ``rmtree`` calls.
+    A task is done once everything it moved to the trash is gone.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_GC_WORKERS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="mlx-ui-trash"
+        )
+        self._lock = threading.Lock()
+        self._tasks: dict[str, DeletionTask] = {}
+        self._futures: dict[str, list[Future[None]]] = {}
+        self._finished: dict[str, threading.Event] = {}
+
+    def submit(
+        self, kind: str, work: Callable[[DeletionManager, DeletionTask], None]
+    ) -> DeletionTask:
+        """Start ``work`` in a thread, or return the running task of ``kind``."""
+        with self._lock:
+            for task in self._tasks.values():
+                if task.kind == kind and task.status == "running":
+                    return task
+            task = DeletionTask(id=uuid.uuid4().hex, kind=kind, started_at=self.clock())
+            self._tasks[task.id] = task
+            self._futures[task.id] = []
+            self._finished[task.id] = threading.Event()
+            self._forget_finished()
+        threading.Thread(
+            target=self._run,
+            args=(task, work),
+            name=f"mlx-ui-delete-{kind}",
+            daemon=True,
+        ).start()
+        return task
+
+    def discard(self, path: Path, root: Path, task: DeletionTask | None = None) -> bool:
+        """Move ``path`` to the trash and queue its removal.
+
+        Returns ``False`` if ``path`` could not be moved; a missing ``path``
+        raises ``FileNotFoundError``.
+        """
+        try:
+            entry = move_to_trash(path, root)
+        except FileNotFoundError:
+            raise
+        except OSError as exc:
+            logger.warning("Failed to move %s to the trash: %s", path, exc)
+            return False
+        self._schedule(entry, task)
+        return True
+
+    def collect(self, root: Path) -> int:
+        """Queue whatever an earlier run left in ``root``'s trash."""
+        try:
+            entries = list(os.scandir(trash_dir(root)))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            self._schedule(Path(entry.path), None)
+        return len(entries)
+
+    def get(self, task_id: str) -> DeletionTask | None:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return None if task is None else DeletionTask(**asdict(task))
+
+    def wait(self, task_id: str, timeout: float | None = None) -> bool:
+        with self._lock:
+            finished = self._finished.get(task_id)
+        return finished is not None and finished.wait(timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(
+        self,
+        task: DeletionTask,
+        work: Callable[[DeletionManager, DeletionTask], None],
+    ) -> None:
+        status = "done"
+        try:
+            work(self, task)
+        except Exception:
+            logger.exception("Deletion task %s (%s) failed", task.id, task.kind)
+            status = "failed"
+        with self._lock:
+            futures = list(self._futures[task.id])
+        wait(futures)
+        with self._lock:
+            task.status = status
+            task.finished_at = self.clock()
+            del self._futures[task.id]
+            self._finished[task.id].set()
+
+    def _schedule(self, entry: Path, task: DeletionTask | None) -> None:
+        with self._lock:
+            if task is not None:
+                task.collecting += 1
+            future = self._executor.submit(_remove, entry)
+            if task is not None:
+                self._futures[task.id].append(future)
+        if task is not None:
+            future.add_done_callback(lambda _: self._collected(task))
+
+    def _collected(self, task: DeletionTask) -> None:
+        with self._lock:
+            task.collecting -= 1
+
+    def _forget_finished(self) -> None:
+        finished = [
+            task_id for task_id, task in self._tasks.items() if task.status != "running"
+        ]
+        for task_id in finished[: max(len(finished) - MAX_FINISHED_TASKS, 0)]:
+            del self._tasks[task_id]
+            del self._finished[task_id]
+
+
+def _remove(entry: Path) -> None:
+    try:
+        if entry.is_dir() and not entry.is_symlink():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.exception("Failed to empty %s from the trash", entry)
+        return
+    try:
+        # Leaves the root as it was once the trash is empty.
+        entry.parent.rmdir()
+    except OSError:
+        pass
+
+
+def get_deletion_manager() -> DeletionManager:
+    global _manager_instance
+    with _manager_lock:
+        if _manager_instance is None:
+            _manager_instance = DeletionManager()
+        return _manager_instance
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import threading
+import time
+from typing import AsyncIterator, Callable
+from uuid import uuid4
+
+from mlx_ui.ingest import WRITE_CHUNK_SIZE, hash_file
+from mlx_ui.layout import prune_empty_shards
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_DIRNAME = ".sessions"
+SESSION_TTL_ENV = "UPLOAD_SESSION_TTL"
+DEFAULT_SESSION_TTL = 24 * 60 * 60
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+_SESSION_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSessionError(Exception):
+    def __init__(self, message: str, status_code: int = 400) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UploadSession:
+    id: str
+    filename: str
+    size: int
+    created_at: float
+    updated_at: float
+    options: dict[str, object] = field(default_factory=dict)
+    ranges: list[list[int]] = field(default_factory=list)
+
+    @property
+    def committed(self) -> int:
+        """Bytes received contiguously from the start of the file."""
+        if self.ranges and self.ranges[0][0] == 0:
+            return self.ranges[0][1]
+        return 0
+
+    @property
+    def complete(self) -> bool:
+        return self.committed >= self.size
+
+
+class UploadSessionStore:
+    """Resumable uploads kept under ``<uploads_dir>/.sessions/<id>/``.
+
+    Each session owns a ``data.part`` file that chunks are written into at
+    their offsets, so chunks may arrive in parallel and out of order, and a
+    ``session.json`` recording which byte ranges have landed.
+    """
+
+    def __init__(
+        self,
+        uploads_dir: Path,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.root = Path(uploads_dir) / SESSIONS_DIRNAME
+        self.ttl = ttl if ttl is not None else _read_ttl()
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        filename: str,
+        size: int,
+        options: dict[str, object] | None = None,
+    ) -> UploadSession:
+        if size <= 0:
+            raise UploadSessionError("size must be a positive integer")
+        self.expire()
+        now = self.clock()
+        session = UploadSession(
+            id=uuid4().hex,
+            filename=filename,
+            size=size,
+            created_at=now,
+            updated_at=now,
+            options=dict(options or {}),
+        )
+        session_dir = self._session_dir(session.id)
+        session_dir.mkdir(parents=True)
+        with (session_dir / "data.part").open("wb") as handle:
+            handle.truncate(size)
+        self._save(session)
+        return session
+
+    def get(self, session_id: str) -> UploadSession:
+        path = self._session_dir(session_id) / "session.json"
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise UploadSessionError("Upload session not found", 404) from exc
+        return UploadSession(**payload)
+
+    def describe(self, session: UploadSession) -> dict[str, object]:
+        return {
+            "id": session.id,
+            "filename": session.filename,
+            "size": session.size,
+            "offset": session.committed,
+            "ranges": session.ranges,
+            "complete": session.complete,
+            "chunk_size": DEFAULT_CHUNK_SIZE,
+            "expires_at": session.updated_at + self.ttl,
+        }
+
+    async def write_chunk(
+        self,
+        session_id: str,
+        offset: int,
+        stream: AsyncIterator[bytes],
+    ) -> UploadSession:
+        session = self.get(session_id)
+        if offset < 0 or offset >= session.size:
+            raise UploadSessionError("offset is outside the file", 416)
+        data_path = self._session_dir(session_id) / "data.part"
+        try:
+            fd = await asyncio.to_thread(os.open, data_path, os.O_WRONLY)
+        except FileNotFoundError as exc:
+            raise UploadSessionError("Upload is being finalized", 409) from exc
+        position = offset
+        buffer = bytearray()
+        try:
+            async for chunk in stream:
+                if position + len(buffer) + len(chunk) > session.size:
+                    raise UploadSessionError("chunk extends past the file size", 416)
+                buffer += chunk
+                if len(buffer) >= WRITE_CHUNK_SIZE:
+                    position += await asyncio.to_thread(
+                        _pwrite_all, fd, bytes(buffer), position
+                    )
+                    buffer.clear()
+        finally:
+            # Keep whatever landed, even if the client went away mid-chunk.
+            try:
+                if buffer:
+                    position += await asyncio.to_thread(
+                        _pwrite_all, fd, bytes(buffer), position
+                    )
+            finally:
+                await asyncio.to_thread(os.close, fd)
+            if position > offset:
+                session = self._record_range(session_id, offset, position)
+        return session
+
+    async def finalize(
+        self,
+        session_id: str,
+        allocate: Callable[[str], tuple[str, Path]],
+    ) -> tuple[UploadSession, str, Path, str]:
+        """Move a complete upload into place; returns its job id, path, hash."""
+        session = self.get(session_id)
+        if not session.complete:
+            raise UploadSessionError(
+                f"Upload incomplete: {session.committed} of {session.size} bytes",
+                409,
+            )
+        session_dir = self._session_dir(session_id)
+        data_path = session_dir / "data.part"
+        claimed = session_dir / "data.finalizing"
+        try:
+            # Only one of several concurrent finalize calls wins this rename.
+            await asyncio.to_thread(os.rename, data_path, claimed)
+        except FileNotFoundError as exc:
+            raise UploadSessionError("Upload is already being finalized", 409) from exc
+        destination: Path | None = None
+        try:
+            sha256 = await asyncio.to_thread(hash_file, claimed)
+            job_id, destination = allocate(session.filename)
+            # Same filesystem as data/uploads, so this is a rename, not a copy.
+            await asyncio.to_thread(os.replace, claimed, destination)
+        except BaseException:
+            if destination is not None:
+                _discard_allocation(destination, self.root.parent)
+            # Hand the data back so the client can retry.
+            try:
+                os.rename(claimed, data_path)
+            except OSError:
+                pass
+            raise
+        await asyncio.to_thread(shutil.rmtree, session_dir, True)
+        return session, job_id, destination, sha256
+
+    def delete(self, session_id: str) -> bool:
+        session_dir = self._session_dir(session_id)
+        if not session_dir.is_dir():
+            return False
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return True
+
+    def expire(self) -> int:
+        """Remove sessions that have not received data within the TTL."""
+        if not self.root.is_dir():
+            return 0
+        cutoff = self.clock() - self.ttl
+        removed = 0
+        for session_dir in self.root.iterdir():
+            try:
+                session = self.get(session_dir.name)
+                stale = session.updated_at < cutoff
+            except UploadSessionError:
+                # Unreadable state: judge by the directory's own age.
+                stale = session_dir.stat().st_mtime < cutoff
+            if stale:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info("Expired %s abandoned upload session(s)", removed)
+        return removed
+
+    def _record_range(self, session_id: str, start: int, end: int) -> UploadSession:
+        with self._lock:
+            session = self.get(session_id)
+            session.ranges = _merge_ranges([*session.ranges, [start, end]])
+            session.updated_at = self.clock()
+            self._save(session)
+        return session
+
+    def _save(self, session: UploadSession) -> None:
+        session_dir = self._session_dir(session.id)
+        tmp_path = session_dir / "session.json.tmp"
+        tmp_path.write_text(json.dumps(asdict(session)), encoding="utf-8")
+        tmp_path.replace(session_dir / "session.json")
+
+    def _session_dir(self, session_id: str) -> Path:
+        if not _SESSION_ID_PATTERN.match(session_id):
+            raise UploadSessionError("Upload session not found", 404)
+        return self.root / session_id
+
+
+def _discard_allocation(destination: Path, uploads_dir: Path) -> None:
+    try:
+        destination.unlink(missing_ok=True)
+        destination.parent.rmdir()
+    except OSError:
+        return
+    prune_empty_shards(destination.parent, uploads_dir)
+
+
+def _merge_ranges(ranges: list[list[int]]) -> list[list[int]]:
+    merged: list[list[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _pwrite_all(fd: int, data: bytes, position: int) -> int:
+    view = memoryview(data)
+    written = 0
+    while written < len(view):
+        written += os.pwrite(fd, view[written:], position + written)
+    return written
+
+
+def _read_ttl() -> float:
+    value = os.getenv(SESSION_TTL_ENV)
+    if value is None or value.strip() == "":
+        return DEFAULT_SESSION_TTL
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return DEFAULT_SESSION_TTL
@@ -3,6 +3,8 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
+from mlx_ui.layout import prune_empty_shards
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,24 +20,26 @@ def cleanup_upload_path(
             "Refusing to remove upload outside uploads dir%s", _job_suffix(job_id)
         )
         return
-    if not resolved_upload.exists():
-        return
     try:
         if resolved_upload.is_file() or resolved_upload.is_symlink():
             resolved_upload.unlink()
-        else:
+        elif resolved_upload.exists():
             logger.warning("Upload path is not a file%s", _job_suffix(job_id))
             return
     except Exception:
         logger.exception("Failed to remove upload%s", _job_suffix(job_id))
         return
     parent = resolved_upload.parent
+    if parent == resolved_root:
+        return
     try:
         parent.rmdir()
     except OSError:
         return
     except Exception:
         logger.exception("Failed to remove upload directory%s", _job_suffix(job_id))
+        return
+    prune_empty_shards(parent, resolved_root)
 
 
 def _job_suffix(job_id: str | None) -> str:
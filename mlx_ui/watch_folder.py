@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import ctypes
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import errno
+import logging
+import os
+from pathlib import Path
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Mapping
+from uuid import uuid4
+
+from mlx_ui.db import JobRecord, has_watch_ingest, insert_watched_job
+from mlx_ui.ingest import hash_file
+from mlx_ui.layout import sharded_job_dir
+from mlx_ui.transcriber import AUTO_LANGUAGE
+from mlx_ui.uploads import cleanup_upload_path
+
+logger = logging.getLogger(__name__)
+
+WATCH_FOLDER_ENV = "WATCH_FOLDER"
+WATCH_FOLDER_MODE_ENV = "WATCH_FOLDER_MODE"
+WATCH_FOLDER_STABLE_ENV = "WATCH_FOLDER_STABLE_SECONDS"
+WATCH_MODES = ("move", "link")
+DEFAULT_STABLE_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+IDLE_RESCAN_SECONDS = 60.0
+PARTIAL_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download")
+
+# inotify(7) event bits.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+_INOTIFY_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+_watcher_lock = threading.Lock()
+_watcher_instance: WatchFolderIngester | None = None
+
+
+@dataclass
+class WatchFolderConfig:
+    path: Path
+    mode: str = "move"
+    stable_seconds: float = DEFAULT_STABLE_SECONDS
+
+
+def read_watch_folder_config(
+    env: Mapping[str, str] | None = None,
+) -> WatchFolderConfig | None:
+    if env is None:
+        env = os.environ
+    raw_path = env.get(WATCH_FOLDER_ENV, "").strip()
+    if not raw_path:
+        return None
+    mode = env.get(WATCH_FOLDER_MODE_ENV, "").strip().lower() or "move"
+    if mode not in WATCH_MODES:
+        logger.warning("Unknown %s %r; using 'move'", WATCH_FOLDER_MODE_ENV, mode)
+        mode = "move"
+    stable_seconds = DEFAULT_STABLE_SECONDS
+    stable_env = env.get(WATCH_FOLDER_STABLE_ENV, "").strip()
+    if stable_env:
+        try:
+            stable_seconds = max(float(stable_env), 0.0)
+        except ValueError:
+            pass
+    return WatchFolderConfig(
+        path=Path(raw_path).expanduser(),
+        mode=mode,
+        stable_seconds=stable_seconds,
+    )
+
+
+class _Inotify:
+    """Minimal ctypes binding to Linux inotify for a single directory."""
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+
+    @classmethod
+    def open(cls, path: Path) -> _Inotify | None:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), _INOTIFY_MASK)
+        except (AttributeError, OSError):
+            return None
+        if wd < 0:
+            os.close(fd)
+            return None
+        return cls(fd)
+
+    def read_events(self) -> list[tuple[int, str]]:
+        events: list[tuple[int, str]] = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            except OSError as exc:
+                if exc.errno == errno.EINTR:
+                    continue
+                raise
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buffer):
+                _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                start = offset + _EVENT_HEADER.size
+                name = buffer[start : start + length].rstrip(b"\0")
+                events.append((mask, os.fsdecode(name)))
+                offset = start + length
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+@dataclass
+class _Candidate:
+    size: int
+    mtime_ns: int
+    since: float
+
+
+@dataclass
+class _WatchState:
+    candidates: dict[str, _Candidate] = field(default_factory=dict)
+    writing: set[str] = field(default_factory=set)
+    # (size, mtime_ns) of files already handled, so link mode does not
+    # re-check files it leaves in place on every pass.
+    ingested: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+class WatchFolderIngester:
+    """Queues files dropped into a directory once they stop changing.
+
+    A file is ingested after its size and mtime have held for
+    ``stable_seconds`` and, where inotify is available, no writer still has it
+    open. It is hard-linked into ``uploads_dir`` (copied only across
+    filesystems) and, in ``move`` mode, then removed from the watch folder.
+    Every ingest is keyed by name, size and mtime in the database, so a restart
+    never queues the same file twice; while running, handled files are skipped
+    without asking the database until they change or disappear.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        uploads_dir: Path,
+        config: WatchFolderConfig,
+        prepare: Callable[[JobRecord], JobRecord] | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.uploads_dir = Path(uploads_dir)
+        self.config = config
+        self.prepare = prepare
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.clock = clock
+        self._state = _WatchState()
+        self._inotify: _Inotify | None = None
+        self._stop_event = threading.Event()
+        self._wake_fds: tuple[int, int] | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self.config.path.mkdir(parents=True, exist_ok=True)
+        if self.use_inotify:
+            self._inotify = _Inotify.open(self.config.path)
+        if self._inotify is None:
+            logger.info("Polling watch folder %s", self.config.path)
+        else:
+            logger.info("Watching %s with inotify", self.config.path)
+        self._wake_fds = os.pipe()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="mlx-ui-watch-folder",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop_event.set()
+        if self._wake_fds is not None:
+            os.write(self._wake_fds[1], b"x")
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_loop(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.scan()
+                except Exception:
+                    logger.exception("Watch folder scan failed")
+                self._wait(self._next_timeout())
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            if self._wake_fds is not None:
+                for fd in self._wake_fds:
+                    os.close(fd)
+                self._wake_fds = None
+
+    def _next_timeout(self) -> float:
+        settling = [
+            candidate
+            for name, candidate in self._state.candidates.items()
+            # Files still open for writing wake us with IN_CLOSE_WRITE instead.
+            if name not in self._state.writing
+        ]
+        if settling:
+            now = self.clock()
+            due = min(
+                candidate.since + self.config.stable_seconds - now
+                for candidate in settling
+            )
+            return min(max(due, 0.1), self.poll_interval)
+        if self._inotify is not None:
+            return IDLE_RESCAN_SECONDS
+        return self.poll_interval
+
+    def _wait(self, timeout: float) -> None:
+        assert self._wake_fds is not None
+        watched = [self._wake_fds[0]]
+        if self._inotify is not None:
+            watched.append(self._inotify.fd)
+        ready, _, _ = select.select(watched, [], [], timeout)
+        if self._inotify is not None and self._inotify.fd in ready:
+            self.handle_events(self._inotify.read_events())
+
+    def handle_events(self, events: list[tuple[int, str]]) -> None:
+        writing = self._state.writing
+        for mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; fall back to size and mtime alone.
+                writing.clear()
+            elif mask & (IN_CREATE | IN_MODIFY):
+                writing.add(name)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                writing.discard(name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                writing.discard(name)
+                self._state.candidates.pop(name, None)
+                self._state.ingested.pop(name, None)
+
+    def scan(self) -> list[JobRecord]:
+        """Check the folder once, ingesting every file that has settled."""
+        now = self.clock()
+        seen: set[str] = set()
+        ingested: list[JobRecord] = []
+        try:
+            entries = list(os.scandir(self.config.path))
+        except FileNotFoundError:
+            return ingested
+        for entry in entries:
+            if not _is_candidate_name(entry.name):
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            seen.add(entry.name)
+            key = (stat.st_size, stat.st_mtime_ns)
+            if self._state.ingested.get(entry.name) == key:
+                continue
+            self._state.ingested.pop(entry.name, None)
+            candidate = self._state.candidates.get(entry.name)
+            if (
+                candidate is None
+                or candidate.size != stat.st_size
+                or candidate.mtime_ns != stat.st_mtime_ns
+            ):
+                self._state.candidates[entry.name] = _Candidate(
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    since=now,
+                )
+                continue
+            if entry.name in self._state.writing:
+                continue
+            if now - candidate.since < self.config.stable_seconds:
+                continue
+            del self._state.candidates[entry.name]
+            job = self._ingest(Path(entry.path), stat)
+            self._state.ingested[entry.name] = key
+            if job is not None:
+                ingested.append(job)
+        for name in set(self._state.candidates) - seen:
+            del self._state.candidates[name]
+        for name in set(self._state.ingested) - seen:
+            del self._state.ingested[name]
+        return ingested
+
+    def _ingest(self, source: Path, stat: os.stat_result) -> JobRecord | None:
+        source_key = f"{source.name}:{stat.st_size}:{stat.st_mtime_ns}"
+        if has_watch_ingest(self.db_path, source_key):
+            # Queued before a restart that interrupted the move.
+            if self.config.mode == "move":
+                source.unlink(missing_ok=True)
+            return None
+        job_id = uuid4().hex
+        destination = sharded_job_dir(self.uploads_dir, job_id) / source.name
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, destination)
+        except OSError as exc:
+            if exc.errno not in {errno.EXDEV, errno.EPERM, errno.ENOTSUP}:
+                cleanup_upload_path(destination, self.uploads_dir, job_id)
+                raise
+            logger.info("Cannot hard-link %s (%s); copying it", source, exc)
+            shutil.copyfile(source, destination)
+        job = JobRecord(
+            id=job_id,
+            filename=source.name,
+            status="queued",
+            created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            upload_path=str(destination),
+            language=AUTO_LANGUAGE,
+            upload_bytes=stat.st_size,
+            sha256=hash_file(destination),
+        )
+        if self.prepare is not None:
+            job = self.prepare(job)
+        if not insert_watched_job(self.db_path, job, source_key):
+            cleanup_upload_path(destination, self.uploads_dir, job_id)
+            return None
+        if self.config.mode == "move":
+            source.unlink(missing_ok=True)
+        logger.info("Queued %s from the watch folder as job %s", source.name, job_id)
+        return job
+
+
+def _is_candidate_name(name: str) -> bool:
+    return not name.startswith(".") and not name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+def start_watch_folder(
+    db_path: Path,
+    uploads_dir: Path,
+    config: WatchFolderConfig,
+    prepare: Callable[[JobRecord], JobRecord] | None = None,
+) -> WatchFolderIngester:
+    global _watcher_instance
+    with _watcher_lock:
+        if _watcher_instance and _watcher_instance.is_running():
+            return _watcher_instance
+        _watcher_instance = WatchFolderIngester(
+            db_path=db_path,
+            uploads_dir=uploads_dir,
+            config=config,
+            prepare=prepare,
+        )
+        _watcher_instance.start()
+        return _watcher_instance
+
+
+def stop_watch_folder(timeout: float | None = None) -> None:
+    global _watcher_instance
+    with _watcher_lock:
+        if not _watcher_instance:
+            return
+        _watcher_instance.stop(timeout=timeout)
+        _watcher_instance = None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from mlx_ui.compression import list_result_names
+from mlx_ui.db import JobRecord, enqueue_outbox_entry
+from mlx_ui.layout import resolve_job_dir
+from mlx_ui.outbox import DeliveryError
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_CHANNEL = "webhook"
+DEFAULT_TIMEOUT = 10.0
+MAX_CALLBACK_URL_LENGTH = 2048
+USER_AGENT = "whisper-webui-mlx"
+
+
+def validate_callback_url(value: str) -> str | None:
+    """Return an error message if ``value`` cannot be used as a webhook URL."""
+    if len(value) > MAX_CALLBACK_URL_LENGTH:
+        return "callback_url is too long"
+    parts = urllib.parse.urlsplit(value)
+    if parts.scheme not in {"http", "https"} or not parts.hostname:
+        return "callback_url must be an absolute http(s) URL"
+    return None
+
+
+def build_job_event(job: JobRecord, results_dir: Path) -> dict[str, object]:
+    results = list_result_names(resolve_job_dir(results_dir, job.id))
+    return {
+        "event": f"job.{job.status}",
+        "job": {
+            "id": job.id,
+            "filename": job.filename,
+            "status": job.status,
+            "language": job.language,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "completed_at": job.completed_at,
+            "error_message": job.error_message,
+            "status_note": job.status_note,
+            "batch_id": job.batch_id,
+            "results": [
+                {
+                    "name": name,
+                    "url": "/results/"
+                    f"{urllib.parse.quote(job.id)}/{urllib.parse.quote(name)}",
+                }
+                for name in results
+            ],
+        },
+    }
+
+
+def enqueue_webhook_delivery(db_path: Path, job: JobRecord, results_dir: Path) -> bool:
+    if not job.callback_url:
+        return False
+    enqueue_outbox_entry(
+        db_path,
+        OUTBOX_CHANNEL,
+        {"url": job.callback_url, "body": build_job_event(job, results_dir)},
+        job_id=job.id,
+        available_at=time.time(),
+    )
+    return True
+
+
+def deliver_webhook_payload(
+    payload: dict[str, object],
+    timeout: float = DEFAULT_TIMEOUT,
+) -> None:
+    url = payload.get("url")
+    if not isinstance(url, str) or validate_callback_url(url):
+        raise DeliveryError("webhook payload has no valid url", retryable=False)
+    body = json.dumps(payload.get("body") or {}).encode("utf-8")
+    request = urllib.request.Request(
+        url,
+        data=body,
+        method="POST",
+        headers={"Content-Type": "application/json", "User-Agent": USER_AGENT},
+    )
+    host = urllib.parse.urlsplit(url).hostname
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as exc:
+        raise DeliveryError(
+            f"HTTP {exc.code}",
+            retry_after=_retry_after_seconds(exc),
+            retryable=exc.code in {408, 429} or exc.code >= 500,
+            # Each entry may target a different receiver.
+            channel_wide=False,
+        ) from exc
+    except OSError as exc:
+        # Only the host: callback URLs may carry tokens in their path or query.
+        raise DeliveryError(f"{exc.__class__.__name__} contacting {host}") from exc
+
+
+def _retry_after_seconds(exc: urllib.error.HTTPError) -> float | None:
+    value = exc.headers.get("Retry-After") if exc.headers else None
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        return None
@@ -5,10 +5,31 @@ from datetime import datetime, timezone
 from pathlib import Path
 import threading
 
-from mlx_ui.db import claim_next_job, update_job_status
-from mlx_ui.telegram import maybe_send_telegram
-from mlx_ui.transcriber import Transcriber, resolve_transcriber
+from mlx_ui.compression import open_text
+from mlx_ui.db import (
+    DEFAULT_AFFINITY_WINDOW,
+    PREVIEW_CHARS,
+    JobRecord,
+    claim_next_job,
+    get_job,
+    replace_job_segments,
+    update_job_language,
+    update_job_preview,
+    update_job_status,
+)
+from mlx_ui.formatters import TranscriptResult, write_results
+from mlx_ui.manifest import record_results
+from mlx_ui.media import count_audio_streams, is_silent
+from mlx_ui.search import index_job_transcript
+from mlx_ui.settings import (
+    SettingsWatcher,
+    compute_effective_settings,
+    configure_transcriber_with_settings,
+)
+from mlx_ui.telegram import enqueue_telegram_delivery
+from mlx_ui.transcriber import AUTO_LANGUAGE, Transcriber, resolve_transcriber
 from mlx_ui.uploads import cleanup_upload_path
+from mlx_ui.webhooks import enqueue_webhook_delivery
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +45,24 @@ class Worker:
         results_dir: Path,
         poll_interval: float = 0.5,
         transcriber: Transcriber | None = None,
+        settings_base_dir: Path | None = None,
+        affinity_window: int = DEFAULT_AFFINITY_WINDOW,
+        skip_silent: bool = True,
     ) -> None:
         self.db_path = Path(db_path)
         self.uploads_dir = Path(uploads_dir)
         self.results_dir = Path(results_dir)
         self.poll_interval = poll_interval
         self.transcriber = transcriber or resolve_transcriber()
+        self.settings_base_dir = settings_base_dir
+        self.affinity_window = affinity_window
+        self.skip_silent = skip_silent
+        self._settings_watcher = (
+            SettingsWatcher(settings_base_dir)
+            if settings_base_dir is not None
+            else None
+        )
+        self.output_formats = self._read_output_formats()
         self._stop_event = threading.Event()
         self._paused_event = threading.Event()
         self._thread: threading.Thread | None = None
@@ -69,35 +102,204 @@ class Worker:
             if not processed:
                 self._stop_event.wait(self.poll_interval)
 
+    def apply_settings_changes(self) -> bool:
+        watcher = self._settings_watcher
+        if watcher is None or not watcher.poll():
+            return False
+        try:
+            transcriber = configure_transcriber_with_settings(
+                self.transcriber, base_dir=self.settings_base_dir
+            )
+        except Exception:
+            logger.exception("Worker failed to apply updated settings")
+            return False
+        self.output_formats = self._read_output_formats()
+        if transcriber is not self.transcriber:
+            logger.info("Worker switched to %s", transcriber.__class__.__name__)
+            self.transcriber = transcriber
+        else:
+            logger.info("Worker applied updated settings")
+        return True
+
     def run_once(self) -> bool:
         if self._paused_event.is_set():
             return False
-        job = claim_next_job(self.db_path)
+        # Only between jobs, so a running transcription keeps its settings.
+        self.apply_settings_changes()
+        job = self._claim_next_job()
         if job is None:
             return False
+        note = self._silence_note(job)
+        if note is not None:
+            # Nothing to transcribe: skip the model and the Telegram upload,
+            # which rejects empty documents anyway.
+            try:
+                write_results(
+                    job,
+                    self.results_dir,
+                    TranscriptResult(text=""),
+                    self._job_output_formats(job),
+                )
+                update_job_preview(self.db_path, job.id, "")
+                self._record_results(job)
+                update_job_status(
+                    self.db_path,
+                    job.id,
+                    "done",
+                    completed_at=_now_utc(),
+                    status_note=note,
+                )
+            except Exception as exc:
+                logger.exception("Worker failed to finish silent job %s", job.id)
+                self._fail(job, exc)
+                return True
+            self._index_transcript(job)
+            self._notify_callback(job)
+            cleanup_upload_path(job.upload_path, self.uploads_dir, job.id)
+            return True
+        self._identify_language(job)
         try:
-            result_path = self.transcriber.transcribe(job, self.results_dir)
+            result_path = self._transcribe(job)
         except Exception as exc:
             logger.exception("Worker failed to transcribe job %s", job.id)
-            update_job_status(
-                self.db_path,
-                job.id,
-                "failed",
-                completed_at=_now_utc(),
-                error_message=_truncate_error(str(exc) or exc.__class__.__name__),
-            )
-            cleanup_upload_path(job.upload_path, self.uploads_dir, job.id)
+            self._fail(job, exc)
             return True
+        self._store_preview(job, result_path)
+        self._record_results(job)
+        update_job_status(self.db_path, job.id, "done", completed_at=_now_utc())
+        self._index_transcript(job)
         try:
-            maybe_send_telegram(job, result_path)
+            enqueue_telegram_delivery(self.db_path, job, result_path)
         except Exception:
             logger.exception(
-                "Worker failed to deliver Telegram message for job %s", job.id
+                "Worker failed to queue Telegram delivery for job %s", job.id
             )
-        update_job_status(self.db_path, job.id, "done", completed_at=_now_utc())
+        self._notify_callback(job)
         cleanup_upload_path(job.upload_path, self.uploads_dir, job.id)
         return True
 
+    def _fail(self, job: JobRecord, exc: Exception) -> None:
+        self._record_results(job)
+        update_job_status(
+            self.db_path,
+            job.id,
+            "failed",
+            completed_at=_now_utc(),
+            error_message=_truncate_error(str(exc) or exc.__class__.__name__),
+        )
+        self._notify_callback(job)
+        cleanup_upload_path(job.upload_path, self.uploads_dir, job.id)
+
+    def _transcribe(self, job: JobRecord) -> Path:
+        transcribe_result = getattr(self.transcriber, "transcribe_result", None)
+        if transcribe_result is None:
+            return self.transcriber.transcribe(job, self.results_dir)
+        # One inference pass; every requested format is rendered from it.
+        result = transcribe_result(job)
+        paths = write_results(
+            job, self.results_dir, result, self._job_output_formats(job)
+        )
+        replace_job_segments(
+            self.db_path,
+            job.id,
+            ((segment.start, segment.end, segment.text) for segment in result.segments),
+        )
+        return paths[0]
+
+    def _job_output_formats(self, job: JobRecord) -> list[str] | None:
+        return job.output_formats or self.output_formats
+
+    def _read_output_formats(self) -> list[str] | None:
+        if self.settings_base_dir is None:
+            return None
+        try:
+            effective, _sources, _file_settings = compute_effective_settings(
+                base_dir=self.settings_base_dir
+            )
+        except Exception:
+            logger.exception("Worker failed to read output formats")
+            return None
+        return list(effective["output_formats"])
+
+    def _store_preview(self, job: JobRecord, result_path: Path) -> None:
+        try:
+            with open_text(result_path) as handle:
+                text = handle.read(PREVIEW_CHARS + 1)
+            update_job_preview(self.db_path, job.id, text)
+        except Exception:
+            logger.exception("Worker failed to store preview for job %s", job.id)
+
+    def _record_results(self, job: JobRecord) -> None:
+        try:
+            record_results(self.db_path, self.results_dir, job.id)
+        except Exception:
+            # The reconciler picks the job up later.
+            logger.exception("Worker failed to record results for job %s", job.id)
+
+    def _index_transcript(self, job: JobRecord) -> None:
+        try:
+            index_job_transcript(self.db_path, self.results_dir, job)
+        except Exception:
+            logger.exception("Worker failed to index transcript for job %s", job.id)
+
+    def _notify_callback(self, job: JobRecord) -> None:
+        if not job.callback_url:
+            return
+        try:
+            # Reload so the event carries the final status and timestamps.
+            finished = get_job(self.db_path, job.id) or job
+            enqueue_webhook_delivery(self.db_path, finished, self.results_dir)
+        except Exception:
+            logger.exception("Worker failed to queue webhook for job %s", job.id)
+
+    def _silence_note(self, job: JobRecord) -> str | None:
+        if not self.skip_silent:
+            return None
+        source_path = Path(job.upload_path)
+        try:
+            streams = job.audio_streams
+            if streams is None:
+                streams = count_audio_streams(source_path)
+            if streams is None:
+                return None
+            if streams == 0:
+                return "No audio stream; transcription skipped."
+            if is_silent(source_path):
+                return "Audio is silent; transcription skipped."
+        except Exception:
+            logger.warning("Silence check failed for job %s", job.id, exc_info=True)
+        return None
+
+    def _identify_language(self, job: JobRecord) -> None:
+        detect_language = getattr(self.transcriber, "detect_language", None)
+        if detect_language is None or job.language != AUTO_LANGUAGE:
+            return
+        try:
+            language = detect_language(job)
+        except Exception:
+            # The full pass detects the language itself, so just move on.
+            logger.warning(
+                "Language detection failed for job %s", job.id, exc_info=True
+            )
+            return
+        if language is None:
+            return
+        update_job_language(self.db_path, job.id, language)
+        job.language = language
+
+    def _claim_next_job(self) -> JobRecord | None:
+        # Prefer jobs for an already loaded model so mixed queues don't thrash
+        # between models. Backends without resident models just run FIFO.
+        loaded_models = getattr(self.transcriber, "loaded_models", None)
+        if not loaded_models:
+            return claim_next_job(self.db_path)
+        return claim_next_job(
+            self.db_path,
+            preferred_models=loaded_models,
+            default_model=getattr(self.transcriber, "model_name", None),
+            affinity_window=self.affinity_window,
+        )
+
 
 def start_worker(
     db_path: Path,
@@ -105,6 +307,7 @@ def start_worker(
     results_dir: Path,
     poll_interval: float = 0.5,
     transcriber: Transcriber | None = None,
+    settings_base_dir: Path | None = None,
 ) -> Worker:
     global _worker_instance
     with _worker_lock:
@@ -116,6 +319,7 @@ def start_worker(
             results_dir=results_dir,
             poll_interval=poll_interval,
             transcriber=transcriber,
+            settings_base_dir=settings_base_dir,
         )
         _worker_instance.start()
         return _worker_instance
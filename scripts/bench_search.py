@@ -0,0 +1,91 @@
+"""Benchmark transcript search over a synthetic history.
+
+Usage: python scripts/bench_search.py [--jobs 50000] [--words 1500]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mlx_ui.db import JobRecord, index_transcript, init_db, insert_jobs  # noqa: E402
+from mlx_ui.search import search  # noqa: E402
+
+QUERIES = ("meeting", "budget forecast", '"quarterly budget"', "forec*", "kenobi")
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {"meeting", "budget", "forecast", "quarterly"}
+    while len(words) < size:
+        words.add("".join(rng.choices(letters, k=rng.randint(3, 9))))
+    return sorted(words)
+
+
+def _build(db_path: Path, jobs: int, words: int, rng: random.Random) -> float:
+    init_db(db_path)
+    vocabulary = _vocabulary(rng, 20_000)
+    # Zipf-like weights so a few words are common and most are rare.
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    records = [
+        JobRecord(
+            id=f"job-{index}",
+            filename=f"recording-{index}.m4a",
+            status="done",
+            created_at="2024-01-01T00:00:00+00:00",
+            completed_at="2024-01-01T00:05:00+00:00",
+            upload_path=f"/tmp/recording-{index}.m4a",
+            language="en",
+        )
+        for index in range(jobs)
+    ]
+    insert_jobs(db_path, records)
+    started = time.perf_counter()
+    for index, record in enumerate(records):
+        text = " ".join(rng.choices(vocabulary, weights, k=words))
+        if index % 5000 == 0:
+            text += " kenobi"
+        index_transcript(db_path, record.id, record.filename, text)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=1_500)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "jobs.db"
+        elapsed = _build(db_path, args.jobs, args.words, rng)
+        size_mb = db_path.stat().st_size / 1024**2
+        print(
+            f"indexed {args.jobs} transcripts of {args.words} words in "
+            f"{elapsed:.1f}s ({elapsed / args.jobs * 1000:.2f} ms each), "
+            f"database {size_mb:.0f} MiB"
+        )
+        for query in QUERIES:
+            timings = []
+            for _run in range(args.runs):
+                started = time.perf_counter()
+                total, _hits = search(db_path, query, limit=20)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{query!r:>22}: {total:>6} matches, "
+                f"p50 {statistics.median(timings):7.1f} ms, p95 {p95:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compress the results of finished jobs that are still stored as plain files.
+
+Each file is compressed next to the original and renamed into place before
+the original is removed, so the app can keep serving results while this
+runs. --pause spreads the work out so it stays in the background.
+
+Usage: python scripts/compress_results.py [--data-dir data] [--pause 0.05]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mlx_ui.compression import compress_results  # noqa: E402
+from mlx_ui.db import init_db, list_history_jobs  # noqa: E402
+from mlx_ui.layout import resolve_job_dir  # noqa: E402
+from mlx_ui.manifest import record_results  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(__file__).resolve().parents[1] / "data",
+    )
+    parser.add_argument(
+        "--pause", type=float, default=0.05, help="seconds to wait between jobs"
+    )
+    args = parser.parse_args()
+
+    db_path = args.data_dir / "jobs.db"
+    results_dir = args.data_dir / "results"
+    init_db(db_path)
+    jobs = files = 0
+    for job in list_history_jobs(db_path):
+        compressed = compress_results(resolve_job_dir(results_dir, job.id))
+        if not compressed:
+            continue
+        # Keeps listings in step without waiting for the reconciler.
+        record_results(db_path, results_dir, job.id)
+        jobs += 1
+        files += compressed
+        if args.pause:
+            time.sleep(args.pause)
+    print(f"compressed {files} file(s) in {jobs} job(s)")
+
+
+if __name__ == "__main__":
+    main()
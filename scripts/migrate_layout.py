@@ -0,0 +1,74 @@
+"""Move flat per-job directories into the sharded layout.
+
+Each job directory under data/results and data/uploads moves from
+<root>/<job_id>/ to <root>/ab/cd/<job_id>/ with a single rename, so the app
+can keep running. Queued and running jobs are skipped; run the tool again
+once they finish to move them too.
+
+Usage: python scripts/migrate_layout.py [--data-dir data] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mlx_ui.db import (  # noqa: E402
+    get_job,
+    init_db,
+    list_active_job_ids,
+    update_upload_path,
+)
+from mlx_ui.layout import migrate_to_sharded, sharded_job_dir  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(__file__).resolve().parents[1] / "data",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db_path = args.data_dir / "jobs.db"
+    has_db = db_path.exists()
+    active = set()
+    if has_db:
+        init_db(db_path)
+        active = list_active_job_ids(db_path)
+    for name in ("results", "uploads"):
+        report = migrate_to_sharded(
+            args.data_dir / name, skip=active, dry_run=args.dry_run
+        )
+        verb = "would move" if args.dry_run else "moved"
+        print(
+            f"{name}: {verb} {len(report.moved)}, "
+            f"skipped {len(report.skipped)} active, "
+            f"{len(report.conflicts)} conflict(s)"
+        )
+        for job_id in report.conflicts:
+            print(f"  conflict: {job_id} exists in both layouts")
+        if name == "uploads" and has_db and not args.dry_run:
+            _update_upload_paths(db_path, args.data_dir / name, report.moved)
+
+
+def _update_upload_paths(db_path: Path, uploads_dir: Path, job_ids: list[str]) -> None:
+    # Finished jobs still point at their old upload for cleanup on delete.
+    for job_id in job_ids:
+        job = get_job(db_path, job_id)
+        if job is None:
+            continue
+        old_path = Path(job.upload_path)
+        if old_path.parent.resolve() != (uploads_dir / job_id).resolve():
+            continue
+        new_path = sharded_job_dir(uploads_dir, job_id) / old_path.name
+        update_upload_path(db_path, job_id, str(new_path))
+
+
+if __name__ == "__main__":
+    main()
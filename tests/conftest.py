@@ -0,0 +1,71 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+
+
+class FakeTelegramServer:
+    """Local stand-in for the Telegram Bot API (and webhook receivers)."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[str, bytes]] = []
+        self.client_ports: list[int] = []
+        self.responses: list[tuple[int, dict[str, object]]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", "0"))
+                body = self.rfile.read(length)
+                server.requests.append((self.path, body))
+                server.client_ports.append(self.client_address[1])
+                if server.responses:
+                    status, payload = server.responses.pop(0)
+                else:
+                    status, payload = 200, {"ok": True, "result": {}}
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):  # type: ignore[no-untyped-def]
+                return
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        )
+
+    def __enter__(self) -> "FakeTelegramServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def telegram_server(monkeypatch):  # type: ignore[no-untyped-def]
+    with FakeTelegramServer() as server:
+        monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token-12345")
+        monkeypatch.setenv("TELEGRAM_CHAT_ID", "123")
+        monkeypatch.setenv("TELEGRAM_API_URL", server.url)
+        monkeypatch.setenv("NO_PROXY", "*")
+        yield server
+
+
+@pytest.fixture
+def webhook_server(monkeypatch):  # type: ignore[no-untyped-def]
+    with FakeTelegramServer() as server:
+        monkeypatch.setenv("NO_PROXY", "*")
+        yield server
@@ -0,0 +1,63 @@
+from mlx_ui.admission import (
+    DEFAULT_RETRY_AFTER,
+    AdmissionLimits,
+    AdmissionUsage,
+    check_admission,
+)
+
+LIMITS = AdmissionLimits(max_queued_jobs=10, max_queued_bytes=1000, min_free_bytes=500)
+
+
+def _usage(**overrides) -> AdmissionUsage:  # type: ignore[no-untyped-def]
+    values = {
+        "queued_jobs": 2,
+        "queued_bytes": 400,
+        "free_bytes": 10_000,
+        "drain_bytes_per_second": 10.0,
+        "seconds_per_job": 30.0,
+    }
+    values.update(overrides)
+    return AdmissionUsage(**values)
+
+
+def test_admits_within_limits() -> None:
+    assert check_admission(LIMITS, _usage(), 600) is None
+    assert (
+        check_admission(AdmissionLimits(0, 0, 0), _usage(queued_jobs=99), 10**9) is None
+    )
+
+
+def test_full_queue_retries_after_drain_estimate() -> None:
+    jobs = check_admission(LIMITS, _usage(queued_jobs=11), 0)
+    assert jobs is not None
+    assert (jobs.status_code, jobs.retry_after) == (429, 60)
+
+    queued = check_admission(LIMITS, _usage(), 700)
+    assert queued is not None
+    assert (queued.status_code, queued.retry_after) == (429, 10)
+
+    no_history = check_admission(LIMITS, _usage(drain_bytes_per_second=None), 700)
+    assert no_history is not None
+    assert no_history.retry_after == DEFAULT_RETRY_AFTER
+
+
+def test_low_disk_and_oversized_uploads() -> None:
+    disk = check_admission(LIMITS, _usage(free_bytes=600), 200)
+    assert disk is not None
+    assert (disk.status_code, disk.retry_after) == (507, 10)
+
+    # Draining the whole queue would not free enough, so there is no retry hint.
+    hopeless = check_admission(LIMITS, _usage(free_bytes=0, queued_bytes=10), 100)
+    assert hopeless is not None
+    assert (hopeless.status_code, hopeless.retry_after) == (507, None)
+
+    oversized = check_admission(LIMITS, _usage(), 1001)
+    assert oversized is not None
+    assert (oversized.status_code, oversized.retry_after) == (413, None)
+
+
+def test_written_uploads_are_not_counted_against_free_disk_twice() -> None:
+    assert check_admission(LIMITS, _usage(free_bytes=600), 200, written=True) is None
+    many = check_admission(LIMITS, _usage(queued_jobs=2), 100, 9, written=True)
+    assert many is not None
+    assert many.status_code == 429
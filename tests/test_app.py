@@ -1,11 +1,23 @@
 from datetime import datetime, timezone
+import hashlib
 import json
 from pathlib import Path
 
 from fastapi.testclient import TestClient
 
 from mlx_ui.app import app, sanitize_display_path
-from mlx_ui.db import JobRecord, init_db, insert_job, list_jobs
+from mlx_ui.db import (
+    JobRecord,
+    get_job_previews,
+    init_db,
+    insert_job,
+    list_jobs,
+    replace_job_segments,
+    update_job_preview,
+)
+from mlx_ui.media import MediaInfo, MediaProbeError
+from mlx_ui.settings import update_settings_file
+from mlx_ui.trash import get_deletion_manager
 
 
 def _configure_app(tmp_path: Path) -> None:
@@ -218,7 +230,11 @@ def test_clear_history_removes_completed(tmp_path: Path) -> None:
     failed_id = "job-failed"
     queued_id = "job-queued"
 
-    for job_id, status in ((done_id, "done"), (failed_id, "failed"), (queued_id, "queued")):
+    for job_id, status in (
+        (done_id, "done"),
+        (failed_id, "failed"),
+        (queued_id, "queued"),
+    ):
         uploads_dir = Path(app.state.uploads_dir) / job_id
         uploads_dir.mkdir(parents=True, exist_ok=True)
         upload_path = uploads_dir / "alpha.txt"
@@ -242,18 +258,26 @@ def test_clear_history_removes_completed(tmp_path: Path) -> None:
 
     with TestClient(app) as client:
         response = client.post("/api/history/clear")
-
-    assert response.status_code == 200
-    payload = response.json()
-    assert payload["deleted_jobs"] == 2
-    assert payload["deleted_results"] == 2
-    assert payload["failed_results"] == 0
+        assert response.status_code == 202
+        task_id = response.json()["task"]["id"]
+        assert get_deletion_manager().wait(task_id, timeout=10)
+        progress = client.get(f"/api/deletions/{task_id}")
+
+    assert progress.status_code == 200
+    payload = progress.json()
+    assert payload["status"] == "done"
+    assert payload["total"] == 2
+    assert payload["deleted"] == 2
+    assert payload["failed"] == 0
+    assert payload["collecting"] == 0
 
     jobs = list_jobs(db_path)
     assert len(jobs) == 1
     assert jobs[0].id == queued_id
     assert not (Path(app.state.results_dir) / done_id).exists()
     assert not (Path(app.state.results_dir) / failed_id).exists()
+
+
 def test_jobs_persist_across_restart(tmp_path: Path) -> None:
     _configure_app(tmp_path)
     files = [("files", ("alpha.txt", b"one", "text/plain"))]
@@ -379,3 +403,358 @@ def test_preview_endpoint_handles_missing_results(tmp_path: Path) -> None:
     assert payload["filename"] is None
     assert payload["snippet"] == ""
     assert payload["truncated"] is False
+
+
+def test_upload_stores_job_options(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    files = [("files", ("alpha.wav", b"one", "audio/wav"))]
+    data = {
+        "model": "small",
+        "quick": "1",
+        "language": "DE",
+        "output_formats": ["srt", "vtt"],
+    }
+
+    with TestClient(app) as client:
+        response = client.post("/upload", files=files, data=data)
+
+    assert response.status_code == 200
+    (job,) = list_jobs(Path(app.state.db_path))
+    assert job.model == "small"
+    assert job.quick is True
+    assert job.language == "de"
+    assert job.output_formats == ["txt", "srt", "vtt"]
+
+
+def test_upload_rejects_invalid_job_options(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    files = [("files", ("alpha.wav", b"one", "audio/wav"))]
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/upload",
+            files=files,
+            data={"model": "../weights.pt", "language": "english"},
+        )
+
+    assert response.status_code == 422
+    assert len(response.json()["detail"]) == 2
+    assert list_jobs(Path(app.state.db_path)) == []
+
+
+def test_upload_stores_probe_metadata_and_rejects_undecodable(
+    tmp_path: Path, monkeypatch
+) -> None:
+    _configure_app(tmp_path)
+
+    async def fake_probe(path: Path) -> MediaInfo:
+        if path.name == "notes.txt":
+            raise MediaProbeError("Invalid data found when processing input")
+        return MediaInfo(
+            container="mov,mp4,m4a,3gp,3g2,mj2",
+            duration=61.5,
+            audio_streams=1,
+            audio_codec="aac",
+            sample_rate=44100,
+            channels=2,
+        )
+
+    monkeypatch.setattr("mlx_ui.app.probe_media", fake_probe)
+    files = [
+        ("files", ("talk.m4a", b"audio", "audio/mp4")),
+        ("files", ("notes.txt", b"text", "text/plain")),
+    ]
+
+    with TestClient(app) as client:
+        client.post("/upload", files=files)
+        state = client.get("/api/state").json()
+
+    (queued,) = state["queue_pending"]
+    assert queued["filename"] == "talk.m4a"
+    assert queued["duration"] == 61.5
+    assert queued["audio_codec"] == "aac"
+    assert queued["sample_rate"] == 44100
+    (rejected,) = state["history"]
+    assert rejected["filename"] == "notes.txt"
+    assert rejected["status"] == "failed"
+    assert "Invalid data found" in rejected["error_message"]
+    assert not (Path(app.state.uploads_dir) / rejected["id"]).exists()
+
+
+def test_streaming_upload_endpoint_queues_jobs(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    files = [
+        ("files", ("folder/alpha.wav", b"one", "audio/wav")),
+        ("files", ("beta.wav", b"two", "audio/wav")),
+    ]
+
+    with TestClient(app) as client:
+        response = client.post("/api/uploads", files=files, data={"quick": "1"})
+        rejected = client.post("/api/uploads", content=b"raw")
+
+    assert response.status_code == 200
+    payload = response.json()["jobs"]
+    assert [job["filename"] for job in payload] == ["folder/alpha.wav", "beta.wav"]
+    assert payload[0]["sha256"] == hashlib.sha256(b"one").hexdigest()
+    jobs = {job.id: job for job in list_jobs(Path(app.state.db_path))}
+    stored = jobs[payload[0]["id"]]
+    assert Path(stored.upload_path).read_bytes() == b"one"
+    assert stored.upload_bytes == 3
+    assert stored.quick is True
+    assert rejected.status_code == 415
+
+
+def test_upload_session_accepts_chunks_out_of_order(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    data = b"0123456789abcdef"
+
+    with TestClient(app) as client:
+        created = client.post(
+            "/api/upload-sessions",
+            json={"filename": "talk.wav", "size": len(data), "language": "de"},
+        )
+        session_id = created.json()["id"]
+        url = f"/api/upload-sessions/{session_id}"
+        tail = client.put(f"{url}?offset=8", content=data[8:])
+        early = client.post(f"{url}/finalize")
+        head = client.put(f"{url}?offset=0", content=data[:8])
+        status = client.get(url)
+        finalized = client.post(f"{url}/finalize")
+        gone = client.get(url)
+
+    assert created.status_code == 201
+    assert tail.json()["offset"] == 0
+    assert early.status_code == 409
+    assert head.json()["ranges"] == [[0, 16]]
+    assert status.json()["complete"] is True
+    assert finalized.status_code == 200
+    payload = finalized.json()["jobs"][0]
+    assert payload["sha256"] == hashlib.sha256(data).hexdigest()
+    stored = list_jobs(Path(app.state.db_path))[0]
+    assert Path(stored.upload_path).read_bytes() == data
+    assert stored.language == "de"
+    assert stored.upload_bytes == len(data)
+    assert gone.status_code == 404
+
+
+def test_batch_endpoints_move_and_cancel_upload(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+
+    with TestClient(app) as client:
+        first = client.post("/api/uploads", files=[("files", ("a.wav", b"a"))])
+        second = client.post(
+            "/api/uploads",
+            files=[("files", ("b.wav", b"b")), ("files", ("c.wav", b"c"))],
+        )
+        batch_id = second.json()["batch_id"]
+        status = client.get(f"/api/batches/{batch_id}")
+        moved = client.post(f"/api/batches/{batch_id}/move", json={"position": "front"})
+        queued = [job["filename"] for job in client.get("/api/state").json()["queue"]]
+        cancelled = client.delete(f"/api/batches/{batch_id}")
+        remaining = client.get("/api/state").json()["queue"]
+
+    assert status.json()["counts"] == {"queued": 2}
+    assert moved.json() == {"moved": 2}
+    assert queued == ["b.wav", "c.wav", "a.wav"]
+    assert cancelled.json() == {"removed": 2}
+    assert [job["id"] for job in remaining] == [first.json()["jobs"][0]["id"]]
+    for job in second.json()["jobs"]:
+        assert not (Path(app.state.uploads_dir) / job["id"]).exists()
+
+
+def test_submit_jobs_api_honours_idempotency_key(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    files = [
+        ("files", ("one.wav", b"one", "audio/wav")),
+        ("files", ("two.wav", b"two", "audio/wav")),
+    ]
+    data = {"callback_url": "https://example.com/hook", "language": "en"}
+    headers = {"Idempotency-Key": "retry-me"}
+
+    with TestClient(app) as client:
+        first = client.post("/api/jobs", files=files, data=data, headers=headers)
+        retry = client.post("/api/jobs", files=files, data=data, headers=headers)
+        invalid = client.post(
+            "/api/jobs", files=files, data={"callback_url": "file:///etc/passwd"}
+        )
+
+    assert first.status_code == 201
+    payload = first.json()
+    first_eta, second_eta = [job["eta_seconds"] for job in payload["jobs"]]
+    assert 0 < first_eta < second_eta == payload["eta_seconds"]
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == payload
+    jobs = list_jobs(Path(app.state.db_path))
+    assert len(jobs) == 2
+    assert {job.callback_url for job in jobs} == {"https://example.com/hook"}
+    assert invalid.status_code == 422
+    assert len(list_jobs(Path(app.state.db_path))) == 2
+
+
+def test_uploads_are_refused_when_the_queue_is_full(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    update_settings_file(tmp_path, {"max_queued_jobs": 1, "max_queued_bytes": 1000})
+    files = [("files", ("one.wav", b"one", "audio/wav"))]
+
+    with TestClient(app) as client:
+        accepted = client.post("/api/uploads", files=files)
+        full = client.post("/api/uploads", files=files)
+        oversized = client.post(
+            "/api/upload-sessions", json={"filename": "big.wav", "size": 1001}
+        )
+        snapshot = client.get("/api/settings").json()
+
+    assert accepted.status_code == 200
+    assert full.status_code == 429
+    assert full.headers["Retry-After"] == "60"
+    assert oversized.status_code == 413
+    assert len(list_jobs(Path(app.state.db_path))) == 1
+    assert snapshot["admission"]["limits"]["max_queued_jobs"] == 1
+    assert snapshot["admission"]["usage"]["queued_jobs"] == 1
+    assert snapshot["admission"]["usage"]["queued_bytes"] == 3
+
+
+def test_rejected_upload_session_can_be_finalized_later(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    update_settings_file(tmp_path, {"max_queued_jobs": 1})
+    data = b"0123456789"
+
+    with TestClient(app) as client:
+        created = client.post(
+            "/api/upload-sessions", json={"filename": "talk.wav", "size": len(data)}
+        )
+        url = f"/api/upload-sessions/{created.json()['id']}"
+        client.put(f"{url}?offset=0", content=data)
+        # The queue fills up while the session is still uploading.
+        client.post("/api/uploads", files=[("files", ("one.wav", b"one"))])
+        rejected = client.post(f"{url}/finalize")
+        kept = client.get(url)
+        update_settings_file(tmp_path, {"max_queued_jobs": 2})
+        finalized = client.post(f"{url}/finalize")
+
+    assert rejected.status_code == 429
+    assert "Retry-After" in rejected.headers
+    assert kept.json()["complete"] is True
+    assert finalized.status_code == 200
+    stored = {job.filename: job for job in list_jobs(Path(app.state.db_path))}
+    assert Path(stored["talk.wav"].upload_path).read_bytes() == data
+
+
+def test_segments_endpoint_serves_time_ranges(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    db_path = Path(app.state.db_path)
+    init_db(db_path)
+    insert_job(
+        db_path,
+        JobRecord(
+            id="job-seg",
+            filename="talk.m4a",
+            status="done",
+            created_at="2024-01-01T00:00:00+00:00",
+            upload_path=str(tmp_path / "talk.m4a"),
+            language="en",
+        ),
+    )
+    replace_job_segments(
+        db_path,
+        "job-seg",
+        [(index * 10.0, index * 10.0 + 9.5, f"line {index}") for index in range(600)],
+    )
+    job_dir = Path(app.state.results_dir) / "job-seg"
+    job_dir.mkdir(parents=True)
+    (job_dir / "talk.txt").write_text("from file", encoding="utf-8")
+
+    with TestClient(app) as client:
+        ranged = client.get("/api/jobs/job-seg/segments?from=01:23:00&to=4995")
+        srt = client.get("/api/jobs/job-seg/segments?from=9.7&to=10&format=srt")
+        rendered = client.get("/results/job-seg/talk.vtt")
+        preview = client.get("/api/jobs/job-seg/preview?chars=50")
+        invalid = client.get("/api/jobs/job-seg/segments?from=soon")
+        missing = client.get("/api/jobs/nope/segments")
+
+    assert ranged.status_code == 200
+    assert [segment["text"] for segment in ranged.json()["segments"]] == [
+        "line 498",
+        "line 499",
+    ]
+    assert ranged.json()["from"] == 4980.0
+    assert srt.text == "1\n00:00:10,000 --> 00:00:19,500\nline 1\n\n"
+    assert rendered.headers["content-type"].startswith("text/vtt")
+    assert rendered.text.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:09.500\nline 0")
+    assert (
+        preview.json()["snippet"]
+        == "line 0 line 1 line 2 line 3 line 4 line 5 line 6 l"
+    )
+    assert preview.json()["truncated"] is True
+    assert invalid.status_code == 422
+    assert missing.status_code == 404
+
+
+def test_previews_endpoint_batches_stored_snippets(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    db_path = Path(app.state.db_path)
+    init_db(db_path)
+    for job_id, filename in (("job-new", "new.m4a"), ("job-old", "old.m4a")):
+        insert_job(
+            db_path,
+            JobRecord(
+                id=job_id,
+                filename=filename,
+                status="done",
+                created_at="2024-01-01T00:00:00+00:00",
+                upload_path=str(tmp_path / filename),
+                language="en",
+            ),
+        )
+    update_job_preview(db_path, "job-new", "n" * 2500)
+    old_dir = Path(app.state.results_dir) / "job-old"
+    old_dir.mkdir(parents=True)
+    (old_dir / "old.txt").write_text("legacy transcript", encoding="utf-8")
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/previews",
+            json={"job_ids": ["job-new", "job-old", "missing"], "chars": 60},
+        )
+        invalid = client.post("/api/previews", json={"job_ids": "job-new"})
+
+    assert response.status_code == 200
+    previews = response.json()["previews"]
+    assert set(previews) == {"job-new", "job-old"}
+    assert previews["job-new"] == {
+        "job_id": "job-new",
+        "filename": "new.txt",
+        "snippet": "n" * 60,
+        "truncated": True,
+    }
+    assert previews["job-old"]["snippet"] == "legacy transcript"
+    assert previews["job-old"]["truncated"] is False
+    # Legacy jobs get their preview stored on first read.
+    assert get_job_previews(db_path, ["job-old"]) == {
+        "job-old": ("old.m4a", "legacy transcript", False)
+    }
+    assert get_job_previews(db_path, ["job-new"])["job-new"][2] is True
+    assert invalid.status_code == 422
+
+
+def test_uploads_are_rechecked_per_file_and_need_a_length(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    update_settings_file(tmp_path, {"max_queued_jobs": 2})
+    files = [
+        ("files", (f"clip-{index}.wav", b"one", "audio/wav")) for index in range(3)
+    ]
+
+    with TestClient(app) as client:
+        too_many = client.post("/api/uploads", files=files)
+        chunked = client.post(
+            "/api/uploads",
+            content=iter([b"--x\r\n"]),
+            headers={"content-type": "multipart/form-data; boundary=x"},
+        )
+
+    assert too_many.status_code == 429
+    assert chunked.status_code == 411
+    assert list_jobs(Path(app.state.db_path)) == []
+    uploads_dir = Path(app.state.uploads_dir)
+    assert [path for path in uploads_dir.rglob("*") if path.is_file()] == []
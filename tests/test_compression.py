@@ -0,0 +1,118 @@
+import gzip
+import os
+from pathlib import Path
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from mlx_ui.app import app
+from mlx_ui.compression import (
+    accepts_gzip,
+    compress_file,
+    compress_results,
+    locate,
+    logical_name,
+)
+from mlx_ui.db import JobRecord, init_db, insert_job
+from mlx_ui.layout import sharded_job_dir
+from mlx_ui.telegram import write_digest_archive
+
+TRANSCRIPT = "Hello there. General Kenobi!\n" * 50
+
+
+def test_compress_file_replaces_original(tmp_path: Path) -> None:
+    plain = tmp_path / "talk.txt"
+    plain.write_text(TRANSCRIPT, encoding="utf-8")
+    os.utime(plain, (1_000, 1_000))
+
+    stored = compress_file(plain)
+
+    assert stored.name == "talk.txt.gz"
+    assert not plain.exists()
+    assert stored.stat().st_mtime == 1_000
+    assert stored.stat().st_size < len(TRANSCRIPT) / 5
+    assert gzip.decompress(stored.read_bytes()).decode("utf-8") == TRANSCRIPT
+    assert locate(plain) == stored
+    assert locate(stored) == stored
+    assert logical_name(stored.name) == "talk.txt"
+
+
+def test_compress_results_skips_partials_and_compressed(tmp_path: Path) -> None:
+    (tmp_path / "talk.txt").write_text("a", encoding="utf-8")
+    (tmp_path / "talk.srt.gz").write_bytes(gzip.compress(b"b"))
+    (tmp_path / ".talk.json.gz.partial").write_bytes(b"")
+
+    assert compress_results(tmp_path) == 1
+    assert compress_results(tmp_path) == 0
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        ".talk.json.gz.partial",
+        "talk.srt.gz",
+        "talk.txt.gz",
+    ]
+
+
+def test_accepts_gzip() -> None:
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip(None)
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0, *")
+
+
+def test_digest_archive_holds_plain_transcripts(tmp_path: Path) -> None:
+    stored = tmp_path / "talk.txt.gz"
+    stored.write_bytes(gzip.compress(TRANSCRIPT.encode("utf-8")))
+    archive = tmp_path / "digest.zip"
+
+    write_digest_archive(archive, [("Talk.m4a", stored)])
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.namelist() == ["Talk.txt"]
+        assert zf.read("Talk.txt").decode("utf-8") == TRANSCRIPT
+
+
+def test_compressed_results_are_served_and_previewed(tmp_path: Path) -> None:
+    app.state.base_dir = tmp_path
+    app.state.uploads_dir = tmp_path / "uploads"
+    app.state.results_dir = tmp_path / "results"
+    app.state.db_path = tmp_path / "jobs.db"
+    app.state.worker_enabled = False
+    app.state.update_check_enabled = False
+    init_db(app.state.db_path)
+    insert_job(
+        app.state.db_path,
+        JobRecord(
+            id="job-1",
+            filename="talk.m4a",
+            status="done",
+            created_at="2024-01-01T00:00:00+00:00",
+            completed_at="2024-01-01T00:05:00+00:00",
+            upload_path="/tmp/talk.m4a",
+            language="en",
+        ),
+    )
+    job_dir = sharded_job_dir(app.state.results_dir, "job-1")
+    job_dir.mkdir(parents=True)
+    (job_dir / "talk.txt").write_text(TRANSCRIPT, encoding="utf-8")
+    compress_file(job_dir / "talk.txt")
+    stored_size = (job_dir / "talk.txt.gz").stat().st_size
+
+    with TestClient(app) as client:
+        passthrough = client.get(
+            "/results/job-1/talk.txt", headers={"Accept-Encoding": "gzip"}
+        )
+        plain = client.get(
+            "/results/job-1/talk.txt", headers={"Accept-Encoding": "identity"}
+        )
+        preview = client.get("/api/jobs/job-1/preview?chars=50")
+        state = client.get("/api/state").json()
+
+    assert passthrough.headers["content-encoding"] == "gzip"
+    assert passthrough.headers["content-length"] == str(stored_size)
+    assert passthrough.headers["content-type"].startswith("text/plain")
+    assert passthrough.text == TRANSCRIPT
+    assert "content-encoding" not in plain.headers
+    assert plain.text == TRANSCRIPT
+    assert preview.json()["snippet"] == TRANSCRIPT[:50]
+    assert state["results_by_job"] == {"job-1": ["talk.txt"]}
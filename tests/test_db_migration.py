@@ -37,6 +37,8 @@ def test_init_db_adds_missing_columns(tmp_path: Path) -> None:
         assert "started_at" in columns
         assert "completed_at" in columns
         assert "error_message" in columns
+        assert "results_bytes" in columns
+        assert "last_accessed_at" in columns
         row = connection.execute(
             "SELECT language FROM jobs WHERE id = 'job-1'"
         ).fetchone()
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mlx_ui.db import JobRecord, init_db, insert_job, list_eta_jobs, list_jobs
+from mlx_ui.eta import HISTORY_SAMPLE, estimate_queue_etas
+
+
+def _job(job_id: str, status: str, minute: int, **fields: object) -> JobRecord:
+    return JobRecord(
+        id=job_id,
+        filename=f"{job_id}.wav",
+        status=status,
+        created_at=f"2026-01-01T00:{minute:02d}:00+00:00",
+        upload_path=f"/tmp/{job_id}.wav",
+        language="en",
+        **fields,
+    )
+
+
+def test_eta_jobs_read_the_queue_and_recent_history_only(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    for index in range(HISTORY_SAMPLE + 5):
+        # Older jobs ran slower, so a wrong sample changes the estimate.
+        insert_job(
+            db_path,
+            _job(
+                f"done{index:02d}",
+                "done",
+                index,
+                started_at=f"2026-01-01T01:{index:02d}:00+00:00",
+                completed_at=f"2026-01-01T01:{index:02d}:{index + 10:02d}+00:00",
+                duration=60.0,
+            ),
+        )
+    insert_job(db_path, _job("untimed", "done", 58, completed_at="2026-01-02"))
+    insert_job(db_path, _job("broken", "failed", 59, completed_at="2026-01-02"))
+    insert_job(
+        db_path,
+        _job("running", "running", 0, started_at="2026-01-01T02:00:00+00:00"),
+    )
+    insert_job(db_path, _job("queued", "queued", 1, duration=120.0))
+    now = datetime(2026, 1, 1, 2, 0, 30, tzinfo=timezone.utc)
+
+    jobs = list_eta_jobs(db_path, HISTORY_SAMPLE)
+
+    ids = {job.id for job in jobs}
+    assert {"running", "queued"} <= ids
+    assert len(jobs) == HISTORY_SAMPLE + 2
+    assert not {"done00", "done04", "untimed", "broken"} & ids
+    assert estimate_queue_etas(jobs, now) == estimate_queue_etas(
+        list_jobs(db_path), now
+    )
@@ -0,0 +1,172 @@
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from mlx_ui.app import app
+from mlx_ui import export
+from mlx_ui.compression import compress_file
+from mlx_ui.db import JobRecord, init_db, insert_job
+from mlx_ui.export import ZipStream
+from mlx_ui.layout import sharded_job_dir
+
+TRANSCRIPT = "Hello there. General Kenobi!\n" * 100
+
+
+def _zip(chunks) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+def test_zip_stream_copies_gzip_members_without_recompressing(tmp_path: Path) -> None:
+    stored = tmp_path / "talk.txt"
+    stored.write_text(TRANSCRIPT, encoding="utf-8")
+    stored = compress_file(stored)
+    plain = tmp_path / "talk.srt"
+    plain.write_text("1\n00:00:00,000 --> 00:00:01,000\nHi\n", encoding="utf-8")
+    archive = ZipStream()
+
+    chunks = [
+        *archive.add_file("talk/talk.txt", stored),
+        *archive.add_file("talk/talk.srt", plain),
+        *archive.close(),
+    ]
+
+    with _zip(chunks) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["talk/talk.txt", "talk/talk.srt"]
+        info = zf.getinfo("talk/talk.txt")
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        # The deflate stream is the gzip payload minus its header and trailer.
+        assert info.compress_size == stored.stat().st_size - 18
+        assert zf.read("talk/talk.txt").decode("utf-8") == TRANSCRIPT
+        assert zf.read("talk/talk.srt") == plain.read_bytes()
+
+
+def test_zip_stream_switches_to_zip64_for_many_entries(
+    tmp_path: Path, monkeypatch
+) -> None:
+    # Pretend the 16-bit entry count overflows after a handful of entries.
+    monkeypatch.setattr(export, "MAX_16", 3)
+    empty = tmp_path / "empty.txt.gz"
+    empty.write_bytes(gzip.compress(b""))
+    archive = ZipStream()
+    chunks = []
+    for index in range(5):
+        chunks.extend(archive.add_file(f"{index}.txt", empty))
+    chunks.extend(archive.close())
+
+    with _zip(chunks) as zf:
+        assert zf.namelist() == [f"{index}.txt" for index in range(5)]
+        assert zf.read("4.txt") == b""
+
+
+def _configure_app(tmp_path: Path) -> None:
+    app.state.base_dir = tmp_path
+    app.state.uploads_dir = tmp_path / "uploads"
+    app.state.results_dir = tmp_path / "results"
+    app.state.db_path = tmp_path / "jobs.db"
+    app.state.worker_enabled = False
+    app.state.update_check_enabled = False
+    init_db(app.state.db_path)
+
+
+def _insert_finished(job_id: str, filename: str, completed_at: str, batch: str) -> None:
+    insert_job(
+        app.state.db_path,
+        JobRecord(
+            id=job_id,
+            filename=filename,
+            status="done",
+            created_at="2024-01-01T00:00:00+00:00",
+            completed_at=completed_at,
+            upload_path="/tmp/upload",
+            language="en",
+            batch_id=batch,
+        ),
+    )
+    job_dir = sharded_job_dir(app.state.results_dir, job_id)
+    job_dir.mkdir(parents=True)
+    stem = Path(filename).stem
+    (job_dir / f"{stem}.txt").write_text(f"{job_id} text\n", encoding="utf-8")
+    compress_file(job_dir / f"{stem}.txt")
+    (job_dir / f"{stem}.srt").write_text("subs\n", encoding="utf-8")
+
+
+def test_export_streams_results_and_metadata(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    _insert_finished("job-1", "talk.m4a", "2024-05-01T10:00:00+00:00", "batch-a")
+    _insert_finished("job-2", "talk.m4a", "2024-05-02T10:00:00+00:00", "batch-a")
+    _insert_finished("job-3", "memo.m4a", "2024-05-03T10:00:00+00:00", "batch-b")
+
+    with TestClient(app) as client:
+        by_batch = client.get("/api/export", params={"batch_id": "batch-a"})
+        by_ids = client.get("/api/export", params={"job_ids": "job-3,../x,job-1"})
+        by_range = client.get(
+            "/api/export",
+            params={"from": "2024-05-02", "to": "2024-05-03", "format": "jsonl"},
+        )
+        as_csv = client.get("/api/export", params={"job_ids": "job-3", "format": "csv"})
+        missing = client.get("/api/export", params={"batch_id": "nope"})
+        unselected = client.get("/api/export")
+        bad_date = client.get("/api/export", params={"from": "yesterday"})
+
+    assert by_batch.headers["content-type"] == "application/zip"
+    assert "attachment" in by_batch.headers["content-disposition"]
+    with _zip([by_batch.content]) as zf:
+        assert zf.namelist() == [
+            "talk/talk.srt",
+            "talk/talk.txt",
+            "talk (2)/talk.srt",
+            "talk (2)/talk.txt",
+        ]
+        assert zf.read("talk (2)/talk.txt") == b"job-2 text\n"
+    with _zip([by_ids.content]) as zf:
+        assert sorted(zf.namelist()) == [
+            "memo/memo.srt",
+            "memo/memo.txt",
+            "talk/talk.srt",
+            "talk/talk.txt",
+        ]
+
+    records = [json.loads(line) for line in by_range.text.splitlines()]
+    assert [record["id"] for record in records] == ["job-2", "job-3"]
+    assert records[0]["results"] == ["talk.srt", "talk.txt"]
+    assert records[0]["text"] == "job-2 text"
+    assert records[1]["batch_id"] == "batch-b"
+
+    rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert [(row["id"], row["text"], row["results"]) for row in rows] == [
+        ("job-3", "job-3 text", "memo.srt memo.txt")
+    ]
+    assert missing.status_code == 404
+    assert unselected.status_code == 422
+    assert bad_date.status_code == 422
+
+
+def test_export_skips_corrupt_gzip_results(tmp_path: Path) -> None:
+    _configure_app(tmp_path)
+    _insert_finished("job-1", "talk.m4a", "2024-05-01T10:00:00+00:00", "batch-a")
+    _insert_finished("job-2", "memo.m4a", "2024-05-02T10:00:00+00:00", "batch-a")
+    results_dir = Path(app.state.results_dir)
+    truncated = sharded_job_dir(results_dir, "job-1") / "talk.txt.gz"
+    stored = truncated.read_bytes()
+    # The header and trailer survive, but the deflate stream is cut short.
+    truncated.write_bytes(stored[:12] + stored[-8:])
+    (sharded_job_dir(results_dir, "job-2") / "memo.txt.gz").write_bytes(b"garbage")
+
+    with TestClient(app) as client:
+        archive = client.get("/api/export", params={"batch_id": "batch-a"})
+        records = client.get(
+            "/api/export", params={"batch_id": "batch-a", "format": "jsonl"}
+        )
+
+    assert archive.status_code == 200
+    with _zip([archive.content]) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["talk/talk.srt", "memo/memo.srt"]
+    texts = [json.loads(line)["text"] for line in records.text.splitlines()]
+    assert texts == ["", ""]
@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+from mlx_ui.compression import open_text
+from mlx_ui.db import JobRecord
+from mlx_ui.formatters import (
+    Segment,
+    TranscriptResult,
+    parse_timestamped_text,
+    write_results,
+)
+from mlx_ui.layout import resolve_job_dir
+
+
+def _job(output_formats: list[str] | None = None) -> JobRecord:
+    return JobRecord(
+        id="job1",
+        filename="talk.m4a",
+        status="running",
+        created_at="2024-01-01T00:00:00+00:00",
+        upload_path="/tmp/talk.m4a",
+        language="en",
+        output_formats=output_formats,
+    )
+
+
+def _read(path: Path) -> str:
+    with open_text(path) as handle:
+        return handle.read()
+
+
+RESULT = TranscriptResult(
+    text=" Hello there. General Kenobi! ",
+    segments=[
+        Segment(0.0, 1.5, " Hello there."),
+        Segment(3661.25, 3663.0, " General Kenobi!"),
+    ],
+    language="en",
+)
+
+
+def test_write_results_renders_every_format(tmp_path: Path) -> None:
+    paths = write_results(_job(), tmp_path, RESULT, ["json", "vtt", "srt"])
+
+    assert [path.name for path in paths] == [
+        "talk.txt.gz",
+        "talk.srt.gz",
+        "talk.vtt.gz",
+        "talk.json.gz",
+    ]
+    job_dir = resolve_job_dir(tmp_path, "job1")
+    assert sorted(path.name for path in job_dir.iterdir()) == sorted(
+        path.name for path in paths
+    )
+    assert _read(paths[0]) == "Hello there. General Kenobi!\n"
+    assert _read(job_dir / "talk.srt.gz") == (
+        "1\n00:00:00,000 --> 00:00:01,500\nHello there.\n\n"
+        "2\n01:01:01,250 --> 01:01:03,000\nGeneral Kenobi!\n\n"
+    )
+    assert _read(job_dir / "talk.vtt.gz") == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:01.500\nHello there.\n\n"
+        "01:01:01.250 --> 01:01:03.000\nGeneral Kenobi!\n\n"
+    )
+    document = json.loads(_read(job_dir / "talk.json.gz"))
+    assert document["language"] == "en"
+    assert document["text"] == "Hello there. General Kenobi!"
+    assert document["segments"][1] == {
+        "id": 1,
+        "start": 3661.25,
+        "end": 3663.0,
+        "text": "General Kenobi!",
+    }
+
+
+def test_write_results_defaults_to_txt(tmp_path: Path) -> None:
+    [path] = write_results(_job(), tmp_path, TranscriptResult(text=""))
+
+    assert path.name == "talk.txt.gz"
+    assert _read(path) == ""
+
+
+def test_parse_timestamped_text() -> None:
+    result = parse_timestamped_text(
+        "[00:00.000 --> 00:02.500]  Hi.\n[01:00:02.500 --> 01:00:04,000] Bye.\n"
+    )
+    assert result.text == "Hi. Bye."
+    assert result.segments == [
+        Segment(0.0, 2.5, "Hi."),
+        Segment(3602.5, 3604.0, "Bye."),
+    ]
+
+    plain = parse_timestamped_text("just text\n", duration=12.0)
+    assert plain.text == "just text"
+    assert plain.segments == [Segment(0.0, 12.0, "just text")]
+    assert parse_timestamped_text("  \n").segments == []
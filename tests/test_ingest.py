@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from mlx_ui import ingest
+from mlx_ui.ingest import IngestError, ingest_multipart
+from mlx_ui.layout import sharded_job_dir
+
+BOUNDARY = b"test-boundary"
+
+
+def _body(parts: list[tuple[str, str | None, bytes]]) -> bytes:
+    chunks = []
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        chunks.append(
+            b"--"
+            + BOUNDARY
+            + b"\r\nContent-Disposition: "
+            + disposition.encode("utf-8")
+            + b"\r\n\r\n"
+            + data
+            + b"\r\n"
+        )
+    chunks.append(b"--" + BOUNDARY + b"--\r\n")
+    return b"".join(chunks)
+
+
+async def _stream(body: bytes, size: int):  # type: ignore[no-untyped-def]
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+def _allocator(root: Path):  # type: ignore[no-untyped-def]
+    counter = iter(range(100))
+
+    def allocate(filename: str) -> tuple[str, Path]:
+        job_id = f"ab{next(counter):02d}job"
+        job_dir = sharded_job_dir(root, job_id)
+        job_dir.mkdir(parents=True)
+        return job_id, job_dir / filename
+
+    return allocate
+
+
+def test_ingest_streams_parts_to_disk_with_hashes(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(ingest, "WRITE_CHUNK_SIZE", 1000)
+    first = bytes(range(256)) * 40
+    second = b"second file"
+    body = _body(
+        [
+            ("language", None, b"en"),
+            ("files", "a.wav", first),
+            ("files", "b.wav", second),
+            ("files", "", b""),
+        ]
+    )
+
+    result = asyncio.run(
+        ingest_multipart(_stream(body, 333), BOUNDARY, _allocator(tmp_path), tmp_path)
+    )
+
+    assert result.fields == {"language": ["en"]}
+    assert [item.filename for item in result.files] == ["a.wav", "b.wav"]
+    for item, payload in zip(result.files, [first, second]):
+        assert item.path.read_bytes() == payload
+        assert item.size == len(payload)
+        assert item.sha256 == hashlib.sha256(payload).hexdigest()
+
+
+def test_ingest_removes_partial_files_on_truncated_body(tmp_path: Path) -> None:
+    body = _body([("files", "a.wav", b"x" * 5000)])
+
+    with pytest.raises(IngestError):
+        asyncio.run(
+            ingest_multipart(
+                _stream(body[:3000], 512), BOUNDARY, _allocator(tmp_path), tmp_path
+            )
+        )
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_ingest_aborted_upload_leaves_uploads_empty(tmp_path: Path) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    body = _body([("files", "a.wav", b"x" * 5000), ("files", "b.wav", b"y" * 10)])
+    # Cut off right after the second part's headers, before any of its data.
+    cut = body.index(b"y" * 10)
+
+    async def dropped():  # type: ignore[no-untyped-def]
+        yield body[:cut]
+        raise ConnectionResetError
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(
+            ingest_multipart(dropped(), BOUNDARY, _allocator(uploads_dir), uploads_dir)
+        )
+
+    assert list(uploads_dir.iterdir()) == []
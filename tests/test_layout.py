@@ -0,0 +1,112 @@
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+
+from mlx_ui.app import app
+from mlx_ui.db import JobRecord, init_db, insert_job
+from mlx_ui.layout import (
+    migrate_to_sharded,
+    prune_empty_shards,
+    resolve_job_dir,
+    sharded_job_dir,
+)
+from mlx_ui.uploads import cleanup_upload_path
+
+JOB_ID = "0123456789abcdef0123456789abcdef"
+
+
+def test_sharded_job_dir_nests_by_id_prefix(tmp_path: Path) -> None:
+    assert sharded_job_dir(tmp_path, JOB_ID) == tmp_path / "01" / "23" / JOB_ID
+    assert sharded_job_dir(tmp_path, "a") == tmp_path / "a_" / "__" / "a"
+    for unsafe in ("", "..", "a/b"):
+        with pytest.raises(ValueError):
+            sharded_job_dir(tmp_path, unsafe)
+
+
+def test_resolve_job_dir_serves_unmigrated_jobs(tmp_path: Path) -> None:
+    assert resolve_job_dir(tmp_path, JOB_ID) == sharded_job_dir(tmp_path, JOB_ID)
+    (tmp_path / JOB_ID).mkdir()
+    assert resolve_job_dir(tmp_path, JOB_ID) == tmp_path / JOB_ID
+    sharded_job_dir(tmp_path, JOB_ID).mkdir(parents=True)
+    assert resolve_job_dir(tmp_path, JOB_ID) == sharded_job_dir(tmp_path, JOB_ID)
+
+
+def test_migrate_to_sharded_moves_flat_dirs(tmp_path: Path) -> None:
+    for job_id in ("aaaa1111", "bbbb2222", "cccc3333"):
+        (tmp_path / job_id).mkdir()
+        (tmp_path / job_id / "talk.txt").write_text(job_id, encoding="utf-8")
+    (tmp_path / ".sessions" / "upload").mkdir(parents=True)
+    sharded_job_dir(tmp_path, "cccc3333").mkdir(parents=True)
+
+    dry = migrate_to_sharded(tmp_path, skip={"bbbb2222"}, dry_run=True)
+    assert dry.moved == ["aaaa1111"]
+    assert (tmp_path / "aaaa1111").is_dir()
+
+    report = migrate_to_sharded(tmp_path, skip={"bbbb2222"})
+    assert report.moved == ["aaaa1111"]
+    assert report.skipped == ["bbbb2222"]
+    assert report.conflicts == ["cccc3333"]
+    moved = sharded_job_dir(tmp_path, "aaaa1111") / "talk.txt"
+    assert moved.read_text(encoding="utf-8") == "aaaa1111"
+    assert not (tmp_path / "aaaa1111").exists()
+    assert (tmp_path / ".sessions" / "upload").is_dir()
+
+    assert migrate_to_sharded(tmp_path).moved == ["bbbb2222"]
+
+
+def test_upload_cleanup_prunes_empty_shards(tmp_path: Path) -> None:
+    upload = sharded_job_dir(tmp_path, JOB_ID) / "talk.m4a"
+    upload.parent.mkdir(parents=True)
+    upload.write_bytes(b"audio")
+    neighbour = sharded_job_dir(tmp_path, "0199") / "other.m4a"
+    neighbour.parent.mkdir(parents=True)
+    neighbour.write_bytes(b"audio")
+
+    cleanup_upload_path(upload, tmp_path, JOB_ID)
+
+    assert not (tmp_path / "01" / "23").exists()
+    assert (tmp_path / "01" / "99").is_dir()
+    prune_empty_shards(tmp_path / "01" / "99" / "missing", tmp_path)
+    assert (tmp_path / "01" / "99").is_dir()
+
+
+def test_results_are_served_and_deleted_in_both_layouts(tmp_path: Path) -> None:
+    app.state.base_dir = tmp_path
+    app.state.uploads_dir = tmp_path / "uploads"
+    app.state.results_dir = tmp_path / "results"
+    app.state.db_path = tmp_path / "jobs.db"
+    app.state.worker_enabled = False
+    app.state.update_check_enabled = False
+    init_db(app.state.db_path)
+    legacy_id = "fedcba9876543210fedcba9876543210"
+    for job_id in (JOB_ID, legacy_id):
+        insert_job(
+            app.state.db_path,
+            JobRecord(
+                id=job_id,
+                filename="talk.m4a",
+                status="done",
+                created_at="2024-01-01T00:00:00+00:00",
+                completed_at="2024-01-01T00:05:00+00:00",
+                upload_path="/tmp/talk.m4a",
+                language="en",
+            ),
+        )
+    sharded = sharded_job_dir(app.state.results_dir, JOB_ID)
+    legacy = app.state.results_dir / legacy_id
+    for job_dir in (sharded, legacy):
+        job_dir.mkdir(parents=True)
+        (job_dir / "talk.txt").write_text(job_dir.name, encoding="utf-8")
+
+    with TestClient(app) as client:
+        assert client.get(f"/results/{JOB_ID}/talk.txt").text == JOB_ID
+        assert client.get(f"/results/{legacy_id}/talk.txt").text == legacy_id
+        assert client.get("/api/state").json()["results_by_job"] == {
+            JOB_ID: ["talk.txt"],
+            legacy_id: ["talk.txt"],
+        }
+        assert client.delete(f"/api/history/{JOB_ID}").status_code == 200
+        assert client.delete(f"/api/history/{legacy_id}").status_code == 200
+
+    assert sorted(app.state.results_dir.iterdir()) == []
@@ -0,0 +1,165 @@
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from mlx_ui import manifest
+from mlx_ui.app import app, trash_directory_contents
+from mlx_ui.db import (
+    JobRecord,
+    clear_result_manifests,
+    init_db,
+    insert_job,
+    list_result_manifests,
+)
+from mlx_ui.layout import sharded_job_dir
+from mlx_ui.manifest import ResultReconciler, record_results
+from mlx_ui.trash import DeletionManager, get_deletion_manager
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _insert_done_job(db_path: Path, job_id: str) -> None:
+    insert_job(
+        db_path,
+        JobRecord(
+            id=job_id,
+            filename="talk.m4a",
+            status="done",
+            created_at="2024-01-01T00:00:00+00:00",
+            completed_at="2024-01-01T00:05:00+00:00",
+            upload_path="/tmp/talk.m4a",
+            language="en",
+        ),
+    )
+
+
+def test_reconciler_repairs_drift_without_rehashing(
+    tmp_path: Path, monkeypatch
+) -> None:
+    db_path = tmp_path / "jobs.db"
+    results_dir = tmp_path / "results"
+    init_db(db_path)
+    _insert_done_job(db_path, "job-1")
+    _insert_done_job(db_path, "job-2")
+    job_dir = results_dir / "job-1"
+    job_dir.mkdir(parents=True)
+    (job_dir / "talk.txt").write_text("hello", encoding="utf-8")
+    (job_dir / "talk.srt").write_text("subs", encoding="utf-8")
+    (job_dir / ".talk.json.partial").write_text("{", encoding="utf-8")
+    clock = FakeClock()
+
+    [srt, txt] = record_results(db_path, results_dir, "job-1", clock=clock)
+    assert (txt.name, txt.size) == ("talk.txt", 5)
+    assert txt.sha256 == hashlib.sha256(b"hello").hexdigest()
+    assert srt.name == "talk.srt"
+
+    hashed: list[str] = []
+    real_hash = manifest.hash_file
+    monkeypatch.setattr(
+        manifest,
+        "hash_file",
+        lambda path: hashed.append(path.name) or real_hash(path),
+    )
+    reconciler = ResultReconciler(db_path, results_dir, batch_size=1, clock=clock)
+    # Oldest check first: job-2 was never recorded.
+    clock.now += 1
+    assert reconciler.run_once() == 1
+    assert list_result_manifests(db_path, ["job-2"]) == {"job-2": []}
+
+    (job_dir / "talk.srt").unlink()
+    (job_dir / "talk.txt").write_text("hello again", encoding="utf-8")
+    os.utime(job_dir / "talk.txt", (5, 5))
+    (job_dir / "talk.vtt").write_text("WEBVTT", encoding="utf-8")
+    clock.now += 1
+    assert reconciler.run_once() == 1
+
+    files = list_result_manifests(db_path, ["job-1"])["job-1"]
+    assert [(entry.name, entry.size) for entry in files] == [
+        ("talk.txt", 11),
+        ("talk.vtt", 6),
+    ]
+    assert sorted(hashed) == ["talk.txt", "talk.vtt"]
+
+    hashed.clear()
+    clock.now += 1
+    assert reconciler.run_once() == 0
+    assert reconciler.run_once() == 0
+    assert hashed == []
+
+
+def test_results_index_is_served_from_manifest(tmp_path: Path) -> None:
+    app.state.base_dir = tmp_path
+    app.state.uploads_dir = tmp_path / "uploads"
+    app.state.results_dir = tmp_path / "results"
+    app.state.db_path = tmp_path / "jobs.db"
+    app.state.worker_enabled = False
+    app.state.update_check_enabled = False
+    init_db(app.state.db_path)
+    _insert_done_job(app.state.db_path, "job-1")
+    _insert_done_job(app.state.db_path, "job-legacy")
+    for job_id in ("job-1", "job-legacy"):
+        job_dir = app.state.results_dir / job_id
+        job_dir.mkdir(parents=True)
+        (job_dir / "talk.txt").write_text("hello", encoding="utf-8")
+    record_results(app.state.db_path, app.state.results_dir, "job-1")
+    # Drift the manifest does not know about yet.
+    (app.state.results_dir / "job-1" / "extra.txt").write_text("x", encoding="utf-8")
+
+    with TestClient(app) as client:
+        state = client.get("/api/state").json()
+        task = client.post("/api/settings/clear-results").json()["task"]
+        assert get_deletion_manager().wait(task["id"], timeout=10)
+        cleared = client.get("/api/state").json()
+
+    assert state["results_by_job"] == {
+        "job-1": ["talk.txt"],
+        "job-legacy": ["talk.txt"],
+    }
+    assert cleared["results_by_job"] == {"job-1": [], "job-legacy": []}
+
+
+def test_clearing_results_keeps_manifests_recorded_meanwhile(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    results_dir = tmp_path / "results"
+    init_db(db_path)
+
+    def finish(job_id: str) -> None:
+        _insert_done_job(db_path, job_id)
+        job_dir = sharded_job_dir(results_dir, job_id)
+        job_dir.mkdir(parents=True)
+        (job_dir / "talk.txt").write_text("hello", encoding="utf-8")
+        record_results(db_path, results_dir, job_id)
+
+    finish("aa11job")
+    finish("bb22job")
+    cleared: list[list[str]] = []
+
+    def on_trashed(job_ids: list[str]) -> None:
+        cleared.append(job_ids)
+        clear_result_manifests(db_path, job_ids, 2_000.0)
+        if len(cleared) == 1:
+            # A job finishes while the clear is still running.
+            finish("cc33job")
+
+    manager = DeletionManager(workers=1)
+    task = manager.submit(
+        "results",
+        lambda manager, task: trash_directory_contents(
+            manager, task, results_dir, on_trashed=on_trashed
+        ),
+    )
+    assert manager.wait(task.id, timeout=10)
+    manager.shutdown()
+
+    assert sorted(cleared) == [["aa11job"], ["bb22job"]]
+    manifests = list_result_manifests(db_path, ["aa11job", "bb22job", "cc33job"])
+    assert manifests["aa11job"] == manifests["bb22job"] == []
+    assert [entry.name for entry in manifests["cc33job"]] == ["talk.txt"]
@@ -0,0 +1,137 @@
+import io
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from mlx_ui import media
+from mlx_ui.media import (
+    SAMPLE_RATE,
+    SILENCE_BLOCK_WINDOWS,
+    MediaProbeError,
+    is_silent,
+    parse_ffprobe_output,
+)
+
+WINDOW = SAMPLE_RATE // 2
+
+
+def _pcm(seconds: float, amplitude: float = 0.0, tone_at: float | None = None):  # type: ignore[no-untyped-def]
+    """Mono float samples: a noise floor plus an optional 0.25 s 440 Hz burst."""
+    np = pytest.importorskip("numpy")
+    count = int(seconds * SAMPLE_RATE)
+    samples = np.random.default_rng(0).uniform(-amplitude, amplitude, count)
+    if tone_at is not None:
+        start = int(tone_at * SAMPLE_RATE)
+        stop = min(start + SAMPLE_RATE // 4, count)
+        times = np.arange(stop - start) / SAMPLE_RATE
+        samples[start:stop] += 0.5 * np.sin(2 * math.pi * 440 * times)
+    return samples.astype(np.float32)
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, size: int | None = -1) -> bytes:
+        self.reads += 1
+        return super().read(size)
+
+
+class FakeFfmpeg:
+    def __init__(self, samples, returncode: int = 0) -> None:  # type: ignore[no-untyped-def]
+        np = pytest.importorskip("numpy")
+        pcm = (samples * 32767).astype(np.int16).tobytes()
+        self.stdout = CountingReader(pcm)
+        self.returncode = returncode
+        self.killed = False
+
+    def kill(self) -> None:
+        self.killed = True
+
+    def wait(self) -> int:
+        return self.returncode
+
+
+def _stub_ffmpeg(monkeypatch: pytest.MonkeyPatch, process: FakeFfmpeg) -> None:
+    monkeypatch.setattr(media.subprocess, "Popen", lambda *args, **kwargs: process)
+
+
+def test_parse_ffprobe_output_reads_first_audio_stream() -> None:
+    output = json.dumps(
+        {
+            "streams": [
+                {"codec_type": "video", "codec_name": "h264"},
+                {
+                    "codec_type": "audio",
+                    "codec_name": "opus",
+                    "sample_rate": "48000",
+                    "channels": 2,
+                },
+                {"codec_type": "audio", "codec_name": "aac"},
+            ],
+            "format": {"format_name": "matroska,webm", "duration": "12.480000"},
+        }
+    )
+
+    info = parse_ffprobe_output(output)
+
+    assert info.container == "matroska,webm"
+    assert info.duration == 12.48
+    assert info.audio_streams == 2
+    assert info.audio_codec == "opus"
+    assert info.sample_rate == 48000
+    assert info.channels == 2
+
+
+def test_parse_ffprobe_output_allows_video_without_audio() -> None:
+    output = json.dumps(
+        {
+            "streams": [{"codec_type": "video", "codec_name": "h264"}],
+            "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "N/A"},
+        }
+    )
+
+    info = parse_ffprobe_output(output)
+
+    assert info.audio_streams == 0
+    assert info.duration is None
+    assert info.audio_codec is None
+
+
+def test_parse_ffprobe_output_rejects_files_without_media_streams() -> None:
+    with pytest.raises(MediaProbeError):
+        parse_ffprobe_output(json.dumps({"streams": [], "format": {}}))
+
+
+def test_loudest_window_rms_finds_a_burst_after_the_first_window() -> None:
+    silence = media._loudest_window_rms(_pcm(2.0), WINDOW)
+    noise = media._loudest_window_rms(_pcm(2.0, amplitude=0.001), WINDOW)
+    burst = media._loudest_window_rms(_pcm(2.1, tone_at=1.2), WINDOW)
+
+    assert silence == 0.0
+    assert 0.0 < noise < 10 ** (media.SILENCE_THRESHOLD_DB / 20)
+    # 0.25 s of a 0.5-amplitude sine in a 0.5 s window: 0.5 / sqrt(2) / sqrt(2).
+    assert burst == pytest.approx(0.25, rel=0.05)
+
+
+def test_is_silent_reads_ffmpeg_pcm(monkeypatch: pytest.MonkeyPatch) -> None:
+    _stub_ffmpeg(monkeypatch, FakeFfmpeg(_pcm(3.0, amplitude=0.001)))
+    assert is_silent(Path("quiet.wav")) is True
+
+    _stub_ffmpeg(monkeypatch, FakeFfmpeg(_pcm(3.0), returncode=1))
+    assert is_silent(Path("broken.wav")) is None
+
+
+def test_is_silent_stops_at_the_first_audible_block(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    block_seconds = SILENCE_BLOCK_WINDOWS * WINDOW / SAMPLE_RATE
+    process = FakeFfmpeg(_pcm(block_seconds * 3, tone_at=block_seconds + 1.0))
+    _stub_ffmpeg(monkeypatch, process)
+
+    assert is_silent(Path("talk.wav")) is False
+    assert process.killed
+    assert process.stdout.reads == 2
@@ -0,0 +1,268 @@
+from dataclasses import replace
+import json
+from pathlib import Path
+import zipfile
+
+from mlx_ui.db import JobRecord, init_db, list_outbox_entries
+from mlx_ui.outbox import OutboxSender, compute_backoff
+from mlx_ui.telegram import (
+    OUTBOX_CHANNEL,
+    deliver_telegram_payload,
+    enqueue_telegram_delivery,
+    write_digest_archive,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        # Ahead of the wall clock so freshly enqueued entries are due.
+        self.now = 2_000_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_job(tmp_path: Path) -> tuple[JobRecord, Path]:
+    job = JobRecord(
+        id="job1",
+        filename="sample.wav",
+        status="done",
+        created_at="2024-01-01T00:00:00Z",
+        upload_path=str(tmp_path / "uploads" / "job1" / "sample.wav"),
+        language="en",
+    )
+    result_dir = tmp_path / "results" / job.id
+    result_dir.mkdir(parents=True, exist_ok=True)
+    result_path = result_dir / "sample.txt"
+    result_path.write_text("hello", encoding="utf-8")
+    return job, result_path
+
+
+def _make_sender(db_path: Path, clock: FakeClock) -> OutboxSender:
+    return OutboxSender(
+        db_path,
+        handlers={OUTBOX_CHANNEL: deliver_telegram_payload},
+        clock=clock,
+    )
+
+
+def test_outbox_delivers_to_telegram_server(tmp_path: Path, telegram_server) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    job, result_path = _make_job(tmp_path)
+    clock = FakeClock()
+
+    assert enqueue_telegram_delivery(db_path, job, result_path) is True
+    sender = _make_sender(db_path, clock)
+    assert sender.run_once() is True
+    assert sender.run_once() is False
+
+    paths = [path for path, _body in telegram_server.requests]
+    assert paths == ["/bottoken-12345/sendDocument"]
+    body = telegram_server.requests[0][1]
+    assert b"sample.txt" in body
+    assert b"Transcription complete: sample.wav" in body
+    assert list_outbox_entries(db_path) == []
+
+
+def test_outbox_honours_retry_after(tmp_path: Path, telegram_server) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    job, result_path = _make_job(tmp_path)
+    other_job = replace(job, id="job2", filename="other.wav")
+    clock = FakeClock()
+    telegram_server.responses.append(
+        (
+            429,
+            {
+                "ok": False,
+                "error_code": 429,
+                "parameters": {"retry_after": 7},
+            },
+        )
+    )
+
+    enqueue_telegram_delivery(db_path, job, result_path)
+    enqueue_telegram_delivery(db_path, other_job, result_path)
+    sender = _make_sender(db_path, clock)
+    assert sender.run_once() is True
+
+    entries = list_outbox_entries(db_path)
+    assert [entry.status for entry in entries] == ["pending", "pending"]
+    assert entries[0].attempts == 1
+    assert entries[0].last_error == "HTTP 429"
+    # The whole channel is held back, including the not-yet-attempted entry.
+    assert all(entry.available_at == clock.now + 7 for entry in entries)
+
+    clock.now += 6
+    assert sender.run_once() is False
+    clock.now += 1
+    assert sender.run_once() is True
+    assert sender.run_once() is True
+    assert list_outbox_entries(db_path) == []
+    assert len(telegram_server.requests) == 3
+
+
+def test_outbox_gives_up_on_client_errors(tmp_path: Path, telegram_server) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    job, result_path = _make_job(tmp_path)
+    clock = FakeClock()
+    telegram_server.responses.append(
+        (400, {"ok": False, "error_code": 400, "description": "chat not found"})
+    )
+
+    enqueue_telegram_delivery(db_path, job, result_path)
+    sender = _make_sender(db_path, clock)
+    sender.run_once()
+
+    entries = list_outbox_entries(db_path)
+    assert entries[0].status == "failed"
+    assert entries[0].last_error == "HTTP 400"
+
+
+def test_outbox_backs_off_when_offline(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    job, result_path = _make_job(tmp_path)
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "super-secret-token")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "123")
+    # Nothing listens on port 9 locally, so the connection is refused.
+    monkeypatch.setenv("TELEGRAM_API_URL", "http://127.0.0.1:9")
+    clock = FakeClock()
+
+    enqueue_telegram_delivery(db_path, job, result_path)
+    sender = _make_sender(db_path, clock)
+    sender.run_once()
+
+    first = list_outbox_entries(db_path)[0]
+    assert first.status == "pending"
+    assert first.attempts == 1
+    assert first.available_at == clock.now + compute_backoff(1)
+    assert "super-secret-token" not in (first.last_error or "")
+
+
+def test_enqueue_skips_without_config(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    job, result_path = _make_job(tmp_path)
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    monkeypatch.delenv("TELEGRAM_CHAT_ID", raising=False)
+
+    assert enqueue_telegram_delivery(db_path, job, result_path) is False
+    assert list_outbox_entries(db_path) == []
+
+
+def test_compute_backoff_is_capped() -> None:
+    assert compute_backoff(1) == 2.0
+    assert compute_backoff(3) == 8.0
+    assert compute_backoff(50) == 300.0
+
+
+def _make_digest_jobs(tmp_path: Path, count: int) -> list[tuple[JobRecord, Path]]:
+    jobs = []
+    for index in range(count):
+        job = JobRecord(
+            id=f"job{index}",
+            filename=f"clip-{index}.wav",
+            status="done",
+            created_at="2024-01-01T00:00:00Z",
+            upload_path=str(tmp_path / "uploads" / f"job{index}" / "clip.wav"),
+            language="en",
+        )
+        result_dir = tmp_path / "results" / job.id
+        result_dir.mkdir(parents=True, exist_ok=True)
+        result_path = result_dir / f"clip-{index}.txt"
+        result_path.write_text(f"text {index}", encoding="utf-8")
+        jobs.append((job, result_path))
+    return jobs
+
+
+def test_digest_coalesces_until_window_closes(
+    tmp_path: Path, telegram_server, monkeypatch
+) -> None:
+    monkeypatch.setenv("TELEGRAM_DIGEST_WINDOW", "3600")
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    clock = FakeClock()
+    for job, result_path in _make_digest_jobs(tmp_path, 3):
+        enqueue_telegram_delivery(db_path, job, result_path)
+
+    entries = list_outbox_entries(db_path)
+    assert len(entries) == 1
+    sender = _make_sender(db_path, clock)
+    # The window is still open relative to wall-clock time.
+    clock.now = entries[0].available_at - 1
+    assert sender.run_once() is False
+
+    clock.now = entries[0].available_at
+    assert sender.run_once() is True
+    paths = [path for path, _body in telegram_server.requests]
+    assert paths == ["/bottoken-12345/sendMessage", "/bottoken-12345/sendDocument"]
+    summary = telegram_server.requests[0][1]
+    assert b"Transcriptions+complete%3A+3" in summary
+    assert b"transcripts-" in telegram_server.requests[1][1]
+    assert list_outbox_entries(db_path) == []
+
+
+def test_digest_flushes_when_full(tmp_path: Path, telegram_server, monkeypatch) -> None:
+    monkeypatch.setenv("TELEGRAM_DIGEST_WINDOW", "3600")
+    monkeypatch.setenv("TELEGRAM_DIGEST_MAX_ITEMS", "2")
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    for job, result_path in _make_digest_jobs(tmp_path, 3):
+        enqueue_telegram_delivery(db_path, job, result_path)
+
+    entries = list_outbox_entries(db_path)
+    assert len(entries) == 2
+    full, open_batch = entries
+    assert len(json.loads(full.payload)["items"]) == 2
+    assert len(json.loads(open_batch.payload)["items"]) == 1
+    assert full.available_at < open_batch.available_at
+
+
+def test_digest_retry_skips_sent_summary(
+    tmp_path: Path, telegram_server, monkeypatch
+) -> None:
+    monkeypatch.setenv("TELEGRAM_DIGEST_WINDOW", "1")
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    clock = FakeClock()
+    for job, result_path in _make_digest_jobs(tmp_path, 2):
+        enqueue_telegram_delivery(db_path, job, result_path)
+    telegram_server.responses.extend(
+        [
+            (200, {"ok": True, "result": {}}),
+            (502, {"ok": False, "error_code": 502}),
+        ]
+    )
+
+    sender = _make_sender(db_path, clock)
+    assert sender.run_once() is True
+    entry = list_outbox_entries(db_path)[0]
+    assert entry.status == "pending"
+    assert json.loads(entry.payload)["summary_sent"] is True
+
+    clock.now = entry.available_at
+    assert sender.run_once() is True
+    paths = [path for path, _body in telegram_server.requests]
+    assert paths == [
+        "/bottoken-12345/sendMessage",
+        "/bottoken-12345/sendDocument",
+        "/bottoken-12345/sendDocument",
+    ]
+
+
+def test_write_digest_archive_dedupes_names(tmp_path: Path) -> None:
+    first = tmp_path / "a" / "talk.txt"
+    second = tmp_path / "b" / "talk.txt"
+    for path in (first, second):
+        path.parent.mkdir(parents=True)
+        path.write_text(path.parent.name, encoding="utf-8")
+    archive = tmp_path / "digest.zip"
+
+    write_digest_archive(archive, [("talk.wav", first), ("talk.wav", second)])
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.namelist() == ["talk.txt", "talk (2).txt"]
+        assert zf.read("talk (2).txt") == b"b"
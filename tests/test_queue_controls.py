@@ -4,9 +4,13 @@ from pathlib import Path
 from mlx_ui.db import (
     JobRecord,
     cancel_running_job,
+    delete_queued_batch,
+    get_batch,
     init_db,
     insert_job,
+    insert_jobs,
     list_jobs,
+    move_batch,
     reorder_queue,
 )
 from mlx_ui.worker import Worker
@@ -59,6 +63,35 @@ def test_reorder_queue_updates_positions(tmp_path: Path) -> None:
     assert positions[reordered[2]] == 3
 
 
+def test_insert_jobs_batches_contiguous_positions(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    init_db(db_path)
+    created_at = "2024-01-01T00:00:00+00:00"
+    insert_job(db_path, _make_job("solo", "solo.wav", created_at, uploads_dir))
+    batch = [
+        _make_job(f"b{index}", f"b{index}.wav", created_at, uploads_dir)
+        for index in range(3)
+    ]
+
+    insert_jobs(db_path, batch, batch_id="batch1")
+
+    jobs = list_jobs(db_path)
+    assert [job.id for job in jobs] == ["solo", "b0", "b1", "b2"]
+    assert [job.queue_position for job in jobs] == [1, 2, 3, 4]
+    assert [job.batch_id for job in jobs] == [None, "batch1", "batch1", "batch1"]
+    record = get_batch(db_path, "batch1")
+    assert record is not None
+    assert record.counts == {"queued": 3}
+
+    assert move_batch(db_path, "batch1", to_front=True) == 3
+    assert [job.id for job in list_jobs(db_path)] == ["b0", "b1", "b2", "solo"]
+
+    removed = delete_queued_batch(db_path, "batch1")
+    assert sorted(job.id for job in removed) == ["b0", "b1", "b2"]
+    assert [job.id for job in list_jobs(db_path)] == ["solo"]
+
+
 def test_reorder_queue_rejects_invalid_ids(tmp_path: Path) -> None:
     db_path = tmp_path / "jobs.db"
     uploads_dir = tmp_path / "uploads"
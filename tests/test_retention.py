@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mlx_ui.db import (
+    JobRecord,
+    init_db,
+    insert_job,
+    list_jobs,
+    record_result_access,
+    retention_usage,
+)
+from mlx_ui.layout import sharded_job_dir
+from mlx_ui.manifest import record_results
+from mlx_ui.retention import RetentionJanitor, RetentionPolicy
+from mlx_ui.settings import resolve_retention_policy
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc).timestamp()
+
+
+def _add_job(
+    tmp_path: Path, job_id: str, completed_at: str, results: dict[str, int]
+) -> None:
+    db_path = tmp_path / "jobs.db"
+    upload_path = sharded_job_dir(tmp_path / "uploads", job_id) / "talk.wav"
+    upload_path.parent.mkdir(parents=True)
+    upload_path.write_bytes(b"audio")
+    insert_job(
+        db_path,
+        JobRecord(
+            id=job_id,
+            filename="talk.wav",
+            status="done",
+            created_at=completed_at,
+            upload_path=str(upload_path),
+            language="en",
+            completed_at=completed_at,
+        ),
+    )
+    job_dir = sharded_job_dir(tmp_path / "results", job_id)
+    job_dir.mkdir(parents=True)
+    for name, size in results.items():
+        (job_dir / name).write_bytes(b"x" * size)
+    record_results(db_path, tmp_path / "results", job_id)
+
+
+def _janitor(tmp_path: Path, policy: RetentionPolicy) -> RetentionJanitor:
+    return RetentionJanitor(
+        tmp_path / "jobs.db",
+        tmp_path / "results",
+        tmp_path / "uploads",
+        policy=lambda: policy,
+        batch_size=2,
+        clock=lambda: NOW,
+    )
+
+
+def test_janitor_removes_expired_and_surplus_jobs(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    for index, day in enumerate((1, 2, 3, 20, 25, 30)):
+        _add_job(tmp_path, f"job{index}aaaa", f"2026-05-{day:02d}T00:00:00+00:00", {})
+
+    report = _janitor(
+        tmp_path, RetentionPolicy(max_age_days=14, max_history=2)
+    ).run_once()
+
+    assert (report.expired, report.over_history) == (3, 1)
+    assert sorted(job.id for job in list_jobs(db_path)) == ["job4aaaa", "job5aaaa"]
+    assert not sharded_job_dir(tmp_path / "results", "job0aaaa").exists()
+    assert not sharded_job_dir(tmp_path / "uploads", "job3aaaa").exists()
+
+
+def test_janitor_trims_then_evicts_least_recently_used(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    for index in range(3):
+        _add_job(
+            tmp_path,
+            f"job{index}bbbb",
+            f"2026-05-0{index + 1}T00:00:00+00:00",
+            {"talk.txt": 100, "talk.srt": 300, "talk.json": 600},
+        )
+    # Downloading the oldest job makes it the most recently used.
+    record_result_access(db_path, "job0bbbb")
+    assert retention_usage(db_path) == (3, 3000)
+
+    report = _janitor(tmp_path, RetentionPolicy(max_results_bytes=2000)).run_once()
+
+    assert (report.trimmed, report.evicted, report.freed_bytes) == (2, 0, 1800)
+    assert retention_usage(db_path) == (3, 1200)
+    trimmed_dir = sharded_job_dir(tmp_path / "results", "job1bbbb")
+    assert sorted(path.name for path in trimmed_dir.iterdir()) == ["talk.txt"]
+
+    report = _janitor(tmp_path, RetentionPolicy(max_results_bytes=150)).run_once()
+
+    assert (report.trimmed, report.evicted) == (1, 2)
+    assert [job.id for job in list_jobs(db_path)] == ["job0bbbb"]
+    assert retention_usage(db_path) == (1, 100)
+
+
+def test_retention_policy_reads_settings_and_env() -> None:
+    file_settings = {
+        "retention_max_age_days": 30,
+        "retention_max_history": 500,
+        "retention_keep_transcripts": False,
+    }
+
+    policy = resolve_retention_policy(
+        file_settings,
+        env={
+            "RETENTION_MAX_HISTORY": "100",
+            "RETENTION_MAX_RESULTS_BYTES": "oops",
+        },
+    )
+
+    assert policy == RetentionPolicy(
+        max_age_days=30,
+        max_results_bytes=0,
+        max_history=100,
+        keep_transcripts=False,
+    )
+    assert resolve_retention_policy({}, env={}) == RetentionPolicy()
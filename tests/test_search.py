@@ -0,0 +1,144 @@
+from pathlib import Path
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from mlx_ui.app import app
+from mlx_ui.db import (
+    JobRecord,
+    index_transcript,
+    init_db,
+    insert_job,
+    list_unindexed_jobs,
+)
+from mlx_ui.search import build_match_query, index_missing_transcripts
+
+
+def _configure_app(tmp_path: Path) -> Path:
+    app.state.base_dir = tmp_path
+    app.state.uploads_dir = tmp_path / "uploads"
+    app.state.results_dir = tmp_path / "results"
+    app.state.db_path = tmp_path / "jobs.db"
+    app.state.worker_enabled = False
+    app.state.update_check_enabled = False
+    init_db(app.state.db_path)
+    return app.state.db_path
+
+
+def _insert_done_job(db_path: Path, job_id: str, filename: str) -> None:
+    insert_job(
+        db_path,
+        JobRecord(
+            id=job_id,
+            filename=filename,
+            status="done",
+            created_at="2024-01-01T00:00:00+00:00",
+            completed_at="2024-01-01T00:05:00+00:00",
+            upload_path=f"/tmp/{filename}",
+            language="en",
+        ),
+    )
+
+
+def test_build_match_query_never_passes_operators_through() -> None:
+    assert build_match_query("  ") is None
+    assert build_match_query('Kenobi "high ground"') == '"Kenobi" "high ground"'
+    assert build_match_query("gen* NOT OR(") == '"gen"* "NOT" "OR("'
+    assert build_match_query('say "hi') == '"say" "hi"'
+
+
+def test_search_ranks_highlights_and_pages(tmp_path: Path) -> None:
+    db_path = _configure_app(tmp_path)
+    _insert_done_job(db_path, "job-a", "standup.m4a")
+    _insert_done_job(db_path, "job-b", "retro.m4a")
+    _insert_done_job(db_path, "job-c", "lunch.m4a")
+    index_transcript(
+        db_path, "job-a", "standup.m4a", "Kenobi mentioned once <b>here</b>."
+    )
+    index_transcript(
+        db_path, "job-b", "retro.m4a", "Kenobi, Kenobi and again Kenobi said hello."
+    )
+    index_transcript(db_path, "job-c", "lunch.m4a", "Nothing relevant at all.")
+
+    with TestClient(app) as client:
+        first = client.get("/api/search?q=kenobi&per_page=1").json()
+        second = client.get("/api/search?q=kenobi&per_page=1&page=2").json()
+        prefix = client.get("/api/search?q=ken*").json()
+        empty = client.get("/api/search?q=%22%22").json()
+        client.delete("/api/history/job-b")
+        after_delete = client.get("/api/search?q=kenobi").json()
+
+    assert first["total"] == 2
+    assert [hit["job_id"] for hit in first["results"]] == ["job-b"]
+    assert first["results"][0]["snippet"].startswith("<mark>Kenobi</mark>, ")
+    assert [hit["job_id"] for hit in second["results"]] == ["job-a"]
+    assert second["results"][0]["snippet"] == (
+        "<mark>Kenobi</mark> mentioned once &lt;b&gt;here&lt;/b&gt;."
+    )
+    assert prefix["total"] == 2
+    assert empty == {
+        "query": '""',
+        "total": 0,
+        "page": 1,
+        "per_page": 20,
+        "results": [],
+    }
+    assert [hit["job_id"] for hit in after_delete["results"]] == ["job-a"]
+
+
+def test_index_missing_transcripts_backfills_results(tmp_path: Path) -> None:
+    db_path = _configure_app(tmp_path)
+    for index in range(5):
+        _insert_done_job(db_path, f"job-{index}", f"call-{index}.wav")
+        job_dir = tmp_path / "results" / f"job-{index}"
+        job_dir.mkdir(parents=True)
+        (job_dir / f"call-{index}.txt").write_text(
+            f"transcript number {index}", encoding="utf-8"
+        )
+
+    assert index_missing_transcripts(db_path, tmp_path / "results", batch_size=2) == 5
+    assert list_unindexed_jobs(db_path, 10) == []
+    with TestClient(app) as client:
+        response = client.get("/api/search?q=number")
+    assert response.json()["total"] == 5
+
+
+def test_index_missing_transcripts_skips_past_corrupt_results(tmp_path: Path) -> None:
+    db_path = _configure_app(tmp_path)
+    for index, payload in enumerate([b"\x1f\x8b\x08garbage", b"readable words"]):
+        _insert_done_job(db_path, f"job-{index}", f"call-{index}.wav")
+        job_dir = tmp_path / "results" / f"job-{index}"
+        job_dir.mkdir(parents=True)
+        if index == 0:
+            (job_dir / "call-0.txt.gz").write_bytes(payload)
+        else:
+            (job_dir / "call-1.txt").write_bytes(payload)
+
+    assert index_missing_transcripts(db_path, tmp_path / "results") == 2
+    assert list_unindexed_jobs(db_path, 10) == []
+    with TestClient(app) as client:
+        response = client.get("/api/search?q=readable")
+    assert response.json()["total"] == 1
+
+
+def test_search_total_ignores_entries_without_a_job(tmp_path: Path) -> None:
+    db_path = _configure_app(tmp_path)
+    _insert_done_job(db_path, "job-a", "standup.m4a")
+    _insert_done_job(db_path, "job-b", "retro.m4a")
+    index_transcript(db_path, "job-a", "standup.m4a", "Kenobi was here.")
+    index_transcript(db_path, "job-b", "retro.m4a", "Kenobi again.")
+    # An entry left behind by a job row removed outside delete_history_jobs.
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("DELETE FROM jobs WHERE id = 'job-b'")
+
+    assert index_transcript(db_path, "job-gone", "gone.m4a", "Kenobi, deleted.")
+    with TestClient(app) as client:
+        response = client.get("/api/search?q=kenobi").json()
+
+    assert response["total"] == 1
+    assert [hit["job_id"] for hit in response["results"]] == ["job-a"]
+    with sqlite3.connect(db_path) as connection:
+        documents = connection.execute(
+            "SELECT job_id FROM transcript_documents ORDER BY job_id"
+        ).fetchall()
+    assert documents == [("job-a",), ("job-b",)]
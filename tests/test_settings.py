@@ -0,0 +1,89 @@
+import json
+import os
+from pathlib import Path
+
+from mlx_ui import settings
+from mlx_ui.settings import (
+    get_settings_path,
+    read_cached_settings,
+    update_settings_file,
+)
+from mlx_ui.telegram import read_telegram_config
+
+
+def _count_reads(monkeypatch) -> list[Path]:  # type: ignore[no-untyped-def]
+    calls: list[Path] = []
+    original = settings.read_settings_file
+
+    def counting_read(path: Path) -> dict[str, object]:
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(settings, "read_settings_file", counting_read)
+    return calls
+
+
+def _write_external(path: Path, data: dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".external")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def test_cached_settings_reads_file_once(tmp_path: Path, monkeypatch) -> None:
+    _write_external(get_settings_path(tmp_path), {"whisper_model": "base"})
+    calls = _count_reads(monkeypatch)
+
+    for _ in range(5):
+        assert read_cached_settings(tmp_path)["whisper_model"] == "base"
+
+    assert len(calls) == 1
+
+
+def test_cached_settings_reloads_after_external_change(tmp_path: Path) -> None:
+    path = get_settings_path(tmp_path)
+    _write_external(path, {"log_level": "DEBUG"})
+    assert read_cached_settings(tmp_path)["log_level"] == "DEBUG"
+
+    _write_external(path, {"log_level": "ERROR"})
+
+    assert read_cached_settings(tmp_path)["log_level"] == "ERROR"
+
+
+def test_cached_settings_handles_missing_file(tmp_path: Path) -> None:
+    path = get_settings_path(tmp_path)
+    _write_external(path, {"wtm_quick": True})
+    assert read_cached_settings(tmp_path) == {"wtm_quick": True}
+
+    path.unlink()
+
+    assert read_cached_settings(tmp_path) == {}
+
+
+def test_update_settings_file_refreshes_cache(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    monkeypatch.delenv("TELEGRAM_CHAT_ID", raising=False)
+    read_cached_settings(tmp_path)
+    update_settings_file(
+        tmp_path,
+        {"telegram_token": "token-1", "telegram_chat_id": "42", "whisper_model": ""},
+    )
+    calls = _count_reads(monkeypatch)
+
+    cached = read_cached_settings(tmp_path)
+    config = read_telegram_config(tmp_path)
+
+    assert calls == []
+    assert cached == {"telegram_token": "token-1", "telegram_chat_id": "42"}
+    assert config is not None
+    assert config.chat_id == "42"
+
+
+def test_cached_settings_returns_copies(tmp_path: Path) -> None:
+    update_settings_file(tmp_path, {"output_formats": ["txt", "srt"]})
+
+    first = read_cached_settings(tmp_path)
+    first["output_formats"].append("vtt")
+    first["wtm_quick"] = True
+
+    assert read_cached_settings(tmp_path) == {"output_formats": ["txt", "srt"]}
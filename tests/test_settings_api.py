@@ -4,6 +4,7 @@ from pathlib import Path
 from fastapi.testclient import TestClient
 
 from mlx_ui.app import app
+from mlx_ui.trash import get_deletion_manager
 
 
 def _configure_app(tmp_path: Path) -> None:
@@ -114,7 +115,56 @@ def test_clear_storage_paths(tmp_path: Path) -> None:
         upload_resp = client.post("/api/settings/clear-uploads")
         results_resp = client.post("/api/settings/clear-results")
 
-    assert upload_resp.status_code == 200
-    assert results_resp.status_code == 200
+    assert upload_resp.status_code == 202
+    assert results_resp.status_code == 202
+    for response in (upload_resp, results_resp):
+        assert get_deletion_manager().wait(response.json()["task"]["id"], timeout=10)
     assert list(uploads_dir.iterdir()) == []
     assert list(results_dir.iterdir()) == []
+
+
+def test_settings_accepts_telegram_digest(tmp_path: Path, monkeypatch) -> None:
+    _configure_app(tmp_path)
+    monkeypatch.delenv("TELEGRAM_DIGEST_WINDOW", raising=False)
+    monkeypatch.delenv("TELEGRAM_DIGEST_MAX_ITEMS", raising=False)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/settings",
+            json={"telegram_digest_window": 60, "telegram_digest_max_items": 25},
+        )
+        invalid = client.post("/api/settings", json={"telegram_digest_max_items": 0})
+        page = client.get("/")
+
+    assert response.status_code == 200
+    assert invalid.status_code == 422
+    settings_path = tmp_path / "data" / "settings.json"
+    persisted = json.loads(settings_path.read_text(encoding="utf-8"))
+    assert persisted["telegram_digest_window"] == 60
+    assert persisted["telegram_digest_max_items"] == 25
+    assert 'name="telegram_digest_window"' in page.text
+    assert 'value="60"' in page.text
+
+
+def test_settings_accepts_language_routing(tmp_path: Path, monkeypatch) -> None:
+    _configure_app(tmp_path)
+    monkeypatch.delenv("WHISPER_LANGUAGE_MODELS", raising=False)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/settings",
+            json={"whisper_language_models": {"EN": "small.en", "de": "medium"}},
+        )
+        invalid = client.post(
+            "/api/settings",
+            json={"whisper_language_models": {"english": "../model"}},
+        )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["settings"]["whisper_language_models"] == {
+        "en": "small.en",
+        "de": "medium",
+    }
+    assert payload["sources"]["whisper_language_models"] == "file"
+    assert invalid.status_code == 422
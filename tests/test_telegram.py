@@ -1,28 +1,15 @@
 import logging
 from pathlib import Path
-import urllib.error
-import urllib.request
 
 from mlx_ui.db import JobRecord
-from mlx_ui.telegram import maybe_send_telegram, mask_secret
-
-
-class DummyResponse:
-    def __init__(self, status: int = 200, body: bytes | None = None) -> None:
-        self._status = status
-        self._body = body or b"ok"
-
-    def read(self) -> bytes:
-        return self._body
-
-    def getcode(self) -> int:
-        return self._status
-
-    def __enter__(self) -> "DummyResponse":
-        return self
-
-    def __exit__(self, exc_type, exc, tb) -> bool:  # type: ignore[no-untyped-def]
-        return False
+from mlx_ui.telegram import (
+    MultipartBody,
+    TelegramClient,
+    mask_secret,
+    maybe_send_telegram,
+    read_telegram_config,
+    send_telegram_document,
+)
 
 
 def _make_job(tmp_path: Path) -> tuple[JobRecord, Path]:
@@ -45,49 +32,29 @@ def _make_job(tmp_path: Path) -> tuple[JobRecord, Path]:
     return job, txt_path
 
 
-def test_maybe_send_telegram_success(monkeypatch, tmp_path: Path) -> None:
+def test_maybe_send_telegram_success(tmp_path: Path, telegram_server) -> None:
     job, result_path = _make_job(tmp_path)
-    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token-12345")
-    monkeypatch.setenv("TELEGRAM_CHAT_ID", "123")
-
-    requests: list[tuple[urllib.request.Request, float]] = []
-
-    def fake_urlopen(request, timeout=0):  # type: ignore[no-untyped-def]
-        requests.append((request, float(timeout)))
-        return DummyResponse()
-
-    monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
 
     maybe_send_telegram(job, result_path, timeout=2.5)
 
-    assert len(requests) == 2
-    assert requests[0][1] == 2.5
-    assert requests[1][1] == 2.5
-    assert requests[0][0].full_url.endswith("/sendMessage")
-    assert requests[1][0].full_url.endswith("/sendDocument")
-    assert b"chat_id=123" in requests[0][0].data
-    assert b"Transcription+complete%3A" in requests[0][0].data
-    assert b"chat_id" in requests[1][0].data
-    assert result_path.name.encode("utf-8") in requests[1][0].data
+    requests = telegram_server.requests
+    assert len(requests) == 1
+    assert requests[0][0].endswith("/sendDocument")
+    assert b'name="chat_id"\r\n\r\n123\r\n' in requests[0][1]
+    assert b"Transcription complete: sample.wav" in requests[0][1]
+    assert result_path.name.encode("utf-8") in requests[0][1]
 
 
-def test_maybe_send_telegram_skips_without_config(monkeypatch, tmp_path: Path) -> None:
+def test_maybe_send_telegram_skips_without_config(
+    monkeypatch, tmp_path: Path, telegram_server
+) -> None:
     job, result_path = _make_job(tmp_path)
     monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
     monkeypatch.delenv("TELEGRAM_CHAT_ID", raising=False)
 
-    called = False
-
-    def fake_urlopen(request, timeout=0):  # type: ignore[no-untyped-def]
-        nonlocal called
-        called = True
-        return DummyResponse()
-
-    monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
-
     maybe_send_telegram(job, result_path)
 
-    assert called is False
+    assert telegram_server.requests == []
 
 
 def test_maybe_send_telegram_failure_logs_masked_token(
@@ -96,11 +63,7 @@ def test_maybe_send_telegram_failure_logs_masked_token(
     job, result_path = _make_job(tmp_path)
     monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "super-secret-token")
     monkeypatch.setenv("TELEGRAM_CHAT_ID", "123")
-
-    def fake_urlopen(request, timeout=0):  # type: ignore[no-untyped-def]
-        raise urllib.error.URLError("connection refused")
-
-    monkeypatch.setattr(urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setenv("TELEGRAM_API_URL", "http://127.0.0.1:9")
 
     caplog.set_level(logging.WARNING, logger="mlx_ui.telegram")
 
@@ -108,3 +71,52 @@ def test_maybe_send_telegram_failure_logs_masked_token(
 
     assert "super-secret-token" not in caplog.text
     assert mask_secret("super-secret-token") in caplog.text
+
+
+def test_client_reuses_connection(tmp_path: Path, telegram_server) -> None:
+    _job, result_path = _make_job(tmp_path)
+    config = read_telegram_config(tmp_path)
+    assert config is not None
+    client = TelegramClient()
+    try:
+        for _ in range(3):
+            send_telegram_document(config, result_path, client=client)
+    finally:
+        client.close()
+
+    assert len(telegram_server.requests) == 3
+    assert len(set(telegram_server.client_ports)) == 1
+
+
+def test_multipart_body_streams_file_in_chunks(tmp_path: Path) -> None:
+    payload = bytes(range(256)) * 1024
+    file_path = tmp_path / "large.txt"
+    file_path.write_bytes(payload)
+
+    body = MultipartBody(
+        {"chat_id": "123"},
+        {"document": ("large.txt", file_path, "text/plain")},
+        chunk_size=4096,
+    )
+    chunks = list(body.iter_chunks())
+
+    assert max(len(chunk) for chunk in chunks) <= 4096
+    encoded = b"".join(chunks)
+    assert len(encoded) == body.content_length
+    assert payload in encoded
+    assert encoded.endswith(f"--{body.boundary}--\r\n".encode("utf-8"))
+
+
+def test_send_document_uploads_large_file(tmp_path: Path, telegram_server) -> None:
+    payload = b"x" * (1024 * 1024 + 17)
+    file_path = tmp_path / "large.txt"
+    file_path.write_bytes(payload)
+    config = read_telegram_config(tmp_path)
+    assert config is not None
+
+    send_telegram_document(config, file_path, caption="done")
+
+    path, body = telegram_server.requests[0]
+    assert path == "/bottoken-12345/sendDocument"
+    assert payload in body
+    assert b'name="caption"\r\n\r\ndone\r\n' in body
@@ -1,9 +1,18 @@
 from datetime import datetime, timezone
 from pathlib import Path
 import subprocess
+import sys
+import types
 
+from mlx_ui.compression import open_text
 from mlx_ui.db import JobRecord
-from mlx_ui.transcriber import WtmTranscriber
+from mlx_ui.layout import resolve_job_dir
+from mlx_ui.transcriber import WhisperTranscriber, WtmTranscriber
+
+
+def _read(path: Path) -> str:
+    with open_text(path) as handle:
+        return handle.read()
 
 
 def _make_job(tmp_path: Path) -> JobRecord:
@@ -39,13 +48,13 @@ def test_wtm_transcriber_runs_and_returns_txt(tmp_path: Path, monkeypatch) -> No
     result_path = transcriber.transcribe(job, results_dir)
 
     assert result_path.is_file()
-    assert result_path.read_text(encoding="utf-8") == "hello\n"
+    assert _read(result_path) == "hello\n"
     assert captured["cmd"][0] == "wtm"
     assert "--path_audio" in captured["cmd"]
     assert "--any_lang=True" in captured["cmd"]
     assert "--quick=False" in captured["cmd"]
     assert str(Path(job.upload_path)) in captured["cmd"]
-    assert (results_dir / job.id / "sample.txt").is_file()
+    assert (resolve_job_dir(results_dir, job.id) / "sample.txt.gz").is_file()
 
 
 def test_wtm_transcriber_respects_quick_env(tmp_path: Path, monkeypatch) -> None:
@@ -64,3 +73,173 @@ def test_wtm_transcriber_respects_quick_env(tmp_path: Path, monkeypatch) -> None
     transcriber.transcribe(job, results_dir)
 
     assert "--quick=True" in captured["cmd"]
+
+
+def test_whisper_transcriber_keeps_models_resident(tmp_path: Path, monkeypatch) -> None:
+    job = _make_job(tmp_path)
+    loads: list[str] = []
+
+    class FakeModel:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def transcribe(self, path, fp16, language):  # type: ignore[no-untyped-def]
+            return {"text": f"from {self.name} ({language})"}
+
+    def load_model(name, device, download_root):  # type: ignore[no-untyped-def]
+        loads.append(name)
+        return FakeModel(name)
+
+    monkeypatch.setitem(
+        sys.modules, "whisper", types.SimpleNamespace(load_model=load_model)
+    )
+    monkeypatch.setenv("WHISPER_CACHE_DIR", str(tmp_path / "cache"))
+
+    transcriber = WhisperTranscriber(model_name="small", max_resident_models=2)
+    transcriber.transcribe(job, tmp_path / "results")
+    transcriber.configure(model_name="large-v3")
+    result_path = transcriber.transcribe(job, tmp_path / "results")
+    assert _read(result_path) == "from large-v3 (fr)\n"
+    transcriber.configure(model_name="small")
+    transcriber.transcribe(job, tmp_path / "results")
+    transcriber.configure(model_name="base")
+    transcriber.transcribe(job, tmp_path / "results")
+
+    assert loads == ["small", "large-v3", "base"]
+    assert transcriber.loaded_models == ["small", "base"]
+
+
+def test_whisper_transcriber_uses_job_options(tmp_path: Path, monkeypatch) -> None:
+    job = _make_job(tmp_path)
+    job.model = "small"
+    job.language = "any"
+    calls: list[tuple[str, str | None]] = []
+
+    class FakeModel:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def transcribe(self, path, fp16, language):  # type: ignore[no-untyped-def]
+            calls.append((self.name, language))
+            return {
+                "text": " hi",
+                "language": "en",
+                "segments": [{"id": 0, "start": 0.0, "end": 0.8, "text": " hi"}],
+            }
+
+    monkeypatch.setitem(
+        sys.modules,
+        "whisper",
+        types.SimpleNamespace(load_model=lambda name, **_kwargs: FakeModel(name)),
+    )
+    monkeypatch.setenv("WHISPER_CACHE_DIR", str(tmp_path / "cache"))
+
+    transcriber = WhisperTranscriber(model_name="large-v3")
+    job.output_formats = ["txt", "srt"]
+    transcriber.transcribe(job, tmp_path / "results")
+
+    assert calls == [("small", None)]
+    job_dir = resolve_job_dir(tmp_path / "results", job.id)
+    srt = _read(job_dir / "sample.srt.gz")
+    assert srt == "1\n00:00:00,000 --> 00:00:00,800\nhi\n\n"
+    assert transcriber.model_name == "large-v3"
+    assert transcriber.loaded_models == ["small"]
+
+
+def test_wtm_transcriber_uses_job_options(tmp_path: Path, monkeypatch) -> None:
+    job = _make_job(tmp_path)
+    job.language = "en"
+    job.quick = True
+    captured: dict[str, list[str]] = {}
+
+    def fake_run(cmd, capture_output, text, check):  # type: ignore[no-untyped-def]
+        captured["cmd"] = list(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="hello", stderr="")
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+
+    WtmTranscriber(wtm_path="wtm", quick=False).transcribe(job, tmp_path / "results")
+
+    assert "--any_lang=False" in captured["cmd"]
+    assert "--quick=True" in captured["cmd"]
+
+
+def test_whisper_transcriber_skips_language_id_without_routes(
+    tmp_path: Path, monkeypatch
+) -> None:
+    job = _make_job(tmp_path)
+    job.language = "any"
+    calls: list[str] = []
+
+    def load_model(name, **_kwargs):  # type: ignore[no-untyped-def]
+        calls.append(f"load {name}")
+        raise AssertionError("no model should be loaded")
+
+    monkeypatch.setitem(
+        sys.modules, "whisper", types.SimpleNamespace(load_model=load_model)
+    )
+    monkeypatch.setattr(
+        "mlx_ui.transcriber.load_audio",
+        lambda path, seconds=None: calls.append("decode") or [0.0],
+    )
+
+    transcriber = WhisperTranscriber(model_name="large-v3", language_models={})
+
+    assert transcriber.detect_language(job) is None
+    assert calls == []
+
+
+def test_whisper_transcriber_routes_detected_language(
+    tmp_path: Path, monkeypatch
+) -> None:
+    job = _make_job(tmp_path)
+    job.language = "any"
+    calls: list[tuple[str, str | None]] = []
+
+    class FakeMel:
+        def to(self, device):  # type: ignore[no-untyped-def]
+            return self
+
+    class FakeModel:
+        dims = types.SimpleNamespace(n_mels=80)
+        device = "cpu"
+
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def detect_language(self, mel):  # type: ignore[no-untyped-def]
+            calls.append((self.name, "detect"))
+            return None, {"en": 0.9, "de": 0.1}
+
+        def transcribe(self, path, fp16, language):  # type: ignore[no-untyped-def]
+            calls.append((self.name, language))
+            return {
+                "text": " hi",
+                "language": "en",
+                "segments": [{"id": 0, "start": 0.0, "end": 0.8, "text": " hi"}],
+            }
+
+    fake_whisper = types.SimpleNamespace(
+        load_model=lambda name, **_kwargs: FakeModel(name),
+        pad_or_trim=lambda audio: audio,
+        log_mel_spectrogram=lambda audio, n_mels: FakeMel(),
+    )
+    monkeypatch.setitem(sys.modules, "whisper", fake_whisper)
+    monkeypatch.setenv("WHISPER_CACHE_DIR", str(tmp_path / "cache"))
+    decoded: list[float | None] = []
+    monkeypatch.setattr(
+        "mlx_ui.transcriber.load_audio",
+        lambda path, seconds=None: decoded.append(seconds) or [0.0],
+    )
+
+    transcriber = WhisperTranscriber(
+        model_name="large-v3",
+        language_models={"en": "small.en"},
+    )
+    language = transcriber.detect_language(job)
+    job.language = language
+    transcriber.transcribe(job, tmp_path / "results")
+
+    assert language == "en"
+    assert decoded == [30]
+    assert calls == [("large-v3", "detect"), ("small.en", "en")]
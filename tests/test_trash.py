@@ -0,0 +1,110 @@
+from pathlib import Path
+import threading
+
+from fastapi.testclient import TestClient
+
+from mlx_ui.app import app
+from mlx_ui.db import JobRecord, init_db, insert_job, list_jobs
+from mlx_ui.layout import sharded_job_dir
+from mlx_ui.trash import (
+    TRASH_DIRNAME,
+    DeletionManager,
+    DeletionTask,
+    get_deletion_manager,
+    move_to_trash,
+)
+
+
+def test_discard_empties_the_trash_in_the_background(tmp_path: Path) -> None:
+    job_dir = tmp_path / "job-1"
+    job_dir.mkdir()
+    (job_dir / "talk.txt").write_text("hello", encoding="utf-8")
+    manager = DeletionManager(workers=1)
+
+    # Left in the trash as if by a run that stopped before emptying it.
+    moved = move_to_trash(job_dir, tmp_path)
+    assert not job_dir.exists()
+    assert moved.parent == tmp_path / TRASH_DIRNAME
+    assert (moved / "talk.txt").read_text(encoding="utf-8") == "hello"
+
+    other = tmp_path / "upload.wav"
+    other.write_bytes(b"data")
+    assert manager.collect(tmp_path) == 1
+    task = manager.submit(
+        "uploads", lambda manager, task: manager.discard(other, tmp_path, task)
+    )
+    assert manager.wait(task.id, timeout=10)
+    manager.shutdown()
+
+    assert list(tmp_path.iterdir()) == []
+    snapshot = manager.get(task.id)
+    assert snapshot is not None
+    assert snapshot.status == "done"
+    assert snapshot.collecting == 0
+
+
+def test_submit_reuses_the_running_task_of_a_kind(tmp_path: Path) -> None:
+    manager = DeletionManager(workers=1)
+    release = threading.Event()
+
+    def blocked(manager: DeletionManager, task: DeletionTask) -> None:
+        task.total = 3
+        release.wait(10)
+
+    def broken(manager: DeletionManager, task: DeletionTask) -> None:
+        raise RuntimeError("boom")
+
+    first = manager.submit("history", blocked)
+    assert manager.submit("history", blocked).id == first.id
+    other = manager.submit("results", broken)
+    assert manager.wait(other.id, timeout=10)
+    assert manager.get(other.id).status == "failed"
+    assert manager.get(first.id).status == "running"
+
+    release.set()
+    assert manager.wait(first.id, timeout=10)
+    assert manager.get(first.id).status == "done"
+    assert manager.get(first.id).total == 3
+    assert manager.get("missing") is None
+    manager.shutdown()
+
+
+def test_clear_history_runs_as_a_background_task(tmp_path: Path) -> None:
+    app.state.base_dir = tmp_path
+    app.state.uploads_dir = tmp_path / "uploads"
+    app.state.results_dir = tmp_path / "results"
+    app.state.db_path = tmp_path / "jobs.db"
+    app.state.worker_enabled = False
+    app.state.update_check_enabled = False
+    db_path = Path(app.state.db_path)
+    init_db(db_path)
+    results_dir = Path(app.state.results_dir)
+    for index in range(5):
+        job_id = f"{index:02d}ab{index}"
+        insert_job(
+            db_path,
+            JobRecord(
+                id=job_id,
+                filename=f"talk-{index}.wav",
+                status="done",
+                created_at="2026-01-01T00:00:00+00:00",
+                upload_path=str(tmp_path / "uploads" / job_id / "talk.wav"),
+                language="any",
+                completed_at="2026-01-01T00:01:00+00:00",
+            ),
+        )
+        job_dir = sharded_job_dir(results_dir, job_id)
+        job_dir.mkdir(parents=True)
+        (job_dir / "talk.txt").write_text("hello", encoding="utf-8")
+
+    with TestClient(app) as client:
+        task = client.post("/api/history/clear").json()["task"]
+        assert get_deletion_manager().wait(task["id"], timeout=10)
+        progress = client.get(f"/api/deletions/{task['id']}").json()
+        missing = client.get("/api/deletions/unknown")
+
+    assert progress["kind"] == "history"
+    assert (progress["total"], progress["deleted"], progress["failed"]) == (5, 5, 0)
+    assert missing.status_code == 404
+    assert list_jobs(db_path) == []
+    assert list(results_dir.iterdir()) == []
@@ -0,0 +1,124 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from mlx_ui import upload_sessions
+from mlx_ui.layout import sharded_job_dir
+from mlx_ui.upload_sessions import UploadSessionError, UploadSessionStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _chunks(*parts: bytes):  # type: ignore[no-untyped-def]
+    for part in parts:
+        yield part
+
+
+def test_chunks_past_the_end_are_rejected(tmp_path: Path) -> None:
+    store = UploadSessionStore(tmp_path, ttl=60)
+    session = store.create("clip.wav", 4)
+
+    with pytest.raises(UploadSessionError) as excinfo:
+        asyncio.run(store.write_chunk(session.id, 2, _chunks(b"abc")))
+
+    assert excinfo.value.status_code == 416
+    assert store.get(session.id).ranges == []
+
+
+def test_interrupted_chunk_keeps_received_bytes(tmp_path: Path) -> None:
+    store = UploadSessionStore(tmp_path, ttl=60)
+    session = store.create("clip.wav", 8)
+
+    async def dropped():  # type: ignore[no-untyped-def]
+        yield b"abc"
+        raise ConnectionResetError
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(store.write_chunk(session.id, 0, dropped()))
+
+    assert store.get(session.id).committed == 3
+
+
+def _allocator(uploads_dir: Path, calls: list[str]):  # type: ignore[no-untyped-def]
+    def allocate(filename: str) -> tuple[str, Path]:
+        job_id = f"ab{len(calls):02d}job"
+        calls.append(job_id)
+        job_dir = sharded_job_dir(uploads_dir, job_id)
+        job_dir.mkdir(parents=True)
+        return job_id, job_dir / filename
+
+    return allocate
+
+
+def test_concurrent_finalize_allocates_once(tmp_path: Path) -> None:
+    store = UploadSessionStore(tmp_path, ttl=60)
+    session = store.create("clip.wav", 4)
+    asyncio.run(store.write_chunk(session.id, 0, _chunks(b"abcd")))
+    calls: list[str] = []
+    allocate = _allocator(tmp_path, calls)
+
+    async def finalize_twice():  # type: ignore[no-untyped-def]
+        return await asyncio.gather(
+            store.finalize(session.id, allocate),
+            store.finalize(session.id, allocate),
+            return_exceptions=True,
+        )
+
+    outcomes = asyncio.run(finalize_twice())
+
+    errors = [item for item in outcomes if isinstance(item, BaseException)]
+    assert len(calls) == 1
+    assert len(errors) == 1
+    assert isinstance(errors[0], UploadSessionError)
+    assert errors[0].status_code == 409
+    (_, _, destination, _) = next(
+        item for item in outcomes if not isinstance(item, BaseException)
+    )
+    assert destination.read_bytes() == b"abcd"
+
+
+def test_failed_finalize_releases_its_allocation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = UploadSessionStore(tmp_path, ttl=60)
+    session = store.create("clip.wav", 4)
+    asyncio.run(store.write_chunk(session.id, 0, _chunks(b"abcd")))
+    calls: list[str] = []
+
+    def broken_replace(source: Path, target: Path) -> None:
+        raise OSError("disk went away")
+
+    monkeypatch.setattr(upload_sessions.os, "replace", broken_replace)
+    with pytest.raises(OSError):
+        asyncio.run(store.finalize(session.id, _allocator(tmp_path, calls)))
+    monkeypatch.undo()
+
+    assert calls == ["ab00job"]
+    assert [path.name for path in tmp_path.iterdir()] == [store.root.name]
+    # The session is intact, so finalizing again succeeds.
+    _, _, destination, _ = asyncio.run(
+        store.finalize(session.id, _allocator(tmp_path, calls))
+    )
+    assert destination.read_bytes() == b"abcd"
+
+
+def test_expire_removes_idle_sessions(tmp_path: Path) -> None:
+    clock = FakeClock()
+    store = UploadSessionStore(tmp_path, ttl=60, clock=clock)
+    idle = store.create("idle.wav", 4)
+    clock.now += 50
+    active = store.create("active.wav", 4)
+    asyncio.run(store.write_chunk(active.id, 0, _chunks(b"ab")))
+
+    clock.now += 20
+
+    assert store.expire() == 1
+    assert not (store.root / idle.id).exists()
+    assert store.get(active.id).committed == 2
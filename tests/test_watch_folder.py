@@ -0,0 +1,167 @@
+import hashlib
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+from mlx_ui import watch_folder
+from mlx_ui.db import init_db, list_jobs
+from mlx_ui.watch_folder import (
+    WatchFolderConfig,
+    WatchFolderIngester,
+    _Inotify,
+    read_watch_folder_config,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_ingester(
+    tmp_path: Path, mode: str = "move"
+) -> tuple[WatchFolderIngester, FakeClock]:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    clock = FakeClock()
+    config = WatchFolderConfig(path=tmp_path / "inbox", mode=mode, stable_seconds=5)
+    config.path.mkdir(exist_ok=True)
+    ingester = WatchFolderIngester(
+        db_path,
+        tmp_path / "uploads",
+        config,
+        use_inotify=False,
+        clock=clock,
+    )
+    return ingester, clock
+
+
+def test_watch_folder_waits_for_stable_files(tmp_path: Path) -> None:
+    ingester, clock = _make_ingester(tmp_path)
+    source = ingester.config.path / "memo.wav"
+    source.write_bytes(b"part")
+    (ingester.config.path / "next.wav.part").write_bytes(b"partial")
+
+    assert ingester.scan() == []
+    source.write_bytes(b"partial memo")
+    os.utime(source, ns=(1, 1))
+    clock.now += 5
+    # Changed since the last look, so the stability window restarts.
+    assert ingester.scan() == []
+    clock.now += 4
+    assert ingester.scan() == []
+    clock.now += 1
+
+    [job] = ingester.scan()
+
+    assert job.filename == "memo.wav"
+    assert job.language == "any"
+    assert job.sha256 == hashlib.sha256(b"partial memo").hexdigest()
+    assert Path(job.upload_path).read_bytes() == b"partial memo"
+    assert not source.exists()
+    assert [stored.id for stored in list_jobs(ingester.db_path)] == [job.id]
+
+
+def test_watch_folder_link_mode_survives_restart(tmp_path: Path) -> None:
+    ingester, clock = _make_ingester(tmp_path, mode="link")
+    source = ingester.config.path / "memo.wav"
+    source.write_bytes(b"audio")
+    ingester.scan()
+    clock.now += 5
+    [job] = ingester.scan()
+    assert os.stat(job.upload_path).st_ino == source.stat().st_ino
+
+    restarted, restarted_clock = _make_ingester(tmp_path, mode="link")
+    restarted.scan()
+    restarted_clock.now += 5
+
+    assert restarted.scan() == []
+    assert source.exists()
+    assert len(list_jobs(ingester.db_path)) == 1
+
+
+def test_watch_folder_link_mode_skips_handled_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ingester, clock = _make_ingester(tmp_path, mode="link")
+    source = ingester.config.path / "memo.wav"
+    source.write_bytes(b"audio")
+    ingester.scan()
+    clock.now += 5
+    [first] = ingester.scan()
+    lookups: list[str] = []
+    monkeypatch.setattr(
+        watch_folder,
+        "has_watch_ingest",
+        lambda db_path, key: lookups.append(key) or False,
+    )
+
+    for _ in range(3):
+        clock.now += 5
+        assert ingester.scan() == []
+
+    assert lookups == []
+    assert ingester._state.candidates == {}
+    source.write_bytes(b"audio, longer")
+    ingester.scan()
+    clock.now += 5
+    [second] = ingester.scan()
+    assert second.id != first.id
+    assert len(lookups) == 1
+
+
+def test_watch_folder_removes_source_left_by_interrupted_move(
+    tmp_path: Path,
+) -> None:
+    ingester, clock = _make_ingester(tmp_path, mode="link")
+    source = ingester.config.path / "memo.wav"
+    source.write_bytes(b"audio")
+    ingester.scan()
+    clock.now += 5
+    ingester.scan()
+
+    restarted, restarted_clock = _make_ingester(tmp_path, mode="move")
+    restarted.scan()
+    restarted_clock.now += 5
+
+    assert restarted.scan() == []
+    assert not source.exists()
+    assert len(list_jobs(ingester.db_path)) == 1
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_watch_folder_waits_for_writer_to_close(tmp_path: Path) -> None:
+    ingester, clock = _make_ingester(tmp_path)
+    inotify = _Inotify.open(ingester.config.path)
+    assert inotify is not None
+    source = ingester.config.path / "memo.wav"
+    try:
+        with source.open("wb") as writer:
+            writer.write(b"audio")
+            writer.flush()
+            ingester.handle_events(inotify.read_events())
+            ingester.scan()
+            clock.now += 60
+            assert ingester.scan() == []
+        ingester.handle_events(inotify.read_events())
+    finally:
+        inotify.close()
+
+    assert len(ingester.scan()) == 1
+
+
+def test_read_watch_folder_config(tmp_path: Path) -> None:
+    assert read_watch_folder_config({}) is None
+    config = read_watch_folder_config(
+        {
+            "WATCH_FOLDER": str(tmp_path),
+            "WATCH_FOLDER_MODE": "LINK",
+            "WATCH_FOLDER_STABLE_SECONDS": "2.5",
+        }
+    )
+    assert config == WatchFolderConfig(path=tmp_path, mode="link", stable_seconds=2.5)
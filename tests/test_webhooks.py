@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+
+from mlx_ui.db import JobRecord, init_db, insert_job, list_outbox_entries
+from mlx_ui.outbox import OutboxSender
+from mlx_ui.transcriber import FakeTranscriber
+from mlx_ui.webhooks import (
+    OUTBOX_CHANNEL,
+    deliver_webhook_payload,
+    validate_callback_url,
+)
+from mlx_ui.worker import Worker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 2_000_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _queue_job(tmp_path: Path, callback_url: str | None) -> tuple[Path, JobRecord]:
+    db_path = tmp_path / "jobs.db"
+    init_db(db_path)
+    upload_path = tmp_path / "uploads" / "job1" / "memo.wav"
+    upload_path.parent.mkdir(parents=True)
+    upload_path.write_bytes(b"data")
+    job = JobRecord(
+        id="job1",
+        filename="memo.wav",
+        status="queued",
+        created_at="2024-01-01T00:00:00+00:00",
+        upload_path=str(upload_path),
+        language="en",
+        callback_url=callback_url,
+    )
+    insert_job(db_path, job)
+    return db_path, job
+
+
+def _run_worker(tmp_path: Path, db_path: Path) -> None:
+    worker = Worker(
+        db_path,
+        tmp_path / "uploads",
+        tmp_path / "results",
+        transcriber=FakeTranscriber(),
+    )
+    assert worker.run_once() is True
+
+
+def test_worker_posts_completion_webhook(tmp_path: Path, webhook_server) -> None:
+    db_path, _job = _queue_job(tmp_path, f"{webhook_server.url}/hooks/done?t=1")
+    _run_worker(tmp_path, db_path)
+
+    [entry] = list_outbox_entries(db_path)
+    assert entry.channel == OUTBOX_CHANNEL
+    sender = OutboxSender(
+        db_path,
+        handlers={OUTBOX_CHANNEL: deliver_webhook_payload},
+        clock=FakeClock(),
+    )
+    assert sender.run_once() is True
+
+    [(path, body)] = webhook_server.requests
+    assert path == "/hooks/done?t=1"
+    event = json.loads(body)
+    assert event["event"] == "job.done"
+    assert event["job"]["id"] == "job1"
+    assert event["job"]["completed_at"]
+    assert event["job"]["results"] == [
+        {"name": "memo.txt", "url": "/results/job1/memo.txt"}
+    ]
+    assert list_outbox_entries(db_path) == []
+
+
+def test_worker_skips_webhook_without_callback(tmp_path: Path) -> None:
+    db_path, _job = _queue_job(tmp_path, None)
+    _run_worker(tmp_path, db_path)
+
+    assert list_outbox_entries(db_path) == []
+
+
+def test_webhook_retries_only_server_errors(tmp_path: Path, webhook_server) -> None:
+    db_path, _job = _queue_job(tmp_path, f"{webhook_server.url}/hook")
+    _run_worker(tmp_path, db_path)
+    clock = FakeClock()
+    sender = OutboxSender(
+        db_path,
+        handlers={OUTBOX_CHANNEL: deliver_webhook_payload},
+        clock=clock,
+    )
+    webhook_server.responses.extend([(503, {}), (404, {})])
+
+    sender.run_once()
+    [entry] = list_outbox_entries(db_path)
+    assert entry.status == "pending"
+    assert entry.last_error == "HTTP 503"
+
+    clock.now = entry.available_at
+    sender.run_once()
+    [entry] = list_outbox_entries(db_path)
+    assert entry.status == "failed"
+    assert entry.last_error == "HTTP 404"
+
+
+def test_validate_callback_url() -> None:
+    assert validate_callback_url("https://example.com/hook") is None
+    assert validate_callback_url("ftp://example.com/hook") is not None
+    assert validate_callback_url("/relative") is not None
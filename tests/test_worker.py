@@ -1,9 +1,26 @@
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+import subprocess
 import threading
 import time
 
-from mlx_ui.db import JobRecord, claim_next_job, init_db, insert_job, list_jobs
+from mlx_ui.compression import open_text
+from mlx_ui.db import (
+    JobRecord,
+    SegmentRecord,
+    claim_next_job,
+    delete_history_job,
+    get_job_previews,
+    init_db,
+    insert_job,
+    list_job_segments,
+    list_jobs,
+    list_outbox_entries,
+    update_job_status,
+)
+from mlx_ui.formatters import Segment, TranscriptResult
+from mlx_ui.layout import resolve_job_dir
+from mlx_ui.settings import resolve_transcriber_with_settings, update_settings_file
 from mlx_ui.worker import Worker, start_worker, stop_worker
 
 
@@ -189,3 +206,341 @@ def test_claim_next_job_blocks_when_running_exists(tmp_path: Path) -> None:
     jobs = {job.id: job for job in list_jobs(db_path)}
     assert jobs["job-running"].status == "running"
     assert jobs["job-queued"].status == "queued"
+
+
+def test_worker_marks_done_before_telegram_delivery(
+    tmp_path: Path, monkeypatch
+) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    results_dir = tmp_path / "results"
+    init_db(db_path)
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token-12345")
+    monkeypatch.setenv("TELEGRAM_CHAT_ID", "123")
+    monkeypatch.setenv("TELEGRAM_API_URL", "http://127.0.0.1:9")
+
+    job = _make_job(
+        "job1",
+        "alpha.txt",
+        datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        uploads_dir,
+    )
+    insert_job(db_path, job)
+
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=results_dir,
+        transcriber=RecordingTranscriber(),
+    )
+    assert worker.run_once() is True
+
+    jobs = list_jobs(db_path)
+    assert jobs[0].status == "done"
+    entries = list_outbox_entries(db_path)
+    assert [entry.job_id for entry in entries] == ["job1"]
+    assert all(entry.status == "pending" and entry.attempts == 0 for entry in entries)
+
+
+def test_worker_applies_settings_between_jobs(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    results_dir = tmp_path / "results"
+    init_db(db_path)
+    monkeypatch.delenv("WTM_QUICK", raising=False)
+    monkeypatch.delenv("TRANSCRIBER_BACKEND", raising=False)
+    commands: list[list[str]] = []
+
+    def fake_run(cmd, capture_output, text, check):  # type: ignore[no-untyped-def]
+        commands.append(list(cmd))
+        return subprocess.CompletedProcess(cmd, 0, stdout="hello", stderr="")
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for offset, job_id in enumerate(("job1", "job2")):
+        insert_job(
+            db_path,
+            _make_job(
+                job_id,
+                f"{job_id}.wav",
+                (base_time + timedelta(seconds=offset)).isoformat(timespec="seconds"),
+                uploads_dir,
+            ),
+        )
+
+    transcriber = resolve_transcriber_with_settings(base_dir=tmp_path)
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=results_dir,
+        transcriber=transcriber,
+        settings_base_dir=tmp_path,
+    )
+    assert worker.run_once() is True
+    update_settings_file(tmp_path, {"wtm_quick": True})
+    assert worker.run_once() is True
+
+    assert worker.transcriber is transcriber
+    assert "--quick=False" in commands[0]
+    assert "--quick=True" in commands[1]
+
+
+class SingleModelTranscriber:
+    def __init__(self) -> None:
+        self.model_name = "large-v3"
+        self.loaded: str | None = None
+        self.model_loads = 0
+        self.seen: list[str] = []
+
+    @property
+    def loaded_models(self) -> list[str]:
+        return [self.loaded] if self.loaded else []
+
+    def transcribe(self, job: JobRecord, results_dir: Path) -> Path:
+        model_name = job.model or self.model_name
+        if model_name != self.loaded:
+            self.loaded = model_name
+            self.model_loads += 1
+        self.seen.append(job.id)
+        job_dir = Path(results_dir) / job.id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        result_path = job_dir / f"{Path(job.filename).stem}.txt"
+        result_path.write_text(model_name, encoding="utf-8")
+        return result_path
+
+
+def _run_mixed_queue(tmp_path: Path, affinity_window: int) -> SingleModelTranscriber:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    init_db(db_path)
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for index in range(8):
+        job = _make_job(
+            f"job-{index}",
+            f"clip-{index}.wav",
+            (base_time + timedelta(seconds=index)).isoformat(timespec="seconds"),
+            uploads_dir,
+        )
+        # Even jobs use the default model, odd ones ask for "small".
+        job.model = "small" if index % 2 else None
+        insert_job(db_path, job)
+    transcriber = SingleModelTranscriber()
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=tmp_path / "results",
+        transcriber=transcriber,
+        affinity_window=affinity_window,
+    )
+    while worker.run_once():
+        pass
+    return transcriber
+
+
+def test_worker_model_affinity_reduces_swaps(tmp_path: Path) -> None:
+    fifo = _run_mixed_queue(tmp_path / "fifo", affinity_window=1)
+    affine = _run_mixed_queue(tmp_path / "affine", affinity_window=16)
+
+    assert fifo.model_loads == 8
+    assert affine.model_loads == 2
+    assert affine.seen == [f"job-{index}" for index in (0, 2, 4, 6, 1, 3, 5, 7)]
+
+
+def test_claim_next_job_limits_affinity_skips(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    init_db(db_path)
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for index in range(4):
+        job = _make_job(
+            f"job-{index}",
+            "clip.wav",
+            (base_time + timedelta(seconds=index)).isoformat(timespec="seconds"),
+            uploads_dir,
+        )
+        job.model = "small" if index == 0 else "large-v3"
+        insert_job(db_path, job)
+
+    claimed = []
+    for _ in range(3):
+        job = claim_next_job(
+            db_path,
+            preferred_models=["large-v3"],
+            max_affinity_skips=2,
+        )
+        assert job is not None
+        claimed.append(job.id)
+        update_job_status(db_path, job.id, "done")
+
+    # job-0 was passed over twice, so it runs before the last large-v3 job.
+    assert claimed == ["job-1", "job-2", "job-0"]
+
+
+class DetectingTranscriber(RecordingTranscriber):
+    def __init__(self) -> None:
+        super().__init__()
+        self.languages: list[str] = []
+
+    def detect_language(self, job: JobRecord) -> str | None:
+        return "en"
+
+    def transcribe(self, job: JobRecord, results_dir: Path) -> Path:
+        self.languages.append(job.language)
+        return super().transcribe(job, results_dir)
+
+
+def test_worker_stores_detected_language(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    init_db(db_path)
+    detected = _make_job("job-1", "clip.wav", "2024-01-01T00:00:00Z", uploads_dir)
+    detected.language = "any"
+    explicit = _make_job("job-2", "clip.wav", "2024-01-01T00:00:01Z", uploads_dir)
+    explicit.language = "de"
+    insert_job(db_path, detected)
+    insert_job(db_path, explicit)
+    transcriber = DetectingTranscriber()
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=tmp_path / "results",
+        transcriber=transcriber,
+    )
+
+    while worker.run_once():
+        pass
+
+    assert transcriber.languages == ["en", "de"]
+    assert {job.id: job.language for job in list_jobs(db_path)} == {
+        "job-1": "en",
+        "job-2": "de",
+    }
+
+
+def test_worker_skips_media_without_audio(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    results_dir = tmp_path / "results"
+    init_db(db_path)
+    for index, name in enumerate(["muted.mp4", "silent.m4a", "talk.wav"]):
+        insert_job(
+            db_path,
+            _make_job(f"job-{index}", name, f"2024-01-01T00:00:0{index}Z", uploads_dir),
+        )
+    streams = {"muted.mp4": 0, "silent.m4a": 1, "talk.wav": 1}
+    monkeypatch.setattr(
+        "mlx_ui.worker.count_audio_streams", lambda path: streams[path.name]
+    )
+    monkeypatch.setattr("mlx_ui.worker.is_silent", lambda path: path.name != "talk.wav")
+    transcriber = RecordingTranscriber()
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=results_dir,
+        transcriber=transcriber,
+    )
+
+    while worker.run_once():
+        pass
+
+    assert transcriber.seen == ["job-2"]
+    notes = {job.id: (job.status, job.status_note) for job in list_jobs(db_path)}
+    assert notes == {
+        "job-0": ("done", "No audio stream; transcription skipped."),
+        "job-1": ("done", "Audio is silent; transcription skipped."),
+        "job-2": ("done", None),
+    }
+    job_dir = resolve_job_dir(results_dir, "job-0")
+    with open_text(job_dir / "muted.txt.gz") as handle:
+        assert handle.read() == ""
+    assert list_outbox_entries(db_path) == []
+    assert not (uploads_dir / "job-0").exists()
+
+
+def test_worker_fails_silent_job_when_results_cannot_be_written(
+    tmp_path: Path, monkeypatch
+) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    init_db(db_path)
+    job = _make_job("job-1", "silent.m4a", "2024-01-01T00:00:00Z", uploads_dir)
+    insert_job(db_path, job)
+    monkeypatch.setattr("mlx_ui.worker.count_audio_streams", lambda path: 1)
+    monkeypatch.setattr("mlx_ui.worker.is_silent", lambda path: True)
+
+    def full_disk(*args, **kwargs):  # type: ignore[no-untyped-def]
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr("mlx_ui.worker.write_results", full_disk)
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=tmp_path / "results",
+        transcriber=RecordingTranscriber(),
+    )
+
+    assert worker.run_once() is True
+
+    [failed] = list_jobs(db_path)
+    assert failed.status == "failed"
+    assert "No space left" in (failed.error_message or "")
+    assert not Path(job.upload_path).exists()
+
+
+def test_worker_renders_all_formats_from_one_pass(tmp_path: Path) -> None:
+    db_path = tmp_path / "jobs.db"
+    uploads_dir = tmp_path / "uploads"
+    results_dir = tmp_path / "results"
+    init_db(db_path)
+    job = _make_job("job-1", "talk.wav", "2024-01-01T00:00:00Z", uploads_dir)
+    job.output_formats = ["txt", "srt", "json"]
+    insert_job(db_path, job)
+    insert_job(
+        db_path, _make_job("job-2", "memo.wav", "2024-01-01T00:00:01Z", uploads_dir)
+    )
+    update_settings_file(tmp_path, {"output_formats": ["vtt"]})
+    calls: list[str] = []
+
+    class SegmentTranscriber:
+        def transcribe(self, job: JobRecord, results_dir: Path) -> Path:
+            raise AssertionError("transcribe_result should be used")
+
+        def transcribe_result(self, job: JobRecord) -> TranscriptResult:
+            calls.append(job.id)
+            return TranscriptResult(
+                text="Hello.", segments=[Segment(0.0, 1.0, "Hello.")]
+            )
+
+    worker = Worker(
+        db_path=db_path,
+        uploads_dir=uploads_dir,
+        results_dir=results_dir,
+        transcriber=SegmentTranscriber(),
+        settings_base_dir=tmp_path,
+    )
+
+    while worker.run_once():
+        pass
+
+    assert calls == ["job-1", "job-2"]
+    first_dir = resolve_job_dir(results_dir, "job-1")
+    assert sorted(path.name for path in first_dir.iterdir()) == [
+        "talk.json.gz",
+        "talk.srt.gz",
+        "talk.txt.gz",
+    ]
+    # Jobs without their own formats follow Settings.
+    second_dir = resolve_job_dir(results_dir, "job-2")
+    assert sorted(path.name for path in second_dir.iterdir()) == [
+        "memo.txt.gz",
+        "memo.vtt.gz",
+    ]
+    assert list_job_segments(db_path, "job-1") == [
+        SegmentRecord(position=0, start=0.0, end=1.0, text="Hello.")
+    ]
+    assert get_job_previews(db_path, ["job-1"]) == {
+        "job-1": ("talk.wav", "Hello.\n", False)
+    }
+    assert delete_history_job(db_path, "job-1") is True
+    assert list_job_segments(db_path, "job-1") == []